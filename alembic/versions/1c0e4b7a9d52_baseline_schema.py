@@ -0,0 +1,88 @@
+"""Create the users, rooms and messages tables
+
+Revision ID: 1c0e4b7a9d52
+Revises:
+Create Date: 2026-10-17 08:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "1c0e4b7a9d52"
+down_revision: Union[str, Sequence[str], None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _timestamps() -> list:
+    return [
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column(
+            "created_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.func.now(),
+            nullable=False,
+        ),
+        sa.Column(
+            "updated_at", sa.DateTime(timezone=True), server_default=sa.func.now()
+        ),
+    ]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # The schema as it was before any migration. Databases that were built
+    # with Base.metadata.create_all already have these tables and keep them;
+    # the later revisions bring either kind up to date.
+    existing = set(sa.inspect(op.get_bind()).get_table_names())
+
+    if "users" not in existing:
+        op.create_table(
+            "users",
+            *_timestamps(),
+            sa.Column("username", sa.String(), nullable=False, unique=True),
+            sa.Column("email", sa.String(), nullable=False, unique=True),
+            sa.Column("hashed_password", sa.String(), nullable=False),
+            sa.Column("is_active", sa.Boolean(), nullable=False),
+            sa.Column(
+                "role", sa.Enum("USER", "ADMIN", name="userroleenum"), nullable=False
+            ),
+        )
+        op.create_index("ix_users_id", "users", ["id"])
+
+    if "rooms" not in existing:
+        op.create_table(
+            "rooms",
+            *_timestamps(),
+            sa.Column("name", sa.String(255), nullable=False, unique=True),
+            sa.Column("description", sa.Text(), nullable=True),
+            sa.Column("is_active", sa.Boolean(), nullable=False),
+        )
+        op.create_index("ix_rooms_id", "rooms", ["id"])
+
+    if "messages" not in existing:
+        op.create_table(
+            "messages",
+            *_timestamps(),
+            sa.Column("content", sa.Text(), nullable=False),
+            sa.Column(
+                "user_id", sa.Integer(), sa.ForeignKey("users.id"), nullable=False
+            ),
+            sa.Column(
+                "room_id", sa.Integer(), sa.ForeignKey("rooms.id"), nullable=False
+            ),
+        )
+        op.create_index("ix_messages_id", "messages", ["id"])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table("messages")
+    op.drop_table("rooms")
+    op.drop_table("users")
+    if op.get_bind().dialect.name == "postgresql":
+        op.execute("DROP TYPE IF EXISTS userroleenum")
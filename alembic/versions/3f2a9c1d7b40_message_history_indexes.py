@@ -0,0 +1,62 @@
+"""Add message history and foreign-key indexes
+
+Revision ID: 3f2a9c1d7b40
+Revises: 1c0e4b7a9d52
+Create Date: 2026-10-17 09:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "3f2a9c1d7b40"
+down_revision: Union[str, Sequence[str], None] = "1c0e4b7a9d52"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+INDEXES = {
+    "ix_messages_room_id_id": ["room_id", "id"],
+    "ix_messages_user_id": ["user_id"],
+}
+
+
+def _existing_indexes() -> set:
+    """Names of the indexes on messages."""
+    inspector = sa.inspect(op.get_bind())
+    return {index["name"] for index in inspector.get_indexes("messages")}
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    existing = _existing_indexes()
+    postgres = op.get_bind().dialect.name == "postgresql"
+
+    for name, columns in INDEXES.items():
+        if name in existing:
+            continue
+        if postgres:
+            # Build without blocking writes on a large table
+            with op.get_context().autocommit_block():
+                op.create_index(
+                    name, "messages", columns, postgresql_concurrently=True
+                )
+        else:
+            op.create_index(name, "messages", columns)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    existing = _existing_indexes()
+    postgres = op.get_bind().dialect.name == "postgresql"
+
+    for name in INDEXES:
+        if name not in existing:
+            continue
+        if postgres:
+            with op.get_context().autocommit_block():
+                op.drop_index(name, table_name="messages", postgresql_concurrently=True)
+        else:
+            op.drop_index(name, table_name="messages")
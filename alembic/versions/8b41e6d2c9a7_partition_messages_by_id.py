@@ -0,0 +1,155 @@
+"""Partition messages by id range and cascade room deletes
+
+Revision ID: 8b41e6d2c9a7
+Revises: 3f2a9c1d7b40
+Create Date: 2026-10-17 11:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from src.sc_chat.core.config import settings
+
+
+# revision identifiers, used by Alembic.
+revision: str = "8b41e6d2c9a7"
+down_revision: Union[str, Sequence[str], None] = "3f2a9c1d7b40"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Indexes of the plain messages table, by their columns
+PLAIN_INDEXES = {
+    ("id",): "ix_messages_id",
+    ("room_id", "id"): "ix_messages_room_id_id",
+    ("user_id",): "ix_messages_user_id",
+}
+
+
+def _is_partitioned(bind) -> bool:
+    relkind = bind.scalar(
+        sa.text("SELECT relkind FROM pg_class WHERE oid = 'messages'::regclass")
+    )
+    return relkind == "p"
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    bind = op.get_bind()
+    if bind.dialect.name != "postgresql" or _is_partitioned(bind):
+        # Other databases keep a plain table
+        return
+    inspector = sa.inspect(bind)
+
+    # The existing table becomes the first partition, [MINVALUE, boundary),
+    # without copying rows. New ids go to partitions created past it.
+    size = settings.message_partition_size
+    op.execute("LOCK TABLE messages IN ACCESS EXCLUSIVE MODE")
+    max_id = bind.scalar(sa.text("SELECT coalesce(max(id), 0) FROM messages"))
+    boundary = (max_id // size + 1) * size
+
+    indexes = inspector.get_indexes("messages")
+    for foreign_key in inspector.get_foreign_keys("messages"):
+        op.drop_constraint(foreign_key["name"], "messages", type_="foreignkey")
+    op.rename_table("messages", "messages_p0")
+    op.execute(
+        "ALTER TABLE messages_p0 RENAME CONSTRAINT messages_pkey TO messages_p0_pkey"
+    )
+    for index in indexes:
+        op.execute(
+            f"ALTER INDEX {index['name']} RENAME TO "
+            f"{index['name'].replace('messages', 'messages_p0', 1)}"
+        )
+
+    op.execute(
+        "CREATE TABLE messages (LIKE messages_p0 INCLUDING DEFAULTS) "
+        "PARTITION BY RANGE (id)"
+    )
+    op.execute("ALTER TABLE messages ADD CONSTRAINT messages_pkey PRIMARY KEY (id)")
+    op.create_index("ix_messages_id", "messages", ["id"])
+    op.create_index("ix_messages_room_id_id", "messages", ["room_id", "id"])
+    op.create_index("ix_messages_user_id", "messages", ["user_id"])
+    op.create_foreign_key(
+        "messages_room_id_fkey", "messages", "rooms", ["room_id"], ["id"],
+        ondelete="CASCADE",
+    )
+    op.create_foreign_key(
+        "messages_user_id_fkey", "messages", "users", ["user_id"], ["id"]
+    )
+    op.execute("ALTER SEQUENCE messages_id_seq OWNED BY messages.id")
+
+    # A validated CHECK matching the bound lets ATTACH skip its table scan
+    op.execute(
+        f"ALTER TABLE messages_p0 ADD CONSTRAINT messages_p0_bound "
+        f"CHECK (id IS NOT NULL AND id < {boundary})"
+    )
+    op.execute(
+        f"ALTER TABLE messages ATTACH PARTITION messages_p0 "
+        f"FOR VALUES FROM (MINVALUE) TO ({boundary})"
+    )
+    op.execute("ALTER TABLE messages_p0 DROP CONSTRAINT messages_p0_bound")
+    op.execute(
+        f"CREATE TABLE messages_p{boundary} PARTITION OF messages "
+        f"FOR VALUES FROM ({boundary}) TO ({boundary + size})"
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    bind = op.get_bind()
+    if bind.dialect.name != "postgresql" or not _is_partitioned(bind):
+        return
+
+    # The oldest remaining partition becomes the plain table again and the
+    # rows of the others are copied into it. Partitions already archived by
+    # maintenance stay in the archive.
+    op.execute("LOCK TABLE messages IN ACCESS EXCLUSIVE MODE")
+    partitions = bind.execute(
+        sa.text(
+            "SELECT inhrelid::regclass::text FROM pg_inherits "
+            "WHERE inhparent = 'messages'::regclass"
+        )
+    ).scalars().all()
+    if not partitions:
+        raise RuntimeError(
+            "messages has no partitions left to turn back into a plain table"
+        )
+    first = min(partitions, key=lambda name: int(name.rsplit("_p", 1)[1]))
+
+    op.execute(f"ALTER TABLE messages DETACH PARTITION {first}")
+    op.execute(f"INSERT INTO {first} SELECT * FROM messages")
+    op.execute(f"ALTER SEQUENCE messages_id_seq OWNED BY {first}.id")
+    # Takes the remaining partitions, foreign keys and indexes with it
+    op.execute("DROP TABLE messages")
+    op.rename_table(first, "messages")
+
+    primary_key = bind.scalar(
+        sa.text(
+            "SELECT conname FROM pg_constraint "
+            "WHERE conrelid = 'messages'::regclass AND contype = 'p'"
+        )
+    )
+    if primary_key != "messages_pkey":
+        op.execute(
+            f"ALTER TABLE messages RENAME CONSTRAINT {primary_key} TO messages_pkey"
+        )
+    existing = set()
+    for index in sa.inspect(bind).get_indexes("messages"):
+        name = PLAIN_INDEXES.get(tuple(index["column_names"]))
+        if name is None or name in existing:
+            op.drop_index(index["name"], table_name="messages")
+            continue
+        existing.add(name)
+        if index["name"] != name:
+            op.execute(f"ALTER INDEX {index['name']} RENAME TO {name}")
+    for columns, name in PLAIN_INDEXES.items():
+        if name not in existing:
+            op.create_index(name, "messages", list(columns))
+
+    op.create_foreign_key(
+        "messages_room_id_fkey", "messages", "rooms", ["room_id"], ["id"]
+    )
+    op.create_foreign_key(
+        "messages_user_id_fkey", "messages", "users", ["user_id"], ["id"]
+    )
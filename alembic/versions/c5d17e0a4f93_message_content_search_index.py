@@ -0,0 +1,67 @@
+"""Add full-text search index on message content
+
+Revision ID: c5d17e0a4f93
+Revises: 8b41e6d2c9a7
+Create Date: 2026-10-17 13:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "c5d17e0a4f93"
+down_revision: Union[str, Sequence[str], None] = "8b41e6d2c9a7"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+INDEX = "ix_messages_content_tsv"
+# Must match Message.__table_args__ and AsyncChatRepository._search_postgres
+EXPRESSION = "to_tsvector('simple'::regconfig, content)"
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+    if bind.dialect.name != "postgresql":
+        # Other databases search with the in-process index
+        return
+    if INDEX in {index["name"] for index in inspector.get_indexes("messages")}:
+        return
+
+    relkind = bind.scalar(
+        sa.text("SELECT relkind FROM pg_class WHERE oid = 'messages'::regclass")
+    )
+    if relkind != "p":
+        with op.get_context().autocommit_block():
+            op.execute(
+                f"CREATE INDEX CONCURRENTLY {INDEX} ON messages USING gin ({EXPRESSION})"
+            )
+        return
+
+    # A partitioned index cannot be built concurrently: create it on the
+    # parent only, build each partition's index concurrently and attach it.
+    partitions = bind.execute(
+        sa.text(
+            "SELECT inhrelid::regclass::text FROM pg_inherits "
+            "WHERE inhparent = 'messages'::regclass"
+        )
+    ).scalars().all()
+    op.execute(f"CREATE INDEX {INDEX} ON ONLY messages USING gin ({EXPRESSION})")
+    with op.get_context().autocommit_block():
+        for partition in partitions:
+            op.execute(
+                f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {partition}_content_tsv "
+                f"ON {partition} USING gin ({EXPRESSION})"
+            )
+            op.execute(f"ALTER INDEX {INDEX} ATTACH PARTITION {partition}_content_tsv")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    if op.get_bind().dialect.name != "postgresql":
+        return
+    op.execute(f"DROP INDEX IF EXISTS {INDEX}")
@@ -0,0 +1,96 @@
+"""Add denormalized author username to messages
+
+Revision ID: d7a3b5f81c26
+Revises: c5d17e0a4f93
+Create Date: 2026-10-17 15:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "d7a3b5f81c26"
+down_revision: Union[str, Sequence[str], None] = "c5d17e0a4f93"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+BACKFILL_BATCH = 50_000
+
+# Must match AUTHOR_USERNAME_TRIGGERS in models/message.py
+FILL_FUNCTION = """
+CREATE OR REPLACE FUNCTION messages_fill_author_username() RETURNS trigger AS $$
+BEGIN
+    IF NEW.author_username IS NULL THEN
+        SELECT username INTO NEW.author_username FROM users WHERE id = NEW.user_id;
+    END IF;
+    RETURN NEW;
+END
+$$ LANGUAGE plpgsql
+"""
+FILL_TRIGGER = """
+CREATE TRIGGER messages_fill_author_username
+    BEFORE INSERT ON messages
+    FOR EACH ROW EXECUTE FUNCTION messages_fill_author_username()
+"""
+SYNC_FUNCTION = """
+CREATE OR REPLACE FUNCTION users_sync_message_author() RETURNS trigger AS $$
+BEGIN
+    UPDATE messages SET author_username = NEW.username WHERE user_id = NEW.id;
+    RETURN NULL;
+END
+$$ LANGUAGE plpgsql
+"""
+SYNC_TRIGGER = """
+CREATE TRIGGER users_sync_message_author
+    AFTER UPDATE OF username ON users
+    FOR EACH ROW WHEN (OLD.username IS DISTINCT FROM NEW.username)
+    EXECUTE FUNCTION users_sync_message_author()
+"""
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+    columns = {column["name"] for column in inspector.get_columns("messages")}
+    if "author_username" not in columns:
+        op.add_column(
+            "messages", sa.Column("author_username", sa.String(), nullable=True)
+        )
+
+    postgres = bind.dialect.name == "postgresql"
+    if postgres:
+        # Rows inserted while the backfill runs are filled by the trigger
+        op.execute(FILL_FUNCTION)
+        op.execute("DROP TRIGGER IF EXISTS messages_fill_author_username ON messages")
+        op.execute(FILL_TRIGGER)
+
+    low, high = bind.execute(sa.text("SELECT min(id), max(id) FROM messages")).one()
+    if low is not None:
+        backfill = sa.text(
+            "UPDATE messages SET author_username = "
+            "(SELECT username FROM users WHERE users.id = messages.user_id) "
+            "WHERE id >= :low AND id < :high AND author_username IS NULL"
+        )
+        # One short transaction per batch rather than a single long one
+        with op.get_context().autocommit_block():
+            for start in range(low, high + 1, BACKFILL_BATCH):
+                bind.execute(backfill, {"low": start, "high": start + BACKFILL_BATCH})
+
+    if postgres:
+        op.execute(SYNC_FUNCTION)
+        op.execute("DROP TRIGGER IF EXISTS users_sync_message_author ON users")
+        op.execute(SYNC_TRIGGER)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    if op.get_bind().dialect.name == "postgresql":
+        op.execute("DROP TRIGGER IF EXISTS users_sync_message_author ON users")
+        op.execute("DROP FUNCTION IF EXISTS users_sync_message_author()")
+        op.execute("DROP TRIGGER IF EXISTS messages_fill_author_username ON messages")
+        op.execute("DROP FUNCTION IF EXISTS messages_fill_author_username()")
+    op.drop_column("messages", "author_username")
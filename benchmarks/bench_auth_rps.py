@@ -0,0 +1,73 @@
+"""
+Requests per second of an authenticated REST endpoint, with and without
+STATELESS_AUTH.
+
+Drives GET /api/v1/chat/websocket-info (require_user, no other database
+work) in-process through httpx's ASGI transport, so the difference between
+the two runs is the per-request user lookup.
+
+    python -m benchmarks.bench_auth_rps --requests 2000 --concurrency 50
+"""
+
+import argparse
+import asyncio
+import time
+
+import httpx
+
+from src.sc_chat import models  # noqa: F401  (registers every table)
+from src.sc_chat.core.config import settings
+from src.sc_chat.database.base import Base, SessionLocal, engine
+from src.sc_chat.main import app
+from src.sc_chat.models import User
+from src.sc_chat.security.auth import jwt_service
+
+from benchmarks.common import ensure_fixtures, print_table
+
+ENDPOINT = "/api/v1/chat/websocket-info"
+
+
+async def drive(requests: int, concurrency: int, headers: dict) -> dict:
+    transport = httpx.ASGITransport(app=app)
+    remaining = iter(range(requests))
+    failures = 0
+
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+
+        async def worker():
+            nonlocal failures
+            for _ in remaining:
+                response = await client.get(ENDPOINT, headers=headers)
+                if response.status_code != 200:
+                    failures += 1
+
+        start = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - start
+
+    return {"rps": round(requests / elapsed, 1), "failures": failures}
+
+
+async def main(args):
+    Base.metadata.create_all(engine)
+    with SessionLocal() as db:
+        user_id, _ = ensure_fixtures(db)
+        user = db.get(User, user_id)
+        token = jwt_service.create_access_token(
+            data={"email": user.email, "role": user.role.value, "uid": user.id}
+        )
+    headers = {"Authorization": f"Bearer {token}"}
+
+    rows = []
+    for stateless in (False, True):
+        settings.stateless_auth = stateless
+        result = await drive(args.requests, args.concurrency, headers)
+        rows.append({"stateless_auth": stateless, **result})
+    print_table(rows)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=50)
+    asyncio.run(main(parser.parse_args()))
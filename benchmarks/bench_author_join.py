@@ -0,0 +1,121 @@
+"""
+History page latency with the users join vs the author_username snapshot.
+
+Seeds ``--rows`` messages in one room (once; reruns reuse them), written by
+``--users`` different users, then times ``--queries`` history pages of
+``--limit`` messages at random cursors two ways: joining users for the
+username, as history reads used to, and reading messages.author_username
+from the one table.
+
+    python -m benchmarks.bench_author_join --rows 500000 --queries 2000
+"""
+
+import argparse
+import random
+import time
+
+from sqlalchemy import desc, func, insert, select
+
+from src.sc_chat import models  # noqa: F401  (registers every table)
+from src.sc_chat.database.base import Base, SessionLocal, engine
+from src.sc_chat.models import Message, User
+
+from benchmarks.common import ensure_fixtures, print_table, summarize
+
+SEED_CHUNK = 10000
+COLUMNS = (
+    Message.id,
+    Message.content,
+    Message.user_id,
+    Message.room_id,
+    Message.created_at,
+)
+
+
+def ensure_authors(db, count: int) -> list:
+    authors = []
+    for index in range(count):
+        username = f"bench_author_{index}"
+        user = db.query(User).filter(User.username == username).first()
+        if user is None:
+            user = User(
+                username=username,
+                email=f"{username}@example.com",
+                hashed_password="!",
+                is_active=True,
+            )
+            db.add(user)
+            db.flush()
+        authors.append((user.id, username))
+    db.commit()
+    return authors
+
+
+def seed(db, room_id: int, authors: list, rows: int):
+    existing = db.scalar(
+        select(func.count(Message.id)).where(Message.room_id == room_id)
+    )
+    missing = rows - existing
+    if missing <= 0:
+        return
+    print(f"Seeding {missing} messages...")
+    for offset in range(0, missing, SEED_CHUNK):
+        batch = []
+        for index in range(offset, min(offset + SEED_CHUNK, missing)):
+            user_id, username = authors[index % len(authors)]
+            batch.append(
+                {
+                    "content": f"author join bench message {index}",
+                    "user_id": user_id,
+                    "room_id": room_id,
+                    "author_username": username,
+                }
+            )
+        db.execute(insert(Message), batch)
+        db.commit()
+
+
+def page_query(room_id: int, cursor: int, limit: int, join: bool):
+    if join:
+        query = select(*COLUMNS, User.username).join(User, User.id == Message.user_id)
+    else:
+        query = select(*COLUMNS, Message.author_username.label("username"))
+    return (
+        query.where(Message.room_id == room_id, Message.id < cursor)
+        .order_by(desc(Message.id))
+        .limit(limit)
+    )
+
+
+def main(args):
+    Base.metadata.create_all(engine)
+    with SessionLocal() as db:
+        _, room_id = ensure_fixtures(db, room_name="bench_author_join")
+        authors = ensure_authors(db, args.users)
+        seed(db, room_id, authors, args.rows)
+        low, high = db.execute(
+            select(func.min(Message.id), func.max(Message.id)).where(
+                Message.room_id == room_id
+            )
+        ).one()
+
+    cursors = [random.randint(low + args.limit, high + 1) for _ in range(args.queries)]
+    rows = []
+    with engine.connect() as connection:
+        for label, join in (("join users", True), ("author_username", False)):
+            latencies = []
+            for cursor in cursors:
+                start = time.perf_counter()
+                connection.execute(page_query(room_id, cursor, args.limit, join)).all()
+                latencies.append(time.perf_counter() - start)
+            rows.append(summarize(label, latencies))
+    print_table(rows)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=200_000)
+    parser.add_argument("--users", type=int, default=500)
+    parser.add_argument("--queries", type=int, default=2000)
+    parser.add_argument("--limit", type=int, default=50)
+    main(parser.parse_args())
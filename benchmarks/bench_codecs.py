@@ -0,0 +1,104 @@
+"""
+Bytes on the wire and CPU per frame for each WebSocket codec.
+
+Encodes a single chat message frame and a 100-message history frame with
+every codec available in this process (msgpack and cbor2 are optional),
+and reports frame size, encode and decode time. The last column is the
+encode CPU for one broadcast to ``--sockets`` sockets: the manager encodes
+once per codec, whereas transport permessage-deflate compresses the same
+frame once per socket, shown as the "permessage-deflate" row.
+
+    python -m benchmarks.bench_codecs --repeat 2000 --sockets 500
+"""
+
+import argparse
+import time
+import zlib
+from datetime import datetime, timezone
+
+from src.sc_chat.utils.common.serialization import dumps
+from src.sc_chat.websocket.codecs import CODECS, DEFLATE_WBITS
+
+from benchmarks.common import print_table
+
+
+def make_message(index: int) -> dict:
+    return {
+        "id": index,
+        "content": f"message number {index} with a little bit of text",
+        "user_id": index % 7,
+        "username": f"user_{index % 7}",
+        "room_id": 1,
+        "created_at": datetime.now(timezone.utc).isoformat(),
+    }
+
+
+def make_frames() -> dict:
+    return {
+        "message": {"type": "message", "data": make_message(1)},
+        "history_100": {
+            "type": "messages_history",
+            "data": {
+                "messages": [make_message(index) for index in range(1, 101)],
+                "has_more": True,
+                "next_cursor": 1,
+            },
+        },
+    }
+
+
+def per_call_us(function, repeat: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        function()
+    return (time.perf_counter() - start) / repeat * 1e6
+
+
+def main(args):
+    rows = []
+    for frame_name, message in make_frames().items():
+        json_bytes = dumps(message)
+        for name, codec in CODECS.items():
+            encoded = codec.encode(message, json_bytes)
+            # A fresh JSON encoding is part of every broadcast
+            encode_us = per_call_us(
+                lambda: codec.encode(message, dumps(message)), args.repeat
+            )
+            rows.append(
+                {
+                    "frame": frame_name,
+                    "codec": name,
+                    "bytes": len(encoded),
+                    "encode_us": round(encode_us, 2),
+                    "decode_us": round(
+                        per_call_us(lambda: codec.decode(encoded), args.repeat), 2
+                    ),
+                    "broadcast_encode_ms": round(encode_us / 1000, 3),
+                }
+            )
+
+        def per_socket_deflate():
+            compressor = zlib.compressobj(6, zlib.DEFLATED, DEFLATE_WBITS)
+            return compressor.compress(json_bytes) + compressor.flush(
+                zlib.Z_SYNC_FLUSH
+            )
+
+        deflate_us = per_call_us(per_socket_deflate, args.repeat)
+        rows.append(
+            {
+                "frame": frame_name,
+                "codec": "permessage-deflate",
+                "bytes": len(per_socket_deflate()),
+                "encode_us": round(deflate_us, 2),
+                "decode_us": "",
+                "broadcast_encode_ms": round(deflate_us * args.sockets / 1000, 3),
+            }
+        )
+    print_table(rows)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--repeat", type=int, default=2000)
+    parser.add_argument("--sockets", type=int, default=500)
+    main(parser.parse_args())
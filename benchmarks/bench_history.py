@@ -0,0 +1,121 @@
+"""
+History page latency at increasing cursor depths.
+
+Seeds ``--rows`` messages spread over ``--rooms`` rooms (once; reruns reuse
+them), then times ChatRepository.get_recent_messages for the first room
+starting from the newest message and from cursors 10%..99% deep into its
+history. With the (room_id, id) index every page is one short index range
+scan, so latency should stay flat regardless of depth. The plan of the
+underlying query is printed for the deepest cursor.
+
+    DATABASE_URL=sqlite:///bench.db python -m benchmarks.bench_history --rows 2000000
+"""
+
+import argparse
+import time
+
+from sqlalchemy import desc, func, insert, select, text
+
+from src.sc_chat import models  # noqa: F401  (registers every table)
+from src.sc_chat.database.base import Base, SessionLocal, engine
+from src.sc_chat.models import Message, Room
+from src.sc_chat.repository.chat_repository import ChatRepository
+
+from benchmarks.common import ensure_fixtures, print_table, summarize
+
+SEED_CHUNK = 10000
+DEPTHS = (0.0, 0.1, 0.5, 0.9, 0.99)
+
+
+def ensure_rooms(db, count: int) -> list:
+    room_ids = []
+    for index in range(count):
+        name = f"bench_history_{index}"
+        room = db.query(Room).filter(Room.name == name).first()
+        if room is None:
+            room = Room(name=name, description="History benchmark room")
+            db.add(room)
+            db.flush()
+        room_ids.append(room.id)
+    db.commit()
+    return room_ids
+
+
+def seed(db, user_id: int, room_ids: list, rows: int):
+    existing = db.scalar(
+        select(func.count(Message.id)).where(Message.room_id.in_(room_ids))
+    )
+    missing = rows - existing
+    if missing <= 0:
+        return
+    print(f"Seeding {missing} messages...")
+    start = time.perf_counter()
+    for offset in range(0, missing, SEED_CHUNK):
+        db.execute(
+            insert(Message),
+            [
+                {
+                    "content": f"history bench message {offset + index}",
+                    "user_id": user_id,
+                    # Interleave rooms so one room's rows are spread over the table
+                    "room_id": room_ids[(offset + index) % len(room_ids)],
+                }
+                for index in range(min(SEED_CHUNK, missing - offset))
+            ],
+        )
+        db.commit()
+    print(f"Seeded in {time.perf_counter() - start:.1f}s")
+
+
+def explain(db, room_id: int, cursor: int, limit: int) -> str:
+    statement = (
+        select(Message.id)
+        .where(Message.room_id == room_id, Message.id < cursor)
+        .order_by(desc(Message.id))
+        .limit(limit + 1)
+    )
+    sql = str(statement.compile(bind=engine, compile_kwargs={"literal_binds": True}))
+    prefix = "EXPLAIN QUERY PLAN" if engine.dialect.name == "sqlite" else "EXPLAIN"
+    rows = db.execute(text(f"{prefix} {sql}")).all()
+    return "\n".join(" ".join(str(value) for value in row) for row in rows)
+
+
+def main(args):
+    engine.echo = False
+    Base.metadata.create_all(engine)
+    with SessionLocal() as db:
+        user_id, _ = ensure_fixtures(db)
+        room_ids = ensure_rooms(db, args.rooms)
+        seed(db, user_id, room_ids, args.rows)
+
+        room_id = room_ids[0]
+        low, high = db.execute(
+            select(func.min(Message.id), func.max(Message.id)).where(
+                Message.room_id == room_id
+            )
+        ).one()
+
+        repo = ChatRepository(db)
+        rows = []
+        for depth in DEPTHS:
+            cursor = None if depth == 0 else int(high - (high - low) * depth)
+            samples = []
+            for _ in range(args.repeat):
+                start = time.perf_counter()
+                repo.get_recent_messages(room_id, args.limit, cursor)
+                samples.append(time.perf_counter() - start)
+                db.expunge_all()
+            rows.append(summarize(f"depth {depth:.0%}", samples))
+        print_table(rows)
+
+        print(f"\nPlan at depth {DEPTHS[-1]:.0%}:")
+        print(explain(db, room_id, int(high - (high - low) * DEPTHS[-1]), args.limit))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=1000000)
+    parser.add_argument("--rooms", type=int, default=20)
+    parser.add_argument("--limit", type=int, default=50)
+    parser.add_argument("--repeat", type=int, default=50)
+    main(parser.parse_args())
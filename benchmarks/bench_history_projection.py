@@ -0,0 +1,128 @@
+"""
+History page reads: ORM objects vs column-projected rows.
+
+Seeds ``--rows`` messages in one room (once; reruns reuse them), then reads
+``--pages`` pages of ``--limit`` messages at random cursors two ways:
+
+* orm: select(Message) with the user joined in, then message_to_payload,
+  as history reads used to; every row builds a Message and a User in the
+  session's identity map.
+* projected: AsyncChatRepository's payload query, six columns as plain row
+  tuples mapped straight to payload dicts.
+
+Reports latency percentiles from an untraced run, then the average peak of
+memory allocated while reading one page, measured with tracemalloc.
+
+    python -m benchmarks.bench_history_projection --rows 100000 --pages 500
+"""
+
+import argparse
+import random
+import time
+import tracemalloc
+
+from sqlalchemy import desc, func, insert, select
+from sqlalchemy.orm import joinedload
+
+from src.sc_chat import models  # noqa: F401  (registers every table)
+from src.sc_chat.database.base import Base, SessionLocal, engine
+from src.sc_chat.models import Message
+from src.sc_chat.repository.chat_repository import (AsyncChatRepository,
+                                                    message_to_payload)
+
+from benchmarks.common import ensure_fixtures, print_table, summarize
+
+SEED_CHUNK = 10000
+
+
+def seed(db, user_id: int, room_id: int, rows: int):
+    existing = db.scalar(
+        select(func.count(Message.id)).where(Message.room_id == room_id)
+    )
+    for offset in range(existing, rows, SEED_CHUNK):
+        db.execute(
+            insert(Message),
+            [
+                {
+                    "content": f"projection bench message {index}",
+                    "user_id": user_id,
+                    "room_id": room_id,
+                }
+                for index in range(offset, min(offset + SEED_CHUNK, rows))
+            ],
+        )
+        db.commit()
+
+
+def read_orm(room_id: int, cursor: int, limit: int) -> list:
+    with SessionLocal() as db:
+        messages = (
+            db.query(Message)
+            .options(joinedload(Message.user))
+            .filter(Message.room_id == room_id, Message.id < cursor)
+            .order_by(desc(Message.id))
+            .limit(limit)
+            .all()
+        )
+        return [message_to_payload(message) for message in reversed(messages)]
+
+
+def read_projected(room_id: int, cursor: int, limit: int) -> list:
+    query = (
+        AsyncChatRepository._payload_query()
+        .where(Message.room_id == room_id, Message.id < cursor)
+        .order_by(desc(Message.id))
+        .limit(limit)
+    )
+    with engine.connect() as connection:
+        rows = connection.execute(query).all()
+    return [AsyncChatRepository._row_payload(row) for row in reversed(rows)]
+
+
+def main(args):
+    Base.metadata.create_all(engine)
+    with SessionLocal() as db:
+        user_id, room_id = ensure_fixtures(db, room_name="bench_projection")
+        seed(db, user_id, room_id, args.rows)
+        low, high = db.execute(
+            select(func.min(Message.id), func.max(Message.id)).where(
+                Message.room_id == room_id
+            )
+        ).one()
+
+    cursors = [random.randint(low + args.limit, high + 1) for _ in range(args.pages)]
+    rows = []
+    for label, read in (("orm", read_orm), ("projected", read_projected)):
+        latencies = []
+        for cursor in cursors:
+            start = time.perf_counter()
+            read(room_id, cursor, args.limit)
+            latencies.append(time.perf_counter() - start)
+
+        peak_total = 0
+        tracemalloc.start()
+        for cursor in cursors:
+            tracemalloc.reset_peak()
+            before = tracemalloc.get_traced_memory()[0]
+            read(room_id, cursor, args.limit)
+            peak_total += tracemalloc.get_traced_memory()[1] - before
+        tracemalloc.stop()
+
+        summary = summarize(label, latencies)
+        rows.append(
+            {
+                "path": label,
+                "p50_ms": summary["p50_ms"],
+                "p99_ms": summary["p99_ms"],
+                "peak_kib_per_page": round(peak_total / len(cursors) / 1024, 1),
+            }
+        )
+    print_table(rows)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--pages", type=int, default=500)
+    parser.add_argument("--limit", type=int, default=100)
+    main(parser.parse_args())
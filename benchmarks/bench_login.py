@@ -0,0 +1,82 @@
+"""
+Login throughput with bcrypt in the password hasher's process pool.
+
+Fires concurrent POST /api/v1/auth/login requests in-process through
+httpx's ASGI transport while a second client polls /health, and reports
+logins/s, login latency, 503 rejections and /health latency (which stays
+flat when bcrypt no longer occupies the shared threadpool).
+
+    BCRYPT_ROUNDS=12 PASSWORD_HASH_WORKERS=4 python -m benchmarks.bench_login
+"""
+
+import argparse
+import asyncio
+import time
+
+import httpx
+
+from src.sc_chat import models  # noqa: F401  (registers every table)
+from src.sc_chat.database.base import Base, SessionLocal, engine
+from src.sc_chat.main import app
+from src.sc_chat.models import User
+from src.sc_chat.security.auth import jwt_service
+from src.sc_chat.security.password import password_hasher
+
+from benchmarks.common import ensure_fixtures, print_table, summarize
+
+PASSWORD = "bench-password"
+
+
+async def main(args):
+    Base.metadata.create_all(engine)
+    with SessionLocal() as db:
+        user_id, _ = ensure_fixtures(db)
+        user = db.get(User, user_id)
+        user.hashed_password = jwt_service.get_password_hash(PASSWORD)
+        db.commit()
+        email = user.email
+
+    password_hasher.start()
+    transport = httpx.ASGITransport(app=app)
+    login_samples, health_samples = [], []
+    statuses: dict = {}
+    remaining = iter(range(args.logins))
+    done = asyncio.Event()
+
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+
+        async def login_worker():
+            for _ in remaining:
+                start = time.perf_counter()
+                response = await client.post(
+                    "/api/v1/auth/login",
+                    data={"username": email, "password": PASSWORD},
+                )
+                login_samples.append(time.perf_counter() - start)
+                statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+
+        async def health_poller():
+            while not done.is_set():
+                start = time.perf_counter()
+                await client.get("/health")
+                health_samples.append(time.perf_counter() - start)
+                await asyncio.sleep(0.01)
+
+        poller = asyncio.create_task(health_poller())
+        start = time.perf_counter()
+        await asyncio.gather(*(login_worker() for _ in range(args.concurrency)))
+        elapsed = time.perf_counter() - start
+        done.set()
+        await poller
+
+    password_hasher.stop()
+    print_table([summarize("login", login_samples), summarize("health", health_samples)])
+    print(f"logins/s: {statuses.get(200, 0) / elapsed:.1f}  statuses: {statuses}")
+    print(f"hasher: {password_hasher.stats()}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--logins", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=32)
+    asyncio.run(main(parser.parse_args()))
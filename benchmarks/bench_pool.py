@@ -0,0 +1,104 @@
+"""
+Async connection pool under WebSocket sessions plus REST traffic.
+
+Simulates ``--sockets`` chat connections, each doing one short read every
+``--interval`` seconds, while ``--requests`` concurrent REST-style readers
+run queries for ``--seconds``. Two session lifecycles are compared:
+
+* held: each socket keeps one AsyncSession open for its whole life, as the
+  chat loop used to, so after its first query it pins a connection.
+* per-unit: each read opens and closes its own session, so a connection is
+  only checked out while a query runs.
+
+For each run it reports REST latency, pool timeouts, overflow checkouts and
+checkout wait times. Lower DB_POOL_TIMEOUT to see "held" fail quickly:
+
+    DB_POOL_SIZE=10 DB_MAX_OVERFLOW=10 DB_POOL_TIMEOUT=2 \\
+        python -m benchmarks.bench_pool --sockets 100 --requests 20
+"""
+
+import argparse
+import asyncio
+import time
+
+from sqlalchemy import exc, text
+
+from src.sc_chat.database.base import (async_engine, async_pool_metrics,
+                                       async_session_maker)
+
+from benchmarks.common import print_table, summarize
+
+QUERY = text("SELECT 1")
+
+
+async def held_socket(deadline: float, interval: float, errors: list):
+    async with async_session_maker() as session:
+        while time.monotonic() < deadline:
+            try:
+                await session.execute(QUERY)
+            except exc.TimeoutError:
+                errors.append("socket")
+            await asyncio.sleep(interval)
+
+
+async def per_unit_socket(deadline: float, interval: float, errors: list):
+    while time.monotonic() < deadline:
+        try:
+            async with async_session_maker() as session:
+                await session.execute(QUERY)
+        except exc.TimeoutError:
+            errors.append("socket")
+        await asyncio.sleep(interval)
+
+
+async def rest_client(deadline: float, latencies: list, errors: list):
+    while time.monotonic() < deadline:
+        start = time.perf_counter()
+        try:
+            async with async_session_maker() as session:
+                await session.execute(QUERY)
+        except exc.TimeoutError:
+            errors.append("rest")
+            continue
+        latencies.append(time.perf_counter() - start)
+
+
+async def run(mode: str, args) -> dict:
+    await async_engine.dispose()
+    async_pool_metrics.reset()
+    deadline = time.monotonic() + args.seconds
+    socket = held_socket if mode == "held" else per_unit_socket
+    latencies: list = []
+    errors: list = []
+    await asyncio.gather(
+        *(socket(deadline, args.interval, errors) for _ in range(args.sockets)),
+        *(rest_client(deadline, latencies, errors) for _ in range(args.requests)),
+    )
+    pool = async_pool_metrics.summary(async_engine.pool)
+    rest = summarize(mode, latencies)
+    return {
+        "mode": mode,
+        "rest_requests": rest["count"],
+        "rest_p50_ms": rest["p50_ms"],
+        "rest_p99_ms": rest["p99_ms"],
+        "rest_timeouts": errors.count("rest"),
+        "socket_timeouts": errors.count("socket"),
+        "overflow_checkouts": pool["overflow_checkouts"],
+        "wait_p99_ms": pool["wait_p99_ms"],
+        "wait_max_ms": pool["wait_max_ms"],
+    }
+
+
+async def main(args):
+    rows = [await run(mode, args) for mode in ("held", "per-unit")]
+    await async_engine.dispose()
+    print_table(rows)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sockets", type=int, default=100)
+    parser.add_argument("--requests", type=int, default=20)
+    parser.add_argument("--interval", type=float, default=1.0)
+    parser.add_argument("--seconds", type=float, default=10)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,52 @@
+"""
+Per-check overhead of the token-bucket rate limiter.
+
+Times ``--checks`` calls of ``check_limits`` for one hot key, for keys
+spread over ``--keys`` buckets, and for the three-bucket WebSocket check
+(connection, user, room). Limits are set high enough that every check is
+allowed, so each one also refills and takes a token.
+
+    python -m benchmarks.bench_rate_limit --checks 1000000 --keys 10000
+"""
+
+import argparse
+import time
+
+from src.sc_chat.security.rate_limit import RateLimiter, check_limits
+
+from benchmarks.common import print_table
+
+UNLIMITED = 1e12
+
+
+def measure(label: str, checks: int, keys: int, buckets: int) -> dict:
+    limiters = [RateLimiter(UNLIMITED, UNLIMITED) for _ in range(buckets)]
+    start = time.perf_counter()
+    for index in range(checks):
+        key = index % keys
+        check_limits(*((limiter, key) for limiter in limiters))
+    elapsed = time.perf_counter() - start
+    return {
+        "scenario": label,
+        "checks": checks,
+        "keys": keys,
+        "ns_per_check": round(elapsed / checks * 1e9),
+        "checks_per_second": round(checks / elapsed),
+    }
+
+
+def main(args):
+    print_table(
+        [
+            measure("one key", args.checks, 1, 1),
+            measure("many keys", args.checks, args.keys, 1),
+            measure("websocket (3 buckets)", args.checks, args.keys, 3),
+        ]
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--checks", type=int, default=1_000_000)
+    parser.add_argument("--keys", type=int, default=10_000)
+    main(parser.parse_args())
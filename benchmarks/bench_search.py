@@ -0,0 +1,94 @@
+"""
+Full-text search latency on a seeded corpus.
+
+Seeds ``--rows`` messages of random words into one room (once; reruns reuse
+them), then times AsyncChatRepository.search_messages for common, rare and
+multi-word queries. On PostgreSQL this exercises the tsvector GIN index;
+elsewhere the in-process SearchIndex, whose one-off build is timed
+separately.
+
+    python -m benchmarks.bench_search --rows 500000
+"""
+
+import argparse
+import asyncio
+import random
+import time
+
+from sqlalchemy import func, insert, select
+
+from src.sc_chat import models  # noqa: F401  (registers every table)
+from src.sc_chat.database.base import Base, SessionLocal, async_session_maker, engine
+from src.sc_chat.models import Message, Room
+from src.sc_chat.repository.chat_repository import AsyncChatRepository
+
+from benchmarks.common import ensure_fixtures, print_table, summarize, timer
+
+SEED_CHUNK = 10000
+ROOM_NAME = "bench_search"
+# Zipf-like vocabulary: word{n} appears roughly 1/n as often as word1
+VOCABULARY = [f"word{rank}" for rank in range(1, 5001)]
+WEIGHTS = [1 / rank for rank in range(1, 5001)]
+QUERIES = ("word1", "word50", "word2000", "word1 word2", "word3 word400", "missing")
+
+
+def seed(db, user_id: int, room_id: int, rows: int):
+    existing = db.scalar(select(func.count(Message.id)).where(Message.room_id == room_id))
+    missing = rows - existing
+    if missing <= 0:
+        return
+    print(f"Seeding {missing} messages...")
+    generator = random.Random(42)
+    for offset in range(0, missing, SEED_CHUNK):
+        db.execute(
+            insert(Message),
+            [
+                {
+                    "content": " ".join(generator.choices(VOCABULARY, WEIGHTS, k=12)),
+                    "user_id": user_id,
+                    "room_id": room_id,
+                }
+                for _ in range(min(SEED_CHUNK, missing - offset))
+            ],
+        )
+        db.commit()
+
+
+async def main(args):
+    engine.echo = False
+    Base.metadata.create_all(engine)
+    with SessionLocal() as db:
+        user_id, _ = ensure_fixtures(db)
+        room = db.query(Room).filter(Room.name == ROOM_NAME).first()
+        if room is None:
+            room = Room(name=ROOM_NAME, description="Search benchmark room")
+            db.add(room)
+            db.commit()
+        room_id = room.id
+        seed(db, user_id, room_id, args.rows)
+
+    async with async_session_maker() as session:
+        repo = AsyncChatRepository(session)
+        with timer() as first:
+            await repo.search_messages(room_id, QUERIES[0], args.limit)
+        print(f"First search (includes any index build): {first['seconds'] * 1000:.1f} ms")
+
+        rows = []
+        for query in QUERIES:
+            samples = []
+            hits = 0
+            for _ in range(args.repeat):
+                start = time.perf_counter()
+                results, _ = await repo.search_messages(room_id, query, args.limit)
+                samples.append(time.perf_counter() - start)
+                hits = len(results)
+            rows.append({**summarize(query, samples), "results": hits})
+        print_table(rows)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=200000)
+    parser.add_argument("--limit", type=int, default=20)
+    parser.add_argument("--repeat", type=int, default=20)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,119 @@
+"""
+History frame serialization: per-request dicts vs cached encoded fragments.
+
+The "rebuild" path is what websocket/chat.py used to do for every history
+request: build a dict per message and json.dumps the whole frame. The
+"fragments" path encodes each message once (EncodedMessage) and builds
+frames by joining bytes. Runs without a database.
+
+    python -m benchmarks.bench_serialization --messages 100 --requests 2000
+"""
+
+import argparse
+import json
+import time
+from datetime import datetime, timezone
+from types import SimpleNamespace
+
+from src.sc_chat.utils.common import serialization
+from src.sc_chat.utils.common.serialization import EncodedMessage, history_frame
+
+from benchmarks.common import print_table
+
+
+def make_messages(count: int) -> list:
+    """Objects shaped like Message rows with their user loaded."""
+    now = datetime.now(timezone.utc)
+    return [
+        SimpleNamespace(
+            id=index,
+            content=f"message number {index} with a little bit of text",
+            user_id=index % 7,
+            user=SimpleNamespace(username=f"user_{index % 7}"),
+            room_id=1,
+            created_at=now,
+        )
+        for index in range(1, count + 1)
+    ]
+
+
+def rebuild_frame(messages) -> str:
+    message_responses = []
+    for msg in messages:
+        message_responses.append(
+            {
+                "id": msg.id,
+                "content": msg.content,
+                "user_id": msg.user_id,
+                "username": msg.user.username,
+                "room_id": msg.room_id,
+                "created_at": msg.created_at.isoformat(),
+            }
+        )
+    return json.dumps(
+        {
+            "type": "messages_history",
+            "data": {
+                "messages": message_responses,
+                "has_more": True,
+                "next_cursor": messages[0].id,
+            },
+        }
+    )
+
+
+def to_encoded(messages) -> list:
+    return [
+        EncodedMessage(
+            {
+                "id": msg.id,
+                "content": msg.content,
+                "user_id": msg.user_id,
+                "username": msg.user.username,
+                "room_id": msg.room_id,
+                "created_at": msg.created_at.isoformat(),
+            }
+        )
+        for msg in messages
+    ]
+
+
+def run(label: str, func, requests: int) -> dict:
+    start = time.perf_counter()
+    size = 0
+    for _ in range(requests):
+        size = len(func())
+    elapsed = time.perf_counter() - start
+    return {
+        "path": label,
+        "encoder": serialization.BACKEND,
+        "us_per_frame": round(elapsed / requests * 1e6, 2),
+        "frame_bytes": size,
+    }
+
+
+def main(args):
+    messages = make_messages(args.messages)
+    encoded = to_encoded(messages)
+
+    rows = [
+        run("rebuild dicts + json.dumps", lambda: rebuild_frame(messages), args.requests),
+        run(
+            "fragments, cold (encode each time)",
+            lambda: history_frame(to_encoded(messages), True, 1).decode(),
+            args.requests,
+        ),
+        run(
+            "fragments, cached",
+            lambda: history_frame(encoded, True, 1).decode(),
+            args.requests,
+        ),
+    ]
+    print_table(rows)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--messages", type=int, default=100)
+    parser.add_argument("--requests", type=int, default=2000)
+    main(parser.parse_args())
@@ -0,0 +1,161 @@
+"""
+Soak test: many WebSocket clients against a small connection pool.
+
+Runs the real chat endpoint in process with ``--sockets`` fake sockets in
+one room. Every socket connects (room lookup plus initial history), then
+stays idle, except that every ``--fetch-interval`` seconds a few of them
+request older history. A probe meanwhile runs one query every 50 ms. The
+chat loop borrows a session only for each unit of work, so the peak number
+of checked-out connections stays around the pool size however many sockets
+are open, with no pool timeouts.
+
+    DB_POOL_SIZE=5 DB_MAX_OVERFLOW=0 DB_POOL_TIMEOUT=5 \\
+        python -m benchmarks.bench_ws_soak --sockets 2000 --seconds 30
+"""
+
+import argparse
+import asyncio
+import time
+
+from sqlalchemy import text
+
+from src.sc_chat import models  # noqa: F401  (registers every table)
+from src.sc_chat.core.config import settings
+from src.sc_chat.database.base import (SessionLocal, async_engine,
+                                       async_pool_metrics, async_session_maker)
+from src.sc_chat.models import User
+from src.sc_chat.repository.message_ingest import message_ingestor
+from src.sc_chat.security.auth import jwt_service
+from src.sc_chat.utils.common.serialization import dumps
+from src.sc_chat.websocket.chat import websocket_endpoint
+from src.sc_chat.websocket.connection_manager import manager
+
+from benchmarks.common import ensure_fixtures, print_table, summarize
+
+
+class FakeWebSocket:
+    """Just enough of a Starlette WebSocket to drive websocket_endpoint."""
+
+    def __init__(self, token: str):
+        self.query_params = {"token": token}
+        self.headers: dict = {}
+        self.scope: dict = {"subprotocols": []}
+        self.inbox: asyncio.Queue = asyncio.Queue()
+        self.frames = 0
+        self.accepted = asyncio.Event()
+
+    async def accept(self, subprotocol=None):
+        self.accepted.set()
+
+    async def send_text(self, text: str):
+        self.frames += 1
+
+    async def send_bytes(self, data: bytes):
+        self.frames += 1
+
+    async def receive(self) -> dict:
+        return await self.inbox.get()
+
+    async def close(self, code: int = 1000, reason: str = ""):
+        self.accepted.set()
+
+    def push(self, frame: dict):
+        self.inbox.put_nowait({"type": "websocket.receive", "text": dumps(frame).decode()})
+
+    def hang_up(self):
+        self.inbox.put_nowait({"type": "websocket.disconnect", "code": 1000})
+
+
+async def monitor(deadline: float, peaks: dict):
+    while time.monotonic() < deadline:
+        peaks["checked_out"] = max(peaks["checked_out"], async_engine.pool.checkedout())
+        await asyncio.sleep(0.01)
+
+
+async def probe(deadline: float, latencies: list):
+    while time.monotonic() < deadline:
+        start = time.perf_counter()
+        async with async_session_maker() as session:
+            await session.execute(text("SELECT 1"))
+        latencies.append(time.perf_counter() - start)
+        await asyncio.sleep(0.05)
+
+
+async def fetcher(deadline: float, sockets: list, interval: float, per_round: int):
+    index = 0
+    while time.monotonic() < deadline:
+        for _ in range(per_round):
+            sockets[index % len(sockets)].push({"type": "fetch_messages", "limit": 100})
+            index += 1
+        await asyncio.sleep(interval)
+
+
+async def main(args):
+    # Measure the pool, not the per-room rate limit
+    settings.rate_limit_enabled = False
+    with SessionLocal() as db:
+        user_id, room_id = ensure_fixtures(db)
+        user = db.get(User, user_id)
+        token = jwt_service.create_access_token(
+            data={"email": user.email, "role": user.role.value, "uid": user.id}
+        )
+
+    await manager.start()
+    await message_ingestor.start()
+    async_pool_metrics.reset()
+
+    sockets = [FakeWebSocket(token) for _ in range(args.sockets)]
+    start = time.perf_counter()
+    endpoints = [
+        asyncio.create_task(websocket_endpoint(websocket, room_id))
+        for websocket in sockets
+    ]
+    await asyncio.gather(*(websocket.accepted.wait() for websocket in sockets))
+    connect_seconds = time.perf_counter() - start
+    connected = manager.get_connection_count(room_id)
+
+    deadline = time.monotonic() + args.seconds
+    peaks = {"checked_out": 0}
+    latencies: list = []
+    await asyncio.gather(
+        monitor(deadline, peaks),
+        probe(deadline, latencies),
+        fetcher(deadline, sockets, args.fetch_interval, args.fetches),
+    )
+
+    for websocket in sockets:
+        websocket.hang_up()
+    results = await asyncio.gather(*endpoints, return_exceptions=True)
+    await message_ingestor.stop()
+    await manager.stop()
+
+    pool = async_pool_metrics.summary(async_engine.pool)
+    probe_latency = summarize("probe", latencies)
+    print_table(
+        [
+            {
+                "sockets": args.sockets,
+                "connected": connected,
+                "errors": sum(isinstance(result, Exception) for result in results),
+                "connect_s": round(connect_seconds, 2),
+                "pool_size": settings.db_pool_size,
+                "max_overflow": settings.db_max_overflow,
+                "peak_checked_out": peaks["checked_out"],
+                "pool_timeouts": pool["timeouts"],
+                "checkouts": pool["checkouts"],
+                "wait_p99_ms": pool["wait_p99_ms"],
+                "probe_p99_ms": probe_latency["p99_ms"],
+                "frames_sent": sum(websocket.frames for websocket in sockets),
+            }
+        ]
+    )
+    await async_engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sockets", type=int, default=1000)
+    parser.add_argument("--seconds", type=float, default=30)
+    parser.add_argument("--fetch-interval", type=float, default=0.1)
+    parser.add_argument("--fetches", type=int, default=5)
+    asyncio.run(main(parser.parse_args()))
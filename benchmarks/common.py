@@ -0,0 +1,65 @@
+"""Helpers shared by the benchmark scripts."""
+
+import time
+from contextlib import contextmanager
+
+from src.sc_chat.websocket.metrics import percentile
+
+
+def summarize(label: str, samples: list) -> dict:
+    """Return count and latency percentiles (milliseconds) for a list of seconds."""
+    values = sorted(samples)
+    return {
+        "label": label,
+        "count": len(values),
+        "p50_ms": round(percentile(values, 0.50) * 1000, 3),
+        "p95_ms": round(percentile(values, 0.95) * 1000, 3),
+        "p99_ms": round(percentile(values, 0.99) * 1000, 3),
+        "max_ms": round(values[-1] * 1000, 3) if values else 0.0,
+    }
+
+
+def print_table(rows: list):
+    """Print a list of dicts as an aligned table."""
+    if not rows:
+        return
+    columns = list(rows[0])
+    widths = {
+        column: max(len(column), *(len(str(row.get(column, ""))) for row in rows))
+        for column in columns
+    }
+    print("  ".join(column.ljust(widths[column]) for column in columns))
+    for row in rows:
+        print("  ".join(str(row.get(column, "")).ljust(widths[column]) for column in columns))
+
+
+@contextmanager
+def timer():
+    """Yield a dict whose "seconds" key is set when the block exits."""
+    result = {"seconds": 0.0}
+    start = time.perf_counter()
+    try:
+        yield result
+    finally:
+        result["seconds"] = time.perf_counter() - start
+
+
+def ensure_fixtures(db, username: str = "bench_user", room_name: str = "bench_room"):
+    """Create (once) and return the user and room the benchmarks write to."""
+    from src.sc_chat.models import Room, User
+
+    user = db.query(User).filter(User.username == username).first()
+    if user is None:
+        user = User(
+            username=username,
+            email=f"{username}@example.com",
+            hashed_password="!",
+            is_active=True,
+        )
+        db.add(user)
+    room = db.query(Room).filter(Room.name == room_name).first()
+    if room is None:
+        room = Room(name=room_name, description="Benchmark room")
+        db.add(room)
+    db.commit()
+    return user.id, room.id
@@ -2,6 +2,7 @@ from datetime import timedelta
 from typing import Annotated
 
 from fastapi import APIRouter, Depends, HTTPException
+from fastapi.concurrency import run_in_threadpool
 from fastapi.security import OAuth2PasswordRequestForm
 from sqlalchemy.orm import Session
 from starlette import status
@@ -11,8 +12,12 @@ from src.sc_chat.models.user import User
 from src.sc_chat.repository.auth_repository import AuthRepository
 from src.sc_chat.schemas.user import RefreshTokenRequest, UserSignup
 from src.sc_chat.security.auth import jwt_service
+from src.sc_chat.security.password import password_hasher
+from src.sc_chat.security.rate_limit import rate_limit_client
 
-router = APIRouter(prefix="/auth", tags=["Auth"])
+router = APIRouter(
+    prefix="/auth", tags=["Auth"], dependencies=[Depends(rate_limit_client)]
+)
 
 
 def get_auth_repository(db: Session = Depends(get_db)) -> AuthRepository:
@@ -21,23 +26,32 @@ def get_auth_repository(db: Session = Depends(get_db)) -> AuthRepository:
 
 
 @router.post("/login")
-def login_user(
+async def login_user(
     form_data: Annotated[OAuth2PasswordRequestForm, Depends()],
     auth_repo: AuthRepository = Depends(get_auth_repository),
 ):
     """
     Login endpoint that authenticates user and returns access and refresh tokens.
     """
-    user = auth_repo.authenticate_user(
-        email=form_data.username, password=form_data.password
+    invalid_credentials = HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="Invalid credentials",
+        headers={"WWW-Authenticate": "Bearer"},
     )
-
-    if not user:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Invalid credentials",
-            headers={"WWW-Authenticate": "Bearer"},
-        )
+    user = await run_in_threadpool(auth_repo.get_user_by_email, form_data.username)
+    if user is None:
+        # Take as long as a wrong password, so timing does not reveal emails
+        await password_hasher.verify_dummy(form_data.password)
+        raise invalid_credentials
+
+    # bcrypt runs in the password hasher's process pool
+    is_valid, new_hash = await password_hasher.verify(
+        form_data.password, user.hashed_password
+    )
+    if not is_valid:
+        raise invalid_credentials
+    if new_hash:
+        await run_in_threadpool(auth_repo.update_password_hash, user, new_hash)
 
     if user.is_active is False:
         raise HTTPException(
@@ -48,7 +62,7 @@ def login_user(
 
     access_token_expires = timedelta(minutes=jwt_service.ACCESS_TOKEN_EXPIRE_MINUTES)
     access_token = jwt_service.create_access_token(
-        data={"email": user.email, "role": user.role.value},
+        data={"email": user.email, "role": user.role.value, "uid": user.id},
         expires_delta=access_token_expires,
     )
 
@@ -72,29 +86,32 @@ def login_user(
 
 
 @router.post("/signup", response_model=dict)
-def signup_user(
+async def signup_user(
     user_data: UserSignup, auth_repo: AuthRepository = Depends(get_auth_repository)
 ):
     """
     Signup endpoint that creates a new user account.
     """
-    if auth_repo.user_exists_by_email(user_data.email):
+    if await run_in_threadpool(auth_repo.user_exists_by_email, user_data.email):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="User with this email already exists",
         )
 
-    if auth_repo.user_exists_by_username(user_data.username):
+    if await run_in_threadpool(auth_repo.user_exists_by_username, user_data.username):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="User with this username already exists",
         )
 
+    hashed_password = await password_hasher.hash(user_data.password)
+
     try:
-        new_user = auth_repo.create_user(
+        new_user = await run_in_threadpool(
+            auth_repo.create_user,
             username=user_data.username,
             email=user_data.email,
-            password=user_data.password,
+            hashed_password=hashed_password,
         )
 
         return {
@@ -144,7 +161,7 @@ def refresh_token(
             minutes=jwt_service.ACCESS_TOKEN_EXPIRE_MINUTES
         )
         access_token = jwt_service.create_access_token(
-            data={"email": user.email, "role": user.role.value},
+            data={"email": user.email, "role": user.role.value, "uid": user.id},
             expires_delta=access_token_expires,
         )
 
@@ -2,13 +2,14 @@ from fastapi import APIRouter, Depends
 from typing import Dict, Any
 
 from src.sc_chat.security.rbac import require_user
-from src.sc_chat.models.user import User
+from src.sc_chat.security.principal import Principal
+from src.sc_chat.websocket.codecs import CODECS
 
 router = APIRouter(prefix="/chat", tags=["Chat Documentation"])
 
 
 @router.get("/websocket-info", response_model=Dict[str, Any])
-def get_websocket_info(current_user: User = Depends(require_user())):
+def get_websocket_info(current_user: Principal = Depends(require_user())):
     """
     Get WebSocket connection information and API documentation.
     """
@@ -19,13 +20,32 @@ def get_websocket_info(current_user: User = Depends(require_user())):
             "query_parameter": "?token=your_jwt_token",
             "header": "Authorization: Bearer your_jwt_token",
         },
+        "codecs": {
+            "query_parameter": "?codec=msgpack",
+            "subprotocol": "Sec-WebSocket-Protocol: msgpack",
+            "available": list(CODECS),
+            "binary": [name for name, codec in CODECS.items() if codec.binary],
+        },
         "connection_example": {
-            "javascript": "new WebSocket('ws://localhost:8000/ws/1?token=your_jwt_token')",
-            "python": "import websockets; websockets.connect('ws://localhost:8000/ws/1?token=your_jwt_token')",
+            "javascript": (
+                "new WebSocket('ws://localhost:8000/ws/1?token=your_jwt_token')"
+            ),
+            "python": (
+                "import websockets; "
+                "websockets.connect('ws://localhost:8000/ws/1?token=your_jwt_token')"
+            ),
         },
         "message_formats": {
             "send_message": {"type": "message", "content": "Hello, world!"},
-            "fetch_history": {"type": "fetch_messages", "cursor": 123, "limit": 50},
+            "fetch_history": {
+                "type": "fetch_messages",
+                "cursor": 123,
+                "limit": 500,
+                "request_id": "older-1",
+            },
+            "typing": {"type": "typing", "is_typing": True},
+            "read_receipt": {"type": "read_receipt", "message_id": 123},
+            "reaction": {"type": "reaction", "message_id": 123, "emoji": "👍"},
         },
         "response_formats": {
             "new_message": {
@@ -45,10 +65,50 @@ def get_websocket_info(current_user: User = Depends(require_user())):
                     "messages": "Array of message objects",
                     "has_more": True,
                     "next_cursor": 100,
+                    "request_id": "older-1",
+                    "final": False,
+                },
+            },
+            "presence_state": {
+                "type": "presence_state",
+                "data": {
+                    "room_id": 1,
+                    "users": [{"user_id": 1, "username": "john_doe"}],
+                    "connections": 2,
+                },
+            },
+            "presence": {
+                "type": "presence",
+                "data": {
+                    "room_id": 1,
+                    "joined": [{"user_id": 2, "username": "jane_doe"}],
+                    "left": [3],
+                },
+            },
+            "events": {
+                "type": "events",
+                "data": {
+                    "room_id": 1,
+                    "events": [
+                        {
+                            "type": "typing",
+                            "user_id": 2,
+                            "username": "jane_doe",
+                            "is_typing": True,
+                        }
+                    ],
                 },
             },
             "error": {"type": "error", "message": "Error description"},
         },
+        "presence": {
+            "scope": "worker",
+            "description": (
+                "presence_state and presence diffs cover the sockets held by the "
+                "worker serving the connection; users connected to other "
+                "workers are not listed and their joins and leaves are not sent"
+            ),
+        },
         "room_info": {
             "description": "Replace {room_id} with the actual room ID you want to join",
             "example": "/ws/1 for room with ID 1",
@@ -1,57 +1,88 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from typing import List
+from fastapi import APIRouter, Depends, HTTPException, Query, UploadFile, status
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import Response, StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import AsyncGenerator, List
 
-from src.sc_chat.database.conn import get_db
-from src.sc_chat.repository.chat_repository import ChatRepository
-from src.sc_chat.schemas.chat import RoomResponse, RoomCreate, MessageResponse
+from src.sc_chat.core.config import settings
+from src.sc_chat.database.conn import get_async_session
+from src.sc_chat.database.routing import replica_router
+from src.sc_chat.repository.chat_repository import AsyncChatRepository
+from src.sc_chat.repository.message_import import MessageImporter
+from src.sc_chat.schemas.chat import (
+    RoomResponse,
+    RoomCreate,
+    PaginatedMessagesResponse,
+)
+from src.sc_chat.security.auth import jwt_service
+from src.sc_chat.security.rate_limit import rate_limit_user
 from src.sc_chat.security.rbac import require_user, require_admin
-from src.sc_chat.models.user import User
+from src.sc_chat.security.principal import Principal
+from src.sc_chat.utils.common.enum import ExportFormatEnum
+from src.sc_chat.utils.common.export import MEDIA_TYPES, encode_export, export_filename
+from src.sc_chat.utils.common.serialization import messages_page
+from src.sc_chat.websocket.connection_manager import manager
+from src.sc_chat.websocket.presence import presence
 
-router = APIRouter(prefix="/rooms", tags=["Chat Rooms"])
+router = APIRouter(
+    prefix="/rooms", tags=["Chat Rooms"], dependencies=[Depends(rate_limit_user)]
+)
 
 
-def get_chat_repository(db: Session = Depends(get_db)) -> ChatRepository:
-    """Dependency to get chat repository instance."""
-    return ChatRepository(db)
+async def get_chat_repository(
+    db: AsyncSession = Depends(get_async_session),
+    current_user: Principal = Depends(jwt_service.get_current_principal),
+) -> AsyncGenerator[AsyncChatRepository, None]:
+    """Dependency to get chat repository instance; reads may use a replica."""
+    async with replica_router.async_read_session(current_user.id) as reader:
+        yield AsyncChatRepository(db, read_session=reader)
 
 
 @router.get("/", response_model=List[RoomResponse])
-def get_all_rooms(
-    chat_repo: ChatRepository = Depends(get_chat_repository),
-    current_user: User = Depends(require_user()),
+async def get_all_rooms(
+    chat_repo: AsyncChatRepository = Depends(get_chat_repository),
+    current_user: Principal = Depends(require_user()),
 ):
     """Get all active chat rooms."""
-    rooms = chat_repo.get_all_rooms()
+    rooms = await chat_repo.get_all_rooms()
     return rooms
 
 
 @router.post("/", response_model=RoomResponse)
-def create_room(
+async def create_room(
     room_data: RoomCreate,
-    chat_repo: ChatRepository = Depends(get_chat_repository),
-    current_user: User = Depends(require_admin()),
+    chat_repo: AsyncChatRepository = Depends(get_chat_repository),
+    current_user: Principal = Depends(require_admin()),
 ):
     """Create a new chat room (Admin only)."""
-    existing_room = chat_repo.get_room_by_name(room_data.name)
+    existing_room = await chat_repo.get_room_by_name(room_data.name)
     if existing_room:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=f"Room with name '{room_data.name}' already exists",
         )
 
-    room = chat_repo.create_room(name=room_data.name, description=room_data.description)
+    room = await chat_repo.create_room(
+        name=room_data.name, description=room_data.description
+    )
+    replica_router.note_write(current_user.id)
     return room
 
 
+@router.get("/connection-stats")
+def get_connection_stats(current_user: Principal = Depends(require_admin())):
+    """Get the size and memory footprint of this worker's sockets (Admin only)."""
+    return manager.memory_footprint()
+
+
 @router.get("/{room_id}", response_model=RoomResponse)
-def get_room(
+async def get_room(
     room_id: int,
-    chat_repo: ChatRepository = Depends(get_chat_repository),
-    current_user: User = Depends(require_user()),
+    chat_repo: AsyncChatRepository = Depends(get_chat_repository),
+    current_user: Principal = Depends(require_user()),
 ):
     """Get a specific room by ID."""
-    room = chat_repo.get_room_by_id(room_id)
+    room = await chat_repo.get_room_by_id(room_id)
     if not room:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -60,26 +91,175 @@ def get_room(
     return room
 
 
-@router.get("/{room_id}/messages", response_model=List[MessageResponse])
-def get_room_messages(
+@router.delete("/{room_id}")
+async def delete_room(
+    room_id: int,
+    chat_repo: AsyncChatRepository = Depends(get_chat_repository),
+    current_user: Principal = Depends(require_admin()),
+):
+    """Delete a room and all of its messages (Admin only)."""
+    deleted = await chat_repo.delete_room(room_id)
+    replica_router.note_write(current_user.id)
+    if not deleted:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Room with ID {room_id} not found",
+        )
+    return {"message": f"Room {room_id} deleted"}
+
+
+@router.get("/{room_id}/presence")
+async def get_room_presence(
+    room_id: int,
+    current_user: Principal = Depends(require_user()),
+):
+    """
+    Get the users currently connected to a room through this worker.
+
+    Served from the in-memory connection registry of the worker handling
+    the request; users with several tabs open are listed once. Rosters are
+    not shared between workers, so with several workers users connected
+    to another one are not listed.
+    """
+    return presence.roster(room_id)
+
+
+@router.get(
+    "/{room_id}/messages",
+    # The body is built from pre-encoded JSON, so it is documented rather
+    # than validated through a response_model
+    response_class=Response,
+    responses={200: {"model": PaginatedMessagesResponse}},
+)
+async def get_room_messages(
     room_id: int,
-    limit: int = 50,
+    limit: int = Query(50, ge=1, le=settings.history_max_messages),
     cursor: int | None = None,
-    chat_repo: ChatRepository = Depends(get_chat_repository),
-    current_user: User = Depends(require_user()),
+    chat_repo: AsyncChatRepository = Depends(get_chat_repository),
+    current_user: Principal = Depends(require_user()),
 ):
     """
     Get messages from a room with pagination.
 
     Use this endpoint to fetch message history via REST API.
     For real-time messaging, use the WebSocket endpoint /ws/{room_id}
+
+    Returns the same page object as WebSocket history: pass ``next_cursor``
+    as ``cursor`` to get the older page, while ``has_more`` is true. The
+    body is joined from each message's cached JSON rather than validated
+    per row.
     """
-    room = chat_repo.get_room_by_id(room_id)
+    room = await chat_repo.get_room_by_id(room_id)
     if not room:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=f"Room with ID {room_id} not found",
         )
 
-    messages, has_more = chat_repo.get_recent_messages(room_id, limit, cursor)
-    return messages
+    messages, has_more = await chat_repo.get_history_page(room_id, limit, cursor)
+    next_cursor = messages[0].id if messages and has_more else None
+    return Response(
+        content=messages_page(messages, has_more, next_cursor),
+        media_type="application/json",
+    )
+
+
+@router.get("/{room_id}/search")
+async def search_room_messages(
+    room_id: int,
+    q: str = Query(..., min_length=1),
+    limit: int = Query(20, ge=1, le=100),
+    offset: int = Query(0, ge=0),
+    chat_repo: AsyncChatRepository = Depends(get_chat_repository),
+    current_user: Principal = Depends(require_user()),
+):
+    """
+    Full-text search of a room's messages, best match first.
+
+    Every word of ``q`` must appear in a message. Page through results with
+    ``offset``; ``has_more`` tells whether another page exists.
+    """
+    room = await chat_repo.get_room_by_id(room_id)
+    if not room:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Room with ID {room_id} not found",
+        )
+
+    results, has_more = await chat_repo.search_messages(room_id, q, limit, offset)
+    return {"results": results, "has_more": has_more}
+
+
+@router.get("/{room_id}/export")
+async def export_room_messages(
+    room_id: int,
+    format: ExportFormatEnum = ExportFormatEnum.NDJSON,
+    gzip: bool = False,
+    chat_repo: AsyncChatRepository = Depends(get_chat_repository),
+    current_user: Principal = Depends(require_admin()),
+):
+    """
+    Stream a room's full message history as NDJSON or CSV (Admin only).
+
+    Messages are read in batches through a server-side cursor and written
+    to the response as they are encoded, optionally gzip compressed.
+    """
+    room = await chat_repo.get_room_by_id(room_id)
+    if not room:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Room with ID {room_id} not found",
+        )
+
+    async def body():
+        # The request's sessions are closed before the response is streamed
+        async with replica_router.async_read_session(current_user.id) as session:
+            batches = AsyncChatRepository(session).stream_message_payloads(
+                room_id, settings.export_batch_size
+            )
+            async for chunk in encode_export(batches, format, gzip):
+                yield chunk
+
+    filename = export_filename(room_id, format, gzip)
+    return StreamingResponse(
+        body(),
+        media_type="application/gzip" if gzip else MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
+
+
+@router.post("/{room_id}/import")
+async def import_room_messages(
+    room_id: int,
+    file: UploadFile,
+    chat_repo: AsyncChatRepository = Depends(get_chat_repository),
+    current_user: Principal = Depends(require_admin()),
+):
+    """
+    Bulk-load an NDJSON file of messages into a room (Admin only).
+
+    Each line is {"username": ..., "content": ..., "created_at": ...}. For
+    very large files or resumable imports use the import_messages CLI.
+    """
+    importer = MessageImporter(room_id)
+    try:
+        stats = await run_in_threadpool(importer.run, file.file)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(e))
+    # Back on the event loop, which owns the cached history of the room
+    await chat_repo.invalidate_room(room_id)
+    return stats.as_dict()
+
+
+@router.get("/{room_id}/fanout-stats")
+def get_room_fanout_stats(
+    room_id: int,
+    current_user: Principal = Depends(require_admin()),
+):
+    """
+    Get broadcast fan-out latency percentiles for a room (Admin only).
+
+    Latency is measured from the moment a broadcast is queued for a socket
+    until it has been written to that socket, on this worker.
+    """
+    return manager.get_fanout_latency(room_id)
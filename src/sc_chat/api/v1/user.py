@@ -1,17 +1,26 @@
+from typing import Generator
+
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
 
-from src.sc_chat.database.conn import get_db
+from src.sc_chat.database.routing import replica_router
 from src.sc_chat.repository.user_repository import UserRepository
 from src.sc_chat.schemas.user import UserResponse
+from src.sc_chat.security.auth import jwt_service
+from src.sc_chat.security.principal import Principal
+from src.sc_chat.security.rate_limit import rate_limit_user
 from src.sc_chat.security.rbac import require_admin, require_user
 
-router = APIRouter(prefix="/user", tags=["User"])
+router = APIRouter(
+    prefix="/user", tags=["User"], dependencies=[Depends(rate_limit_user)]
+)
 
 
-def get_user_repository(db: Session = Depends(get_db)) -> UserRepository:
-    """Dependency to get user repository instance."""
-    return UserRepository(db)
+def get_user_repository(
+    current_user: Principal = Depends(jwt_service.get_current_principal),
+) -> Generator[UserRepository, None, None]:
+    """Dependency to get user repository instance; reads may use a replica."""
+    with replica_router.read_session(current_user.id) as db:
+        yield UserRepository(db)
 
 
 @router.get("/", response_model=list[UserResponse])
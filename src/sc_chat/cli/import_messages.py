@@ -0,0 +1,48 @@
+"""
+Bulk-load NDJSON messages into a room.
+
+    python -m src.sc_chat.cli.import_messages ROOM_ID messages.ndjson \
+        --checkpoint messages.ndjson.checkpoint
+
+Every line is {"username": ..., "content": ..., "created_at": ...}. Rerun
+the same command after an interruption to resume from the checkpoint.
+"""
+
+import argparse
+import sys
+
+from src.sc_chat import models  # noqa: F401  (registers every table)
+from src.sc_chat.repository.message_import import ImportStats, MessageImporter
+
+
+def report(stats: ImportStats):
+    print(
+        f"\r{stats.rows} rows imported, {stats.skipped} skipped, "
+        f"{stats.invalid} invalid, {stats.rows_per_second:,.0f} rows/s",
+        end="",
+        flush=True,
+    )
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("room_id", type=int)
+    parser.add_argument("source", help="NDJSON file, one message per line")
+    parser.add_argument("--checkpoint", help="File recording progress, for resuming")
+    parser.add_argument("--batch-size", type=int)
+    args = parser.parse_args(argv)
+
+    importer = MessageImporter(args.room_id, args.batch_size, progress=report)
+    try:
+        with open(args.source, "rb") as source:
+            stats = importer.run(source, args.checkpoint)
+    except ValueError as e:
+        print(f"Import failed: {e}", file=sys.stderr)
+        return 1
+    print()
+    print(stats.as_dict())
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -8,12 +8,127 @@ class Settings(BaseSettings):
 
     database_url: str = Field(..., env="DATABASE_URL")
     async_database_url: str = Field(..., env="ASYNC_DATABASE_URL")
+    # Each engine (sync and async) has its own pool of this size
+    db_pool_size: int = Field(10, env="DB_POOL_SIZE")
+    db_max_overflow: int = Field(20, env="DB_MAX_OVERFLOW")
+    db_pool_timeout: float = Field(30, env="DB_POOL_TIMEOUT")
+    db_pool_recycle: int = Field(1800, env="DB_POOL_RECYCLE")
+    db_pool_pre_ping: bool = Field(True, env="DB_POOL_PRE_PING")
+    # PostgreSQL only; 0 disables the limit
+    db_statement_timeout_ms: int = Field(30000, env="DB_STATEMENT_TIMEOUT_MS")
+    db_prepared_statement_cache_size: int = Field(
+        500, env="DB_PREPARED_STATEMENT_CACHE_SIZE"
+    )
+    db_echo: bool = Field(False, env="DB_ECHO")
+
+    # Read replicas, comma-separated, listing the same servers in the same
+    # order for both drivers; empty sends every read to the primary
+    database_replica_urls: str = Field("", env="DATABASE_REPLICA_URLS")
+    async_database_replica_urls: str = Field("", env="ASYNC_DATABASE_REPLICA_URLS")
+    # Replicas further behind than this, or failing a check, get no reads
+    db_replica_max_lag_seconds: float = Field(5.0, env="DB_REPLICA_MAX_LAG_SECONDS")
+    db_replica_check_interval_seconds: float = Field(
+        5.0, env="DB_REPLICA_CHECK_INTERVAL_SECONDS"
+    )
+    db_replica_check_timeout_seconds: float = Field(
+        2.0, env="DB_REPLICA_CHECK_TIMEOUT_SECONDS"
+    )
+    # A user's reads stay on the primary this long after they write; keep it
+    # above the max lag plus the check interval
+    db_read_your_writes_seconds: float = Field(10.0, env="DB_READ_YOUR_WRITES_SECONDS")
 
     secret_key: str = Field(..., env="SECRET_KEY")
     algorithm: str = Field("HS256", env="ALGORITHM")
     access_token_expire_minutes: int = Field(30, env="ACCESS_TOKEN_EXPIRE_MINUTES")
     refresh_token_time_in_minutes: int = Field(40, env="REFRESH_TOKEN_TIME_IN_MINUTES")
 
+    pubsub_backend: str = Field("memory", env="PUBSUB_BACKEND")
+    pubsub_socket_path: str = Field(
+        "/tmp/sc_chat_pubsub.sock", env="PUBSUB_SOCKET_PATH"
+    )
+
+    ws_send_queue_size: int = Field(256, env="WS_SEND_QUEUE_SIZE")
+    # "drop" skips frames for a full outbox, "disconnect" closes the socket
+    ws_slow_consumer_policy: str = Field("drop", env="WS_SLOW_CONSUMER_POLICY")
+
+    # Joins and leaves within this window are broadcast as one presence diff
+    presence_debounce_ms: int = Field(1000, env="PRESENCE_DEBOUNCE_MS")
+
+    # Typing, read receipt and reaction events: batch window and per-key rate
+    ephemeral_flush_interval_ms: int = Field(100, env="EPHEMERAL_FLUSH_INTERVAL_MS")
+    ephemeral_min_interval_ms: int = Field(1000, env="EPHEMERAL_MIN_INTERVAL_MS")
+    # Pending events kept per user and per room; new keys past either are dropped
+    ephemeral_max_pending_per_user: int = Field(
+        20, env="EPHEMERAL_MAX_PENDING_PER_USER"
+    )
+    ephemeral_max_pending_per_room: int = Field(
+        200, env="EPHEMERAL_MAX_PENDING_PER_ROOM"
+    )
+
+    # Token buckets: sustained actions per second and burst size. Connection,
+    # user and room buckets gate WebSocket sends and history fetches; the user
+    # bucket also gates authenticated REST calls, the client one auth calls.
+    rate_limit_enabled: bool = Field(True, env="RATE_LIMIT_ENABLED")
+    rate_limit_connection_per_second: float = Field(
+        5.0, env="RATE_LIMIT_CONNECTION_PER_SECOND"
+    )
+    rate_limit_connection_burst: float = Field(10.0, env="RATE_LIMIT_CONNECTION_BURST")
+    rate_limit_user_per_second: float = Field(10.0, env="RATE_LIMIT_USER_PER_SECOND")
+    rate_limit_user_burst: float = Field(30.0, env="RATE_LIMIT_USER_BURST")
+    rate_limit_room_per_second: float = Field(200.0, env="RATE_LIMIT_ROOM_PER_SECOND")
+    rate_limit_room_burst: float = Field(400.0, env="RATE_LIMIT_ROOM_BURST")
+    rate_limit_client_per_second: float = Field(2.0, env="RATE_LIMIT_CLIENT_PER_SECOND")
+    rate_limit_client_burst: float = Field(10.0, env="RATE_LIMIT_CLIENT_BURST")
+
+    ingest_batch_size: int = Field(100, env="INGEST_BATCH_SIZE")
+    ingest_max_delay_ms: int = Field(10, env="INGEST_MAX_DELAY_MS")
+    ingest_queue_size: int = Field(10000, env="INGEST_QUEUE_SIZE")
+    # "commit" acks a send once its batch is committed, "enqueue" once queued
+    ingest_durability: str = Field("commit", env="INGEST_DURABILITY")
+
+    message_cache_max_bytes: int = Field(
+        64 * 1024 * 1024, env="MESSAGE_CACHE_MAX_BYTES"
+    )
+    message_cache_room_size: int = Field(500, env="MESSAGE_CACHE_ROOM_SIZE")
+    # Read usernames from messages.author_username instead of joining users.
+    # The add_message_author_username migration adds and backfills the
+    # column; turn this off only to serve reads from an older schema.
+    message_author_snapshot: bool = Field(True, env="MESSAGE_AUTHOR_SNAPSHOT")
+
+    # History goes out in frames of this many messages, read one frame at a
+    # time once at most history_max_queued_frames are waiting to be sent
+    history_page_size: int = Field(20, env="HISTORY_PAGE_SIZE")
+    history_initial_messages: int = Field(50, env="HISTORY_INITIAL_MESSAGES")
+    history_max_messages: int = Field(5000, env="HISTORY_MAX_MESSAGES")
+    history_max_queued_frames: int = Field(4, env="HISTORY_MAX_QUEUED_FRAMES")
+
+    identity_cache_ttl_seconds: float = Field(60, env="IDENTITY_CACHE_TTL_SECONDS")
+    identity_cache_size: int = Field(10000, env="IDENTITY_CACHE_SIZE")
+    token_cache_size: int = Field(10000, env="TOKEN_CACHE_SIZE")
+    # Trust the uid/role claims of access tokens instead of loading the user
+    stateless_auth: bool = Field(False, env="STATELESS_AUTH")
+
+    bcrypt_rounds: int = Field(12, env="BCRYPT_ROUNDS")
+    password_hash_workers: int = Field(2, env="PASSWORD_HASH_WORKERS")
+    # Hash/verify calls queued or running before logins get a 503
+    password_hash_max_pending: int = Field(64, env="PASSWORD_HASH_MAX_PENDING")
+
+    # Range partitioning of messages by id (PostgreSQL only)
+    message_partition_size: int = Field(1_000_000, env="MESSAGE_PARTITION_SIZE")
+    message_partitions_ahead: int = Field(2, env="MESSAGE_PARTITIONS_AHEAD")
+    # Partitions whose newest message is older than this are archived; 0 keeps all
+    message_retention_days: int = Field(0, env="MESSAGE_RETENTION_DAYS")
+    message_archive_dir: str = Field("./data/archive", env="MESSAGE_ARCHIVE_DIR")
+    partition_maintenance_interval_seconds: int = Field(
+        3600, env="PARTITION_MAINTENANCE_INTERVAL_SECONDS"
+    )
+
+    # Rows fetched per round trip when streaming a room export
+    export_batch_size: int = Field(1000, env="EXPORT_BATCH_SIZE")
+
+    # Messages per COPY / INSERT transaction of a bulk import
+    import_batch_size: int = Field(5000, env="IMPORT_BATCH_SIZE")
+
     class Config:  # type: ignore
         """Configuration for Pydantic settings."""
 
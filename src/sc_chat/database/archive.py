@@ -0,0 +1,194 @@
+import bisect
+import gzip
+import os
+import threading
+import zlib
+from collections import OrderedDict
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from src.sc_chat.core.config import settings
+from src.sc_chat.utils.common.serialization import dumps, loads
+
+INDEX_FILE = "index.json"
+# Decoded room slices kept in memory for repeated paging
+SLICE_CACHE_SIZE = 32
+READ_CHUNK_BYTES = 64 * 1024
+
+
+class MessageArchive:
+    """
+    Compressed on-disk archive of messages from detached partitions.
+
+    Each archived partition is one gzip NDJSON file of chat payloads,
+    sorted by (room_id, id). Every room's rows are written as a separate
+    gzip member, so the whole file is still a valid ``.ndjson.gz`` while
+    one room's rows can be read by seeking straight to their member.
+    ``index.json`` records, per file, the id range of the partition and
+    the offset, length and id range of every room's member.
+    """
+
+    def __init__(self, directory: Optional[str] = None):
+        self.directory = directory or settings.message_archive_dir
+        self.partitions: List[dict] = []
+        self._index_mtime: Optional[float] = None
+        self._slices: "OrderedDict[Tuple[str, int], List[dict]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @property
+    def index_path(self) -> str:
+        return os.path.join(self.directory, INDEX_FILE)
+
+    def reload(self):
+        """Re-read the index if another process archived a partition since."""
+        try:
+            mtime = os.stat(self.index_path).st_mtime
+        except FileNotFoundError:
+            self.partitions = []
+            self._index_mtime = None
+            return
+        if mtime == self._index_mtime:
+            return
+        with open(self.index_path, "rb") as index_file:
+            self.partitions = loads(index_file.read())["partitions"]
+        self._index_mtime = mtime
+
+    def write_partition(self, lower: int, upper: int, rows: Iterable[dict]) -> str:
+        """
+        Archive one partition's payloads, given sorted by (room_id, id).
+
+        The file is written and fsynced before the index references it, so
+        a crash leaves at worst an unreferenced file.
+        """
+        os.makedirs(self.directory, exist_ok=True)
+        filename = f"messages_{lower}_{upper}.ndjson.gz"
+        path = os.path.join(self.directory, filename)
+        rooms: Dict[str, list] = {}
+
+        with open(path + ".tmp", "wb") as archive_file:
+            lines: List[bytes] = []
+            room_id, first_id, last_id = None, None, None
+
+            def flush_room():
+                offset = archive_file.tell()
+                archive_file.write(gzip.compress(b"".join(lines)))
+                length = archive_file.tell() - offset
+                rooms[str(room_id)] = [offset, length, first_id, last_id, len(lines)]
+
+            for row in rows:
+                if row["room_id"] != room_id:
+                    if lines:
+                        flush_room()
+                    room_id, lines, first_id = row["room_id"], [], row["id"]
+                lines.append(dumps(row) + b"\n")
+                last_id = row["id"]
+            if lines:
+                flush_room()
+            archive_file.flush()
+            os.fsync(archive_file.fileno())
+        os.replace(path + ".tmp", path)
+
+        with self._lock:
+            self.reload()
+            partitions = [p for p in self.partitions if p["file"] != filename]
+            partitions.append(
+                {"file": filename, "lower": lower, "upper": upper, "rooms": rooms}
+            )
+            partitions.sort(key=lambda partition: partition["lower"])
+            tmp_index = self.index_path + ".tmp"
+            with open(tmp_index, "wb") as index_file:
+                index_file.write(dumps({"partitions": partitions}))
+            os.replace(tmp_index, self.index_path)
+            self.reload()
+        return path
+
+    def get_page(
+        self, room_id: int, limit: int, cursor: Optional[int]
+    ) -> Tuple[List[dict], bool]:
+        """
+        Return (payloads, has_more) of archived messages older than ``cursor``.
+
+        Same contract as ChatRepository.get_recent_messages: at most
+        ``limit`` messages, oldest first.
+        """
+        with self._lock:
+            self.reload()
+            partitions = self.partitions
+        key = str(room_id)
+        collected: List[dict] = []
+
+        # Newest partition first, until one more message than needed is found
+        for partition in reversed(partitions):
+            if len(collected) > limit:
+                break
+            entry = partition["rooms"].get(key)
+            if entry is None or (cursor and entry[2] >= cursor):
+                continue
+            rows = self._read_slice(partition["file"], room_id, entry)
+            end = len(rows)
+            if cursor:
+                end = bisect.bisect_left(rows, cursor, key=lambda row: row["id"])
+            needed = limit + 1 - len(collected)
+            collected = rows[max(0, end - needed) : end] + collected
+
+        has_more = len(collected) > limit
+        if has_more:
+            collected = collected[1:]
+        return collected, has_more
+
+    def iter_room(self, room_id: int) -> Iterator[dict]:
+        """
+        Yield every archived payload of a room, oldest first.
+
+        Members are decompressed incrementally, so memory use does not
+        depend on how many messages the room has.
+        """
+        with self._lock:
+            self.reload()
+            partitions = self.partitions
+        key = str(room_id)
+
+        for partition in partitions:
+            entry = partition["rooms"].get(key)
+            if entry is None:
+                continue
+            offset, remaining = entry[0], entry[1]
+            decompressor = zlib.decompressobj(wbits=31)
+            pending = b""
+            path = os.path.join(self.directory, partition["file"])
+            with open(path, "rb") as archive_file:
+                archive_file.seek(offset)
+                while remaining:
+                    chunk = archive_file.read(min(READ_CHUNK_BYTES, remaining))
+                    if not chunk:
+                        break
+                    remaining -= len(chunk)
+                    lines = (pending + decompressor.decompress(chunk)).split(b"\n")
+                    pending = lines.pop()
+                    for line in lines:
+                        if line:
+                            yield loads(line)
+            if pending:
+                yield loads(pending)
+
+    def _read_slice(self, filename: str, room_id: int, entry: list) -> List[dict]:
+        cache_key = (filename, room_id)
+        with self._lock:
+            rows = self._slices.get(cache_key)
+            if rows is not None:
+                self._slices.move_to_end(cache_key)
+                return rows
+
+        offset, length = entry[0], entry[1]
+        with open(os.path.join(self.directory, filename), "rb") as archive_file:
+            archive_file.seek(offset)
+            data = gzip.decompress(archive_file.read(length))
+        rows = [loads(line) for line in data.splitlines() if line]
+
+        with self._lock:
+            self._slices[cache_key] = rows
+            while len(self._slices) > SLICE_CACHE_SIZE:
+                self._slices.popitem(last=False)
+        return rows
+
+
+message_archive = MessageArchive()
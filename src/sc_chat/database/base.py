@@ -1,19 +1,69 @@
 from sqlalchemy import create_engine
-from sqlalchemy.ext.asyncio import (AsyncSession, async_sessionmaker,
-                                    create_async_engine)
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import DeclarativeBase, sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool, Pool, QueuePool
 
 from src.sc_chat.core.config import settings
+from src.sc_chat.database.pool import PoolMetrics, metered_pool_class
 
-engine = create_engine(settings.database_url, echo=True)
+
+def engine_options(url: str, pool_class: type[Pool], metrics: PoolMetrics) -> dict:
+    """Pool and connection arguments for an engine, from settings."""
+    options = {
+        "echo": settings.db_echo,
+        "poolclass": metered_pool_class(pool_class, metrics),
+        "pool_size": settings.db_pool_size,
+        "max_overflow": settings.db_max_overflow,
+        "pool_timeout": settings.db_pool_timeout,
+        "pool_recycle": settings.db_pool_recycle,
+        "pool_pre_ping": settings.db_pool_pre_ping,
+    }
+    parsed = make_url(url)
+    if parsed.get_backend_name() != "postgresql":
+        return options
+
+    connect_args: dict = {}
+    timeout = settings.db_statement_timeout_ms
+    if parsed.get_driver_name() == "asyncpg":
+        connect_args["prepared_statement_cache_size"] = (
+            settings.db_prepared_statement_cache_size
+        )
+        if timeout:
+            connect_args["server_settings"] = {"statement_timeout": str(timeout)}
+    elif timeout:
+        connect_args["options"] = f"-c statement_timeout={timeout}"
+    options["connect_args"] = connect_args
+    return options
+
+
+sync_pool_metrics = PoolMetrics()
+engine = create_engine(
+    settings.database_url,
+    **engine_options(settings.database_url, QueuePool, sync_pool_metrics),
+)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 
-async_engine = create_async_engine(settings.async_database_url, echo=True)
+async_pool_metrics = PoolMetrics()
+async_engine = create_async_engine(
+    settings.async_database_url,
+    **engine_options(
+        settings.async_database_url, AsyncAdaptedQueuePool, async_pool_metrics
+    ),
+)
 async_session_maker = async_sessionmaker(
     async_engine, expire_on_commit=False, class_=AsyncSession
 )
 
 
+def pool_status() -> dict:
+    """Metrics of both engines' connection pools."""
+    return {
+        "sync": sync_pool_metrics.summary(engine.pool),
+        "async": async_pool_metrics.summary(async_engine.pool),
+    }
+
+
 class Base(DeclarativeBase):
     pass
@@ -1,14 +1,18 @@
-from contextlib import contextmanager
-from typing import AsyncGenerator
+from contextlib import asynccontextmanager, contextmanager
+from typing import AsyncGenerator, AsyncIterator
 
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import scoped_session
 
 from src.sc_chat.database.base import SessionLocal, async_session_maker
 
+# Thread-local sessions for code running outside a request
+ScopedSession = scoped_session(SessionLocal)
+
 
 def get_db() -> SessionLocal:  # type: ignore
-    print("Connecting to database...")
+    # FastAPI caches dependencies per request, so every Depends(get_db) of
+    # one request shares this session
     db = SessionLocal()
     try:
         yield db
@@ -18,13 +22,31 @@ def get_db() -> SessionLocal:  # type: ignore
 
 @contextmanager
 def db_session():
-    scoped_factory = scoped_session(SessionLocal)
-    session = scoped_factory()
+    """
+    Use the current thread's session, creating it if needed.
+
+    Nested blocks on one thread share the session; only the outermost
+    block closes it.
+    """
+    outermost = not ScopedSession.registry.has()
+    session = ScopedSession()
     try:
         yield session
     finally:
-        session.close()
-        scoped_factory.remove()
+        if outermost:
+            ScopedSession.remove()
+
+
+@asynccontextmanager
+async def async_db_session() -> AsyncIterator[AsyncSession]:
+    """
+    An AsyncSession for one unit of work.
+
+    A connection is only checked out once a query runs, and it goes back
+    to the pool when the block exits.
+    """
+    async with async_session_maker() as session:
+        yield session
 
 
 async def get_async_session() -> AsyncGenerator[AsyncSession, None]:
@@ -0,0 +1,222 @@
+import asyncio
+import logging
+import re
+from datetime import datetime, timedelta, timezone
+from typing import Iterator, List, NamedTuple, Optional
+
+from sqlalchemy import DateTime, text
+from sqlalchemy.engine import Connection
+
+from src.sc_chat.core.config import settings
+from src.sc_chat.database.archive import MessageArchive, message_archive
+from src.sc_chat.database.base import engine
+
+logger = logging.getLogger(__name__)
+
+PARENT_TABLE = "messages"
+BOUND_PATTERN = re.compile(r"FROM \((\w+)\) TO \((\w+)\)")
+# Arbitrary key so only one worker maintains partitions at a time
+MAINTENANCE_LOCK_KEY = 72_301_455
+ARCHIVE_FETCH_SIZE = 10000
+
+
+class Partition(NamedTuple):
+    """One range partition of the messages table; ``lower`` is None for MINVALUE."""
+
+    name: str
+    lower: Optional[int]
+    upper: int
+
+
+def partition_name(lower: int) -> str:
+    return f"{PARENT_TABLE}_p{lower}"
+
+
+def is_partitioned(connection: Connection) -> bool:
+    """Whether messages is a partitioned table (only ever on PostgreSQL)."""
+    if connection.dialect.name != "postgresql":
+        return False
+    relkind = connection.scalar(
+        text("SELECT relkind FROM pg_class WHERE oid = to_regclass(:table)"),
+        {"table": PARENT_TABLE},
+    )
+    return relkind == "p"
+
+
+def list_partitions(connection: Connection) -> List[Partition]:
+    """Return the attached partitions of messages, oldest range first."""
+    rows = connection.execute(
+        text(
+            """
+            SELECT child.relname, pg_get_expr(child.relpartbound, child.oid)
+            FROM pg_inherits
+            JOIN pg_class child ON child.oid = pg_inherits.inhrelid
+            WHERE pg_inherits.inhparent = to_regclass(:table)
+            """
+        ),
+        {"table": PARENT_TABLE},
+    )
+    partitions = []
+    for name, bound in rows:
+        match = BOUND_PATTERN.search(bound or "")
+        if match is None:
+            continue
+        lower, upper = match.groups()
+        partitions.append(
+            Partition(name, None if lower == "MINVALUE" else int(lower), int(upper))
+        )
+    return sorted(partitions, key=lambda partition: partition.upper)
+
+
+def current_message_id(connection: Connection) -> int:
+    """The last id handed out by the messages id sequence."""
+    sequence = connection.scalar(
+        text("SELECT pg_get_serial_sequence(:table, 'id')"), {"table": PARENT_TABLE}
+    )
+    return connection.scalar(text(f"SELECT last_value FROM {sequence}")) or 0
+
+
+def ensure_partitions(
+    connection: Connection, size: Optional[int] = None, ahead: Optional[int] = None
+) -> List[str]:
+    """Create partitions until ``ahead`` ranges lie past the current id."""
+    size = size or settings.message_partition_size
+    ahead = ahead or settings.message_partitions_ahead
+    last_id = current_message_id(connection)
+    partitions = list_partitions(connection)
+    upper = partitions[-1].upper if partitions else (last_id // size) * size
+
+    created = []
+    while upper < last_id + ahead * size:
+        name = partition_name(upper)
+        connection.execute(
+            text(
+                f"CREATE TABLE IF NOT EXISTS {name} PARTITION OF {PARENT_TABLE} "
+                f"FOR VALUES FROM ({upper}) TO ({upper + size})"
+            )
+        )
+        created.append(name)
+        upper += size
+    return created
+
+
+def _archived_rows(connection: Connection, table: str) -> Iterator[dict]:
+    result = connection.execution_options(
+        stream_results=True, yield_per=ARCHIVE_FETCH_SIZE
+    ).execute(
+        text(
+            f"""
+            SELECT m.id, m.content, m.user_id, u.username, m.room_id, m.created_at
+            FROM {table} m
+            LEFT JOIN users u ON u.id = m.user_id
+            ORDER BY m.room_id, m.id
+            """
+        ).columns(created_at=DateTime(timezone=True))
+    )
+    for message_id, content, user_id, username, room_id, created_at in result:
+        yield {
+            "id": message_id,
+            "content": content,
+            "user_id": user_id,
+            "username": username,
+            "room_id": room_id,
+            "created_at": created_at.isoformat(),
+        }
+
+
+def archive_partition(partition: Partition, archive: Optional[MessageArchive] = None):
+    """
+    Write a partition's rows to the archive, then detach and drop it.
+
+    Only full partitions are archived, so their rows no longer change and
+    are read while the partition is still attached, without locking out
+    writers to messages. The detach and drop then run in their own short
+    transaction; if that fails, the partition stays attached and is simply
+    archived again on the next pass.
+    """
+    archive = archive or message_archive
+    with engine.connect() as connection:
+        archive.write_partition(
+            partition.lower or 0,
+            partition.upper,
+            _archived_rows(connection, partition.name),
+        )
+    with engine.begin() as connection:
+        connection.execute(
+            text(f"ALTER TABLE {PARENT_TABLE} DETACH PARTITION {partition.name}")
+        )
+        connection.execute(text(f"DROP TABLE {partition.name}"))
+
+
+def archive_expired_partitions(
+    retention_days: Optional[int] = None, archive: Optional[MessageArchive] = None
+) -> List[str]:
+    """Archive, oldest first, the full partitions past the retention period."""
+    if retention_days is None:
+        retention_days = settings.message_retention_days
+    if retention_days <= 0:
+        return []
+    cutoff = datetime.now(timezone.utc) - timedelta(days=retention_days)
+
+    archived = []
+    with engine.connect() as connection:
+        last_id = current_message_id(connection)
+        partitions = list_partitions(connection)
+
+    for partition in partitions:
+        if partition.upper > last_id:
+            # Still receiving writes
+            break
+        with engine.connect() as connection:
+            newest = connection.scalar(
+                text(f"SELECT max(created_at) FROM {partition.name}")
+            )
+        if newest is not None and newest >= cutoff:
+            break
+        archive_partition(partition, archive)
+        archived.append(partition.name)
+    return archived
+
+
+def maintain_partitions() -> dict:
+    """
+    Create upcoming partitions and archive expired ones.
+
+    A no-op unless messages is partitioned. Safe to run from every worker:
+    only the one holding the advisory lock does the work.
+    """
+    with engine.connect() as connection:
+        if not is_partitioned(connection):
+            return {}
+        if not connection.scalar(
+            text("SELECT pg_try_advisory_lock(:key)"), {"key": MAINTENANCE_LOCK_KEY}
+        ):
+            return {}
+        try:
+            created = ensure_partitions(connection)
+            connection.commit()
+            archived = archive_expired_partitions()
+        finally:
+            connection.execute(
+                text("SELECT pg_advisory_unlock(:key)"), {"key": MAINTENANCE_LOCK_KEY}
+            )
+            connection.commit()
+
+    if created or archived:
+        logger.info("Partition maintenance: created %s, archived %s", created, archived)
+    return {"created": created, "archived": archived}
+
+
+async def run_partition_maintenance():
+    """Run maintain_partitions periodically, off the event loop."""
+    while True:
+        try:
+            await asyncio.to_thread(maintain_partitions)
+        except Exception:
+            logger.exception("Error maintaining message partitions")
+        await asyncio.sleep(settings.partition_maintenance_interval_seconds)
+
+
+if __name__ == "__main__":
+    # One maintenance pass, e.g. from cron
+    print(maintain_partitions())
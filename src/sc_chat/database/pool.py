@@ -0,0 +1,75 @@
+import time
+from collections import deque
+from typing import Deque, Type
+
+from sqlalchemy import exc
+from sqlalchemy.pool import Pool
+
+from src.sc_chat.websocket.metrics import percentile
+
+
+class PoolMetrics:
+    """
+    Checkout counters and wait times of one engine's connection pool.
+
+    Waits are the time spent getting a connection from the pool, including
+    opening a new one; only the last ``window`` are kept.
+    """
+
+    def __init__(self, window: int = 1024):
+        self.waits: Deque[float] = deque(maxlen=window)
+        self.reset()
+
+    def reset(self):
+        """Clear the counters and wait samples."""
+        self.waits.clear()
+        self.checkouts = 0
+        self.overflow_checkouts = 0
+        self.timeouts = 0
+
+    def summary(self, pool: Pool) -> dict:
+        """Counters, wait percentiles in milliseconds and the pool's current state."""
+        waits = sorted(self.waits)
+        status = {
+            "checkouts": self.checkouts,
+            "overflow_checkouts": self.overflow_checkouts,
+            "timeouts": self.timeouts,
+            "wait_p50_ms": round(percentile(waits, 0.50) * 1000, 3),
+            "wait_p99_ms": round(percentile(waits, 0.99) * 1000, 3),
+            "wait_max_ms": round(waits[-1] * 1000, 3) if waits else 0.0,
+        }
+        # Queue pools report their sizing; others (e.g. NullPool) do not
+        for name in ("size", "checkedin", "checkedout", "overflow"):
+            method = getattr(pool, name, None)
+            if method is not None:
+                status[name] = method()
+        return status
+
+
+class MeteredPool:
+    """Mixin timing every checkout of a queue pool into its class's metrics."""
+
+    metrics: PoolMetrics
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            connection = super()._do_get()  # type: ignore[misc]
+        except exc.TimeoutError:
+            self.metrics.timeouts += 1
+            raise
+        self.metrics.waits.append(time.perf_counter() - start)
+        self.metrics.checkouts += 1
+        if self.overflow() > 0:  # type: ignore[attr-defined]
+            self.metrics.overflow_checkouts += 1
+        return connection
+
+
+def metered_pool_class(base: Type[Pool], metrics: PoolMetrics) -> Type[Pool]:
+    """
+    Subclass a queue pool class so that it records into ``metrics``.
+
+    The metrics live on the class rather than the instance, so they survive
+    the pool being recreated by ``engine.dispose()``.
+    """
+    return type(f"Metered{base.__name__}", (MeteredPool, base), {"metrics": metrics})
@@ -0,0 +1,317 @@
+import asyncio
+import itertools
+import logging
+import time
+from collections import OrderedDict
+from contextlib import asynccontextmanager, contextmanager
+from typing import AsyncIterator, Iterator, List, Optional
+
+from sqlalchemy import create_engine, exc, text
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+from src.sc_chat.core.config import settings
+from src.sc_chat.database.base import SessionLocal, async_session_maker, engine_options
+from src.sc_chat.database.pool import PoolMetrics
+
+logger = logging.getLogger(__name__)
+
+# Seconds a streaming replica is behind; 0 when it has replayed everything it
+# received, so an idle primary does not make its replicas look stale. NULL
+# when its WAL receiver is not streaming: a disconnected replica has also
+# replayed all it received, but may be arbitrarily far behind. Reading the
+# receiver status takes pg_read_all_stats (e.g. via pg_monitor).
+POSTGRES_LAG_QUERY = text(
+    """
+    SELECT CASE
+        WHEN NOT pg_is_in_recovery() THEN 0
+        WHEN NOT EXISTS (
+            SELECT 1 FROM pg_stat_wal_receiver WHERE status = 'streaming'
+        ) THEN NULL
+        WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+        ELSE COALESCE(
+            EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0
+        )
+    END
+    """
+)
+
+# Errors that mean the replica itself is unreachable or unusable
+REPLICA_ERRORS = (exc.OperationalError, exc.InterfaceError, OSError)
+
+
+class ReplicaNotStreaming(Exception):
+    """Raised by a lag check on a replica that is not receiving WAL."""
+
+
+def split_urls(value: str) -> List[str]:
+    return [url.strip() for url in value.split(",") if url.strip()]
+
+
+class Replica:
+    """One read replica: its sync and async engines and last health check."""
+
+    __slots__ = (
+        "name",
+        "engine",
+        "async_engine",
+        "session_maker",
+        "async_session_maker",
+        "pool_metrics",
+        "async_pool_metrics",
+        "healthy",
+        "lag_seconds",
+        "checked_at",
+        "error",
+    )
+
+    def __init__(self, url: str, async_url: str):
+        self.name = make_url(async_url).render_as_string(hide_password=True)
+        self.pool_metrics = PoolMetrics()
+        self.engine = create_engine(
+            url, **engine_options(url, QueuePool, self.pool_metrics)
+        )
+        self.session_maker = sessionmaker(
+            autocommit=False, autoflush=False, bind=self.engine
+        )
+        self.async_pool_metrics = PoolMetrics()
+        self.async_engine = create_async_engine(
+            async_url,
+            **engine_options(async_url, AsyncAdaptedQueuePool, self.async_pool_metrics),
+        )
+        self.async_session_maker = async_sessionmaker(
+            self.async_engine, expire_on_commit=False, class_=AsyncSession
+        )
+        # No reads until the first check has passed
+        self.healthy = False
+        self.lag_seconds: Optional[float] = None
+        self.checked_at: Optional[float] = None
+        self.error: Optional[str] = None
+
+    def status(self) -> dict:
+        return {
+            "name": self.name,
+            "healthy": self.healthy,
+            "lag_seconds": self.lag_seconds,
+            "checked_seconds_ago": (
+                round(time.monotonic() - self.checked_at, 1)
+                if self.checked_at is not None
+                else None
+            ),
+            "error": self.error,
+            "pools": {
+                "sync": self.pool_metrics.summary(self.engine.pool),
+                "async": self.async_pool_metrics.summary(self.async_engine.pool),
+            },
+        }
+
+
+class ReplicaRouter:
+    """
+    Sends read-only sessions to read replicas and everything else to the primary.
+
+    A background task checks every replica's health and replication lag
+    every ``check_interval`` seconds. Reads go round-robin to the replicas
+    that passed their last check and are at most ``max_lag`` seconds behind,
+    and fall back to the primary when none is. A user's reads also stay on
+    the primary for ``read_your_writes`` seconds after ``note_write``, so
+    they see what they just wrote. Writes are only noted in the process
+    that made them: a read served by another worker may still go to a
+    lagging replica. A replica that fails mid-query is taken out of
+    rotation until its next passing check.
+    """
+
+    def __init__(
+        self,
+        replicas: List[Replica],
+        max_lag: Optional[float] = None,
+        check_interval: Optional[float] = None,
+        check_timeout: Optional[float] = None,
+        read_your_writes: Optional[float] = None,
+        max_writers: int = 100_000,
+    ):
+        self.replicas = replicas
+        self.max_lag = (
+            settings.db_replica_max_lag_seconds if max_lag is None else max_lag
+        )
+        self.check_interval = (
+            check_interval or settings.db_replica_check_interval_seconds
+        )
+        self.check_timeout = check_timeout or settings.db_replica_check_timeout_seconds
+        self.read_your_writes = (
+            settings.db_read_your_writes_seconds
+            if read_your_writes is None
+            else read_your_writes
+        )
+        self.max_writers = max_writers
+        # user id -> monotonic time until which their reads use the primary
+        self.writers: "OrderedDict[int, float]" = OrderedDict()
+        self.replica_reads = 0
+        self.primary_reads = 0
+        self._turn = itertools.count()
+        self._task: Optional[asyncio.Task] = None
+
+    @classmethod
+    def from_settings(cls) -> "ReplicaRouter":
+        urls = split_urls(settings.database_replica_urls)
+        async_urls = split_urls(settings.async_database_replica_urls)
+        if len(urls) != len(async_urls):
+            raise ValueError(
+                "DATABASE_REPLICA_URLS and ASYNC_DATABASE_REPLICA_URLS must list "
+                "the same replicas in the same order"
+            )
+        return cls(
+            [Replica(url, async_url) for url, async_url in zip(urls, async_urls)]
+        )
+
+    def note_write(self, user_id: Optional[int]):
+        """
+        Keep ``user_id``'s reads on the primary for the read-your-writes window.
+
+        Only reads routed by this router, i.e. served by this worker, are
+        affected; the mark is not shared with other workers.
+        """
+        if user_id is None or not self.replicas:
+            return
+        now = time.monotonic()
+        self.writers[user_id] = now + self.read_your_writes
+        self.writers.move_to_end(user_id)
+        # Entries are in deadline order, so expired ones are at the front
+        while self.writers and (
+            len(self.writers) > self.max_writers
+            or next(iter(self.writers.values())) <= now
+        ):
+            self.writers.popitem(last=False)
+
+    def pick(self, user_id: Optional[int] = None) -> Optional[Replica]:
+        """The replica to read from, or None for the primary."""
+        if user_id is not None:
+            deadline = self.writers.get(user_id)
+            if deadline is not None and deadline > time.monotonic():
+                self.primary_reads += 1
+                return None
+        usable = [
+            replica
+            for replica in self.replicas
+            if replica.healthy
+            and replica.lag_seconds is not None
+            and replica.lag_seconds <= self.max_lag
+        ]
+        if not usable:
+            self.primary_reads += 1
+            return None
+        self.replica_reads += 1
+        return usable[next(self._turn) % len(usable)]
+
+    @contextmanager
+    def read_session(self, user_id: Optional[int] = None) -> Iterator[Session]:
+        """A sync session for reads only, on a replica when one is usable."""
+        replica = self.pick(user_id)
+        session = replica.session_maker() if replica else SessionLocal()
+        try:
+            yield session
+        except REPLICA_ERRORS as e:
+            if replica:
+                self.mark_down(replica, e)
+            raise
+        finally:
+            session.close()
+
+    @asynccontextmanager
+    async def async_read_session(
+        self, user_id: Optional[int] = None
+    ) -> AsyncIterator[AsyncSession]:
+        """An AsyncSession for reads only, on a replica when one is usable."""
+        replica = self.pick(user_id)
+        maker = replica.async_session_maker if replica else async_session_maker
+        async with maker() as session:
+            try:
+                yield session
+            except REPLICA_ERRORS as e:
+                if replica:
+                    self.mark_down(replica, e)
+                raise
+
+    def mark_down(self, replica: Replica, error: BaseException):
+        if replica.healthy:
+            logger.warning(
+                "Read replica %s failed, reading from the primary: %s",
+                replica.name,
+                error,
+            )
+        replica.healthy = False
+        replica.error = str(error) or type(error).__name__
+
+    @staticmethod
+    async def measure_lag(replica: Replica) -> float:
+        async with replica.async_engine.connect() as connection:
+            if connection.dialect.name != "postgresql":
+                await connection.execute(text("SELECT 1"))
+                return 0.0
+            lag = await connection.scalar(POSTGRES_LAG_QUERY)
+        if lag is None:
+            raise ReplicaNotStreaming("WAL receiver is not streaming")
+        return float(lag)
+
+    async def check(self, replica: Replica):
+        """Measure one replica's lag, marking it healthy or down."""
+        try:
+            lag = await asyncio.wait_for(self.measure_lag(replica), self.check_timeout)
+        except (asyncio.TimeoutError, ReplicaNotStreaming, *REPLICA_ERRORS) as e:
+            replica.checked_at = time.monotonic()
+            self.mark_down(replica, e)
+            return
+
+        replica.checked_at = time.monotonic()
+        replica.lag_seconds = round(lag, 3)
+        replica.error = None
+        if not replica.healthy:
+            logger.info(
+                "Read replica %s is up, %ss behind", replica.name, replica.lag_seconds
+            )
+        replica.healthy = True
+
+    async def check_all(self):
+        await asyncio.gather(*(self.check(replica) for replica in self.replicas))
+
+    async def start(self):
+        """Run a first round of checks, then keep checking in the background."""
+        if not self.replicas or self._task is not None:
+            return
+        await self.check_all()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Stop the health checks and close the replicas' pools."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        for replica in self.replicas:
+            await replica.async_engine.dispose()
+            replica.engine.dispose()
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.check_interval)
+            try:
+                await self.check_all()
+            except Exception:
+                logger.exception("Error checking read replicas")
+
+    def status(self) -> dict:
+        return {
+            "replicas": [replica.status() for replica in self.replicas],
+            "max_lag_seconds": self.max_lag,
+            "replica_reads": self.replica_reads,
+            "primary_reads": self.primary_reads,
+            "read_your_writes_users": len(self.writers),
+        }
+
+
+replica_router = ReplicaRouter.from_settings()
@@ -1,12 +1,52 @@
-from fastapi import FastAPI
+import asyncio
+import logging
+from contextlib import asynccontextmanager
+
+from fastapi import Depends, FastAPI
+from sqlalchemy import text
 
 from src.sc_chat.core.config import settings
+from src.sc_chat.database.base import async_engine, pool_status
+from src.sc_chat.database.partitions import run_partition_maintenance
+from src.sc_chat.database.routing import replica_router
+from src.sc_chat.repository.message_ingest import message_ingestor
+from src.sc_chat.security.password import password_hasher
+from src.sc_chat.security.principal import Principal
+from src.sc_chat.security.rbac import require_admin
 from src.sc_chat.urls import InitializeRouter
+from src.sc_chat.websocket.connection_manager import manager
+from src.sc_chat.websocket.ephemeral import ephemeral_events
+from src.sc_chat.websocket.presence import presence
+
+logging.basicConfig(
+    level=logging.DEBUG if settings.debug else logging.INFO,
+    format="%(asctime)s %(levelname)s %(name)s: %(message)s",
+)
+logger = logging.getLogger(__name__)
 
 # from fastapi.staticfiles import StaticFiles
 
 
-app = FastAPI(title=settings.app_name, debug=settings.debug)
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    password_hasher.start()
+    await manager.start()
+    await message_ingestor.start()
+    await replica_router.start()
+    maintenance = asyncio.create_task(run_partition_maintenance())
+    try:
+        yield
+    finally:
+        maintenance.cancel()
+        await replica_router.stop()
+        await message_ingestor.stop()
+        await manager.stop()
+        presence.stop()
+        ephemeral_events.stop()
+        password_hasher.stop()
+
+
+app = FastAPI(title=settings.app_name, debug=settings.debug, lifespan=lifespan)
 
 # Mount the static directory
 # app.mount("/static", StaticFiles(directory="src/sc_chat/static"), name="static")
@@ -27,3 +67,25 @@ def health_check():
         "environment": settings.environment,
         "debug": settings.debug,
     }
+
+
+@app.get("/health/db")
+async def database_health_check():
+    """Ping the primary database."""
+    try:
+        async with async_engine.connect() as connection:
+            await connection.execute(text("SELECT 1"))
+        database = "ok"
+    except Exception as e:
+        logger.warning("Database health check failed: %s", e)
+        database = "unavailable"
+    return {"status": database}
+
+
+@app.get("/health/db/details")
+def database_health_details(current_user: Principal = Depends(require_admin())):
+    """Get pool metrics and read replica health (Admin only)."""
+    return {
+        "pools": pool_status(),
+        "replication": replica_router.status(),
+    }
@@ -1,4 +1,8 @@
-from sqlalchemy import Column, DateTime, Integer, func
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy import DateTime, Integer, func
+from sqlalchemy.orm import Mapped, mapped_column
 
 
 class TimestampMixin:
@@ -10,8 +14,10 @@ class TimestampMixin:
     - updated_at: Timestamp of when the record was last updated.
     """
 
-    id = Column(Integer, primary_key=True, index=True)
-    created_at = Column(DateTime(timezone=True), default=func.now(), nullable=False)
-    updated_at = Column(
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), default=func.now(), nullable=False
+    )
+    updated_at: Mapped[Optional[datetime]] = mapped_column(
         DateTime(timezone=True), default=func.now(), onupdate=func.now()
     )
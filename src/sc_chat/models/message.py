@@ -1,9 +1,29 @@
-from sqlalchemy import Column, Text, Integer, ForeignKey
-from sqlalchemy.orm import relationship
+from typing import TYPE_CHECKING, Optional
+
+from sqlalchemy import (
+    DDL,
+    ForeignKey,
+    Index,
+    Integer,
+    String,
+    Text,
+    event,
+    func,
+    literal_column,
+)
+from sqlalchemy.orm import Mapped, mapped_column, relationship
+from sqlalchemy.sql.elements import ColumnClause
 
 from src.sc_chat.database.base import Base
 from src.sc_chat.models.base import TimestampMixin
 
+if TYPE_CHECKING:
+    from src.sc_chat.models.room import Room
+    from src.sc_chat.models.user import User
+
+# Search queries must use this exact expression for the GIN index to apply
+SEARCH_CONFIG: ColumnClause = literal_column("'simple'::regconfig")
+
 
 class Message(Base, TimestampMixin):
     """
@@ -11,15 +31,77 @@ class Message(Base, TimestampMixin):
     """
 
     __tablename__ = "messages"
+    __table_args__ = (
+        # History pages: WHERE room_id = ? AND id < ? ORDER BY id DESC LIMIT ?
+        # Its leading column also serves as the room_id foreign-key index.
+        Index("ix_messages_room_id_id", "room_id", "id"),
+        # Full-text search; other databases use the in-process SearchIndex
+        Index(
+            "ix_messages_content_tsv",
+            func.to_tsvector(SEARCH_CONFIG, literal_column("content")),
+            postgresql_using="gin",
+        ).ddl_if(dialect="postgresql"),
+    )
 
-    content = Column(Text, nullable=False)
-    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
-    room_id = Column(Integer, ForeignKey("rooms.id"), nullable=False)
+    content: Mapped[str] = mapped_column(Text, nullable=False)
+    user_id: Mapped[int] = mapped_column(
+        Integer, ForeignKey("users.id"), nullable=False, index=True
+    )
+    room_id: Mapped[int] = mapped_column(
+        Integer, ForeignKey("rooms.id", ondelete="CASCADE"), nullable=False
+    )
+    # Author's username when written, so history reads need no join on users;
+    # kept current on renames (see AUTHOR_USERNAME_TRIGGERS)
+    author_username: Mapped[Optional[str]] = mapped_column(String, nullable=True)
 
-    user = relationship("User", back_populates="messages")
-    room = relationship("Room", back_populates="messages")
+    user: Mapped["User"] = relationship("User", back_populates="messages")
+    room: Mapped["Room"] = relationship("Room", back_populates="messages")
 
     def __repr__(self):
         return (
             f"<Message(id={self.id}, user_id={self.user_id}, room_id={self.room_id})>"
         )
+
+
+# PostgreSQL fills author_username for inserts that leave it out and
+# rewrites it when a user is renamed. Must match the
+# add_message_author_username migration. Other databases rely on the
+# application filling it; the application never renames users.
+AUTHOR_USERNAME_TRIGGERS = (
+    """
+    CREATE OR REPLACE FUNCTION messages_fill_author_username() RETURNS trigger AS $$
+    BEGIN
+        IF NEW.author_username IS NULL THEN
+            SELECT username INTO NEW.author_username FROM users WHERE id = NEW.user_id;
+        END IF;
+        RETURN NEW;
+    END
+    $$ LANGUAGE plpgsql
+    """,
+    """
+    CREATE TRIGGER messages_fill_author_username
+        BEFORE INSERT ON messages
+        FOR EACH ROW EXECUTE FUNCTION messages_fill_author_username()
+    """,
+    """
+    CREATE OR REPLACE FUNCTION users_sync_message_author() RETURNS trigger AS $$
+    BEGIN
+        UPDATE messages SET author_username = NEW.username WHERE user_id = NEW.id;
+        RETURN NULL;
+    END
+    $$ LANGUAGE plpgsql
+    """,
+    """
+    CREATE TRIGGER users_sync_message_author
+        AFTER UPDATE OF username ON users
+        FOR EACH ROW WHEN (OLD.username IS DISTINCT FROM NEW.username)
+        EXECUTE FUNCTION users_sync_message_author()
+    """,
+)
+
+for statement in AUTHOR_USERNAME_TRIGGERS:
+    event.listen(
+        Message.__table__,
+        "after_create",
+        DDL(statement).execute_if(dialect="postgresql"),
+    )
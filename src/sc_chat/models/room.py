@@ -1,9 +1,14 @@
-from sqlalchemy import Column, String, Text, Boolean
-from sqlalchemy.orm import relationship
+from typing import TYPE_CHECKING, List, Optional
+
+from sqlalchemy import Boolean, String, Text
+from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from src.sc_chat.database.base import Base
 from src.sc_chat.models.base import TimestampMixin
 
+if TYPE_CHECKING:
+    from src.sc_chat.models.message import Message
+
 
 class Room(Base, TimestampMixin):
     """
@@ -12,12 +17,16 @@ class Room(Base, TimestampMixin):
 
     __tablename__ = "rooms"
 
-    name = Column(String(255), nullable=False, unique=True)
-    description = Column(Text, nullable=True)
-    is_active = Column(Boolean, default=True, nullable=False)
+    name: Mapped[str] = mapped_column(String(255), nullable=False, unique=True)
+    description: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
+    is_active: Mapped[bool] = mapped_column(Boolean, default=True, nullable=False)
 
-    messages = relationship(
-        "Message", back_populates="room", cascade="all, delete-orphan"
+    # Deleting a room deletes its messages in the database, not one by one
+    messages: Mapped[List["Message"]] = relationship(
+        "Message",
+        back_populates="room",
+        cascade="all, delete-orphan",
+        passive_deletes=True,
     )
 
     def __repr__(self):
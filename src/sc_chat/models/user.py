@@ -1,12 +1,17 @@
-from sqlalchemy import Boolean, Column
+from typing import TYPE_CHECKING, List
+
+from sqlalchemy import Boolean
 from sqlalchemy import Enum as SQLAlchemyEnum
 from sqlalchemy import String
-from sqlalchemy.orm import relationship
+from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from src.sc_chat.database.base import Base
 from src.sc_chat.models.base import TimestampMixin
 from src.sc_chat.utils.common.enum import UserRoleEnum
 
+if TYPE_CHECKING:
+    from src.sc_chat.models.message import Message
+
 
 class User(Base, TimestampMixin):
     """
@@ -16,15 +21,15 @@ class User(Base, TimestampMixin):
 
     __tablename__ = "users"
 
-    username = Column(String, unique=True, nullable=False)
-    email = Column(String, unique=True, nullable=False)
-    hashed_password = Column(String, nullable=False)
-    is_active = Column(Boolean, default=True, nullable=False)
-    role = Column(
+    username: Mapped[str] = mapped_column(String, unique=True, nullable=False)
+    email: Mapped[str] = mapped_column(String, unique=True, nullable=False)
+    hashed_password: Mapped[str] = mapped_column(String, nullable=False)
+    is_active: Mapped[bool] = mapped_column(Boolean, default=True, nullable=False)
+    role: Mapped[UserRoleEnum] = mapped_column(
         SQLAlchemyEnum(UserRoleEnum),
         default=UserRoleEnum.USER,
         nullable=False,
     )
 
     # Relationships
-    messages = relationship("Message", back_populates="user")
+    messages: Mapped[List["Message"]] = relationship("Message", back_populates="user")
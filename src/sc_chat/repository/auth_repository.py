@@ -1,9 +1,13 @@
+import logging
 from typing import Optional
 
 from sqlalchemy.orm import Session
 
 from src.sc_chat.models.user import User
 from src.sc_chat.security.auth import jwt_service
+from src.sc_chat.security.identity_cache import identity_cache
+
+logger = logging.getLogger(__name__)
 
 
 class AuthRepository:
@@ -18,9 +22,16 @@ class AuthRepository:
         """Get a user by username. Returns None if not found."""
         return self.db_session.query(User).filter(User.username == username).first()
 
-    def create_user(self, username: str, email: str, password: str) -> User:
-        """Create a new user with hashed password."""
-        hashed_password = jwt_service.get_password_hash(password)
+    def create_user(
+        self,
+        username: str,
+        email: str,
+        password: Optional[str] = None,
+        hashed_password: Optional[str] = None,
+    ) -> User:
+        """Create a new user from a password or an already computed hash."""
+        if hashed_password is None:
+            hashed_password = jwt_service.get_password_hash(password)
         user = User(
             username=username,
             email=email,
@@ -33,13 +44,19 @@ class AuthRepository:
         return user
 
     def authenticate_user(self, email: str, password: str) -> Optional[User]:
-        """Authenticate user with email and password. Returns user if valid, None otherwise."""
+        """Authenticate user with email and password; None if invalid."""
         try:
             return jwt_service.authenticate_user(email, password, self.db_session)
         except Exception as e:
-            print(f"Authentication failed: {str(e)}")
+            logger.warning("Authentication failed: %s", e)
             return None
 
+    def update_password_hash(self, user: User, hashed_password: str) -> User:
+        """Replace a user's stored password hash, e.g. after a cost change."""
+        user.hashed_password = hashed_password  # type: ignore
+        self.db_session.commit()
+        return user
+
     def user_exists_by_email(self, email: str) -> bool:
         """Check if a user exists by email."""
         return (
@@ -63,6 +80,7 @@ class AuthRepository:
             {"is_active": False}
         )
         self.db_session.commit()
+        identity_cache.invalidate(user_id=user.id, email=user.email)
         self.db_session.refresh(user)
         return user
 
@@ -72,5 +90,6 @@ class AuthRepository:
             {"is_active": True}
         )
         self.db_session.commit()
+        identity_cache.invalidate(user_id=user.id, email=user.email)
         self.db_session.refresh(user)
         return user
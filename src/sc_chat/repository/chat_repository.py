@@ -1,14 +1,83 @@
-from typing import List, Optional
+import asyncio
+from datetime import datetime
+from itertools import islice
+from typing import AsyncIterator, List, Optional, cast
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session, joinedload
-from sqlalchemy import desc
+from sqlalchemy import CursorResult, delete, desc, func, select
 
+from src.sc_chat.core.config import settings
+from src.sc_chat.database.archive import MessageArchive, message_archive
 from src.sc_chat.models.room import Room
-from src.sc_chat.models.message import Message
+from src.sc_chat.models.message import SEARCH_CONFIG, Message
+from src.sc_chat.models.user import User
+from src.sc_chat.repository.message_cache import MessageCache, message_cache
+from src.sc_chat.repository.search_index import search_index
+from src.sc_chat.utils.common.serialization import EncodedMessage
+from src.sc_chat.websocket.connection_manager import manager
+
+
+def message_to_payload(message: Message) -> dict:
+    """Build the chat payload of a message; without a snapshot, load its user."""
+    username = message.author_username
+    if username is None or not settings.message_author_snapshot:
+        username = message.user.username
+    return {
+        "id": message.id,
+        "content": message.content,
+        "user_id": message.user_id,
+        "username": username,
+        "room_id": message.room_id,
+        "created_at": message.created_at.isoformat(),
+    }
+
+
+def archived_message(payload: dict) -> Message:
+    """Build a detached Message, with its user, from an archived payload."""
+    message = Message(
+        id=payload["id"],
+        content=payload["content"],
+        user_id=payload["user_id"],
+        room_id=payload["room_id"],
+        author_username=payload["username"],
+        created_at=datetime.fromisoformat(payload["created_at"]),
+    )
+    message.user = User(id=payload["user_id"], username=payload["username"])
+    return message
+
+
+def author_options() -> list:
+    """Loader options for Message queries that need the author's username."""
+    if not settings.message_author_snapshot:
+        return [joinedload(Message.user)]
+    return []
+
+
+def author_username_of(user_id: int):
+    """Scalar subquery for a user's username, to snapshot into a new message."""
+    return select(User.username).where(User.id == user_id).scalar_subquery()
+
+
+def prepend_archived(
+    messages: List[Message], archived: tuple[List[dict], bool]
+) -> tuple[List[Message], bool]:
+    """Put an archive page in front of the live messages that followed it."""
+    payloads, has_more = archived
+    return [archived_message(payload) for payload in payloads] + messages, has_more
 
 
 class ChatRepository:
-    def __init__(self, db_session: Session):
+    """
+    Chat repository on a synchronous Session, for scripts and worker threads.
+
+    It leaves the in-process message cache and search index alone: they
+    belong to the event loop. The app goes through AsyncChatRepository,
+    which also tells the other workers when history changes.
+    """
+
+    def __init__(self, db_session: Session, archive: Optional[MessageArchive] = None):
         self.db_session = db_session
+        self.archive = archive or message_archive
 
     # Room operations
     def create_room(self, name: str, description: Optional[str] = None) -> Room:
@@ -39,10 +108,33 @@ class ChatRepository:
         """Get all active rooms."""
         return self.db_session.query(Room).filter(Room.is_active.is_(True)).all()
 
+    def delete_room(self, room_id: int) -> bool:
+        """Delete a room and its messages with two bulk DELETE statements."""
+        self.db_session.execute(
+            delete(Message)
+            .where(Message.room_id == room_id)
+            .execution_options(synchronize_session=False)
+        )
+        result = cast(
+            CursorResult,
+            self.db_session.execute(
+                delete(Room)
+                .where(Room.id == room_id)
+                .execution_options(synchronize_session=False)
+            ),
+        )
+        self.db_session.commit()
+        return result.rowcount > 0
+
     # Message operations
     def create_message(self, content: str, user_id: int, room_id: int) -> Message:
         """Create a new message in a room."""
-        message = Message(content=content, user_id=user_id, room_id=room_id)
+        message = Message(
+            content=content,
+            user_id=user_id,
+            room_id=room_id,
+            author_username=author_username_of(user_id),
+        )
         self.db_session.add(message)
         self.db_session.commit()
         self.db_session.refresh(message)
@@ -60,13 +152,14 @@ class ChatRepository:
             cursor: Optional cursor for pagination (message ID to start from)
 
         Returns:
-            Tuple of (messages, has_more) where has_more indicates if there are more messages
+            Tuple of (messages, has_more) where has_more indicates if there are
+            more messages
         """
         query = (
             self.db_session.query(Message)
-            .options(joinedload(Message.user))
+            .options(*author_options())
             .filter(Message.room_id == room_id)
-            .order_by(desc(Message.id))
+            .order_by(Message.id.desc())
         )
 
         if cursor:
@@ -80,13 +173,21 @@ class ChatRepository:
             messages = messages[:limit]
 
         # Return messages in chronological order (oldest first)
-        return list(reversed(messages)), has_more
+        messages = list(reversed(messages))
+        if not has_more:
+            # Older messages may live in archived partitions
+            before = messages[0].id if messages else cursor
+            return prepend_archived(
+                messages,
+                self.archive.get_page(room_id, limit - len(messages), before),
+            )
+        return messages, has_more
 
     def get_message_by_id(self, message_id: int) -> Optional[Message]:
-        """Get a message by ID with user information."""
+        """Get a message by ID, with its author's username."""
         return (
             self.db_session.query(Message)
-            .options(joinedload(Message.user))
+            .options(*author_options())
             .filter(Message.id == message_id)
             .first()
         )
@@ -104,3 +205,351 @@ class ChatRepository:
             self.db_session.commit()
             return True
         return False
+
+
+class AsyncChatRepository:
+    """
+    Chat repository on an AsyncSession, for use inside the event loop.
+
+    Writes, and reads that must see them, use ``db_session``. Read-only
+    lookups, history and search use ``read_session``, which may be a
+    replica session and defaults to ``db_session``.
+    """
+
+    def __init__(
+        self,
+        db_session: AsyncSession,
+        cache: Optional[MessageCache] = None,
+        archive: Optional[MessageArchive] = None,
+        read_session: Optional[AsyncSession] = None,
+    ):
+        self.db_session = db_session
+        self.read_session = read_session or db_session
+        self.cache = cache or message_cache
+        self.archive = archive or message_archive
+
+    # Room operations
+    async def create_room(self, name: str, description: Optional[str] = None) -> Room:
+        """Create a new chat room."""
+        room = Room(name=name, description=description)
+        self.db_session.add(room)
+        await self.db_session.commit()
+        await self.db_session.refresh(room)
+        return room
+
+    async def get_room_by_id(self, room_id: int) -> Optional[Room]:
+        """Get a room by ID."""
+        result = await self.read_session.execute(
+            select(Room).filter(Room.id == room_id, Room.is_active.is_(True))
+        )
+        return result.scalars().first()
+
+    async def get_room_by_name(self, name: str) -> Optional[Room]:
+        """Get a room by name."""
+        result = await self.db_session.execute(
+            select(Room).filter(Room.name == name, Room.is_active.is_(True))
+        )
+        return result.scalars().first()
+
+    async def get_all_rooms(self) -> List[Room]:
+        """Get all active rooms."""
+        result = await self.read_session.execute(
+            select(Room).filter(Room.is_active.is_(True))
+        )
+        return list(result.scalars().all())
+
+    async def delete_room(self, room_id: int) -> bool:
+        """Delete a room and its messages with two bulk DELETE statements."""
+        await self.db_session.execute(
+            delete(Message)
+            .where(Message.room_id == room_id)
+            .execution_options(synchronize_session=False)
+        )
+        result = cast(
+            CursorResult,
+            await self.db_session.execute(
+                delete(Room)
+                .where(Room.id == room_id)
+                .execution_options(synchronize_session=False)
+            ),
+        )
+        await self.db_session.commit()
+        await self.invalidate_room(room_id)
+        return result.rowcount > 0
+
+    # Message operations
+    async def create_message(self, content: str, user_id: int, room_id: int) -> Message:
+        """Create a new message in a room."""
+        message = Message(
+            content=content,
+            user_id=user_id,
+            room_id=room_id,
+            author_username=author_username_of(user_id),
+        )
+        self.db_session.add(message)
+        await self.db_session.commit()
+        await self.db_session.refresh(message)
+        search_index.add(room_id, message.id, content)
+        return message
+
+    async def get_recent_messages(
+        self, room_id: int, limit: int = 50, cursor: Optional[int] = None
+    ) -> tuple[List[Message], bool]:
+        """
+        Get recent messages for a room with cursor-based pagination.
+
+        See ChatRepository.get_recent_messages for the pagination contract.
+        """
+        query = (
+            select(Message)
+            .options(*author_options())
+            .filter(Message.room_id == room_id)
+            .order_by(desc(Message.id))
+        )
+
+        if cursor:
+            query = query.filter(Message.id < cursor)
+
+        # Fetch one extra message to check if there are more
+        result = await self.read_session.execute(query.limit(limit + 1))
+        messages = list(result.scalars().all())
+
+        has_more = len(messages) > limit
+        if has_more:
+            messages = messages[:limit]
+
+        # Return messages in chronological order (oldest first)
+        messages = list(reversed(messages))
+        if not has_more:
+            # Older messages may live in archived partitions
+            before = messages[0].id if messages else cursor
+            archived = await asyncio.to_thread(
+                self.archive.get_page, room_id, limit - len(messages), before
+            )
+            return prepend_archived(messages, archived)
+        return messages, has_more
+
+    async def get_recent_payloads(
+        self, room_id: int, limit: int = 50, cursor: Optional[int] = None
+    ) -> tuple[List[dict], bool]:
+        """
+        Get recent messages as chat payloads, reading only the payload columns.
+
+        Same pagination contract as get_recent_messages, but rows come back
+        as plain tuples: no ORM objects, identity map or user rows are built.
+        """
+        return await self._recent_payloads(self.read_session, room_id, limit, cursor)
+
+    async def _recent_payloads(
+        self, session: AsyncSession, room_id: int, limit: int, cursor: Optional[int]
+    ) -> tuple[List[dict], bool]:
+        query = (
+            self._payload_query()
+            .filter(Message.room_id == room_id)
+            .order_by(desc(Message.id))
+        )
+        if cursor:
+            query = query.filter(Message.id < cursor)
+
+        # Fetch one extra message to check if there are more
+        result = await session.execute(query.limit(limit + 1))
+        rows = result.all()
+
+        has_more = len(rows) > limit
+        # Chronological order (oldest first)
+        payloads = [self._row_payload(row) for row in reversed(rows[:limit])]
+        if not has_more:
+            # Older messages may live in archived partitions
+            before = payloads[0]["id"] if payloads else cursor
+            archived, has_more = await asyncio.to_thread(
+                self.archive.get_page, room_id, limit - len(payloads), before
+            )
+            payloads = archived + payloads
+        return payloads, has_more
+
+    async def get_history_page(
+        self, room_id: int, limit: int = 50, cursor: Optional[int] = None
+    ) -> tuple[List[EncodedMessage], bool]:
+        """
+        Get a page of encoded chat messages, from the message cache if possible.
+
+        Same pagination contract as get_recent_messages. Misses read from the
+        database, and a read of the latest page also fills the room's cache.
+        """
+        cached = self.cache.get(room_id, limit, cursor)
+        if cached is not None:
+            return cached
+
+        if cursor or not self.cache.follows_room(room_id):
+            payloads, has_more = await self.get_recent_payloads(room_id, limit, cursor)
+            return [EncodedMessage(payload) for payload in payloads], has_more
+
+        # Read a full buffer's worth so the next pages are cached too. Fills
+        # read the primary: appends only cover messages committed from now on,
+        # so a lagging replica would leave a permanent gap in the buffer.
+        self.cache.begin_fill(room_id)
+        try:
+            payloads, has_more = await self._recent_payloads(
+                self.db_session, room_id, max(limit, self.cache.room_capacity), None
+            )
+        except Exception:
+            self.cache.cancel_fill(room_id)
+            raise
+        encoded = [EncodedMessage(payload) for payload in payloads]
+        self.cache.end_fill(room_id, encoded, has_more)
+
+        page = encoded[-limit:] if limit else []
+        return page, has_more or len(encoded) > len(page)
+
+    async def stream_message_payloads(
+        self, room_id: int, batch_size: int = 1000
+    ) -> AsyncIterator[List[dict]]:
+        """
+        Yield every message of a room as payload batches, oldest first.
+
+        Archived messages come first, then the live table is read through a
+        server-side cursor ``batch_size`` rows at a time, without building
+        ORM objects. A partition is archived before it is dropped, so live
+        rows already yielded from the archive are skipped.
+        """
+        archived = self.archive.iter_room(room_id)
+        last_archived_id = 0
+        while True:
+            batch = await asyncio.to_thread(lambda: list(islice(archived, batch_size)))
+            if not batch:
+                break
+            last_archived_id = batch[-1]["id"]
+            yield batch
+
+        result = await self.read_session.stream(
+            self._payload_query()
+            .filter(Message.room_id == room_id, Message.id > last_archived_id)
+            .order_by(Message.id)
+            .execution_options(yield_per=batch_size)
+        )
+        async for rows in result.partitions():
+            yield [self._row_payload(row) for row in rows]
+
+    async def search_messages(
+        self, room_id: int, query: str, limit: int = 20, offset: int = 0
+    ) -> tuple[List[dict], bool]:
+        """
+        Full-text search of a room's messages, best match first.
+
+        Uses the tsvector GIN index on PostgreSQL and the in-process
+        SearchIndex elsewhere. Returns (payloads with a "rank", has_more).
+        """
+        if self.read_session.get_bind().dialect.name == "postgresql":
+            return await self._search_postgres(room_id, query, limit, offset)
+
+        if not search_index.is_built(room_id):
+            # Built from the primary, like cache fills: later adds only cover
+            # messages committed from now on
+            result = await self.db_session.execute(
+                select(Message.id, Message.content).filter(Message.room_id == room_id)
+            )
+            search_index.build(room_id, result.tuples())
+        ranked, has_more = search_index.search(room_id, query, limit, offset)
+        if not ranked:
+            return [], has_more
+
+        result = await self.read_session.execute(
+            self._payload_query().filter(
+                Message.id.in_([message_id for message_id, _ in ranked])
+            )
+        )
+        rows = {row.id: row for row in result}
+        return [
+            {**self._row_payload(rows[message_id]), "rank": rank}
+            for message_id, rank in ranked
+            if message_id in rows
+        ], has_more
+
+    async def _search_postgres(
+        self, room_id: int, query: str, limit: int, offset: int
+    ) -> tuple[List[dict], bool]:
+        tsquery = func.plainto_tsquery(SEARCH_CONFIG, query)
+        # Same expression as ix_messages_content_tsv
+        vector = func.to_tsvector(SEARCH_CONFIG, Message.content)
+        rank = func.ts_rank(vector, tsquery).label("rank")
+        result = await self.read_session.execute(
+            self._payload_query()
+            .add_columns(rank)
+            .filter(Message.room_id == room_id, vector.op("@@")(tsquery))
+            .order_by(rank.desc(), Message.id.desc())
+            .offset(offset)
+            .limit(limit + 1)
+        )
+        rows = result.all()
+        has_more = len(rows) > limit
+        return [
+            {**self._row_payload(row), "rank": row.rank} for row in rows[:limit]
+        ], has_more
+
+    @staticmethod
+    def _payload_query():
+        if settings.message_author_snapshot:
+            return select(
+                Message.id,
+                Message.content,
+                Message.user_id,
+                Message.author_username.label("username"),
+                Message.room_id,
+                Message.created_at,
+            )
+        return select(
+            Message.id,
+            Message.content,
+            Message.user_id,
+            User.username,
+            Message.room_id,
+            Message.created_at,
+        ).join(User, User.id == Message.user_id)
+
+    @staticmethod
+    def _row_payload(row) -> dict:
+        return {
+            "id": row.id,
+            "content": row.content,
+            "user_id": row.user_id,
+            "username": row.username,
+            "room_id": row.room_id,
+            "created_at": row.created_at.isoformat(),
+        }
+
+    async def get_message_by_id(self, message_id: int) -> Optional[Message]:
+        """Get a message by ID, with its author's username."""
+        result = await self.read_session.execute(
+            select(Message).options(*author_options()).filter(Message.id == message_id)
+        )
+        return result.scalars().first()
+
+    async def delete_message(self, message_id: int, user_id: int) -> bool:
+        """Delete a message (only by the message author or admin)."""
+        result = await self.db_session.execute(
+            select(Message).filter(Message.id == message_id, Message.user_id == user_id)
+        )
+        message = result.scalars().first()
+
+        if message:
+            room_id = message.room_id
+            await self.db_session.delete(message)
+            await self.db_session.commit()
+            await self.invalidate_room(room_id, message_id)
+            return True
+        return False
+
+    async def invalidate_room(self, room_id: int, message_id: Optional[int] = None):
+        """
+        Drop cached state of a room changed outside the message flow.
+
+        Evicts the room from the message cache and removes ``message_id``,
+        or the whole room, from the search index, on this worker and on
+        every other worker following the room.
+        """
+        self.cache.evict(room_id)
+        if message_id is None:
+            search_index.drop_room(room_id)
+        else:
+            search_index.remove(room_id, message_id)
+        await manager.publish_invalidation(room_id, message_id)
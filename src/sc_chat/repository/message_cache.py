@@ -0,0 +1,205 @@
+from collections import OrderedDict, deque
+from typing import Callable, Deque, Dict, List, Optional, Tuple
+
+from src.sc_chat.core.config import settings
+from src.sc_chat.utils.common.serialization import EncodedMessage
+
+# Rough per-message overhead of the payload dict and its small values, in bytes
+MESSAGE_OVERHEAD_BYTES = 400
+
+
+def estimate_size(message: EncodedMessage) -> int:
+    """Approximate memory used by one cached message and its encoding."""
+    payload = message.payload
+    text_size = len(payload.get("content") or "") + len(payload.get("username") or "")
+    # The JSON encoding roughly doubles the text it carries
+    return MESSAGE_OVERHEAD_BYTES + 2 * text_size
+
+
+class RoomBuffer:
+    """
+    Ring buffer of the most recent messages of one room.
+
+    The buffer always holds a contiguous, id-ordered tail of the room's
+    history. ``complete`` is True when it also holds the oldest message,
+    i.e. the database has nothing older.
+    """
+
+    __slots__ = ("messages", "complete", "size")
+
+    def __init__(self, capacity: int):
+        self.messages: Deque[EncodedMessage] = deque(maxlen=capacity)
+        self.complete = False
+        self.size = 0
+
+
+class MessageCache:
+    """
+    In-process cache of recent messages per room, with LRU eviction of rooms.
+
+    History reads are served from a room's buffer when the requested page
+    lies within it and fall through to the database otherwise. The buffer
+    is filled from a database read of the latest page and kept current by
+    ``append`` for every message persisted in, or delivered to, the room.
+    Messages are stored with their JSON encoding, which is built at most
+    once per message.
+    """
+
+    def __init__(
+        self, max_bytes: Optional[int] = None, room_capacity: Optional[int] = None
+    ):
+        self.max_bytes = max_bytes or settings.message_cache_max_bytes
+        self.room_capacity = room_capacity or settings.message_cache_room_size
+        self.rooms: "OrderedDict[int, RoomBuffer]" = OrderedDict()
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        # Rooms with a fill in progress -> True once an append was missed
+        self._filling: Dict[int, List] = {}
+        # Set by the owner: whether this process sees every new message of a room
+        self.follows_room: Callable[[int], bool] = lambda room_id: True
+
+    def get(
+        self, room_id: int, limit: int, cursor: Optional[int] = None
+    ) -> Optional[Tuple[List[EncodedMessage], bool]]:
+        """
+        Return (messages, has_more) for a history page, or None on a miss.
+
+        Follows the same contract as ChatRepository.get_recent_messages:
+        messages older than ``cursor`` (or the latest ones), oldest first.
+        """
+        buffer = self.rooms.get(room_id)
+        if buffer is None or not self.follows_room(room_id):
+            # A room this process stopped following may have gone stale
+            self.evict(room_id)
+            self.misses += 1
+            return None
+        self.rooms.move_to_end(room_id)
+
+        messages = buffer.messages
+        end = len(messages)
+        if cursor:
+            while end and messages[end - 1].id >= cursor:
+                end -= 1
+
+        if end < limit and not buffer.complete:
+            # Part of the page is older than the buffer
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        start = max(0, end - limit)
+        page = [messages[index] for index in range(start, end)]
+        has_more = start > 0 or not buffer.complete
+        return page, has_more
+
+    def begin_fill(self, room_id: int):
+        """Mark that a database read to fill ``room_id`` is starting."""
+        entry = self._filling.get(room_id)
+        if entry is None:
+            self._filling[room_id] = [1, False]
+        else:
+            entry[0] += 1
+
+    def end_fill(self, room_id: int, messages: List[EncodedMessage], has_more: bool):
+        """
+        Install the latest page of a room read from the database.
+
+        The page is dropped if a message for the room was persisted while
+        the read was in flight, since it might be missing from the page.
+        """
+        missed_append = self.cancel_fill(room_id)
+        if missed_append or room_id in self.rooms or not self.follows_room(room_id):
+            return
+
+        buffer = RoomBuffer(self.room_capacity)
+        buffer.complete = not has_more
+        self.rooms[room_id] = buffer
+        for message in messages:
+            self._push(buffer, message)
+        self._enforce_budget()
+
+    def cancel_fill(self, room_id: int) -> bool:
+        """Finish a fill without installing it; True if an append was missed."""
+        entry = self._filling.get(room_id)
+        if entry is None:
+            return False
+        entry[0] -= 1
+        missed_append = entry[1]
+        if entry[0] <= 0:
+            del self._filling[room_id]
+        return missed_append
+
+    def append(self, message: EncodedMessage):
+        """Add a newly persisted message to its room's buffer, if cached."""
+        room_id = message.payload["room_id"]
+        buffer = self.rooms.get(room_id)
+        if buffer is None:
+            entry = self._filling.get(room_id)
+            if entry is not None:
+                entry[1] = True
+            return
+
+        messages = buffer.messages
+        if messages and messages[-1].id > message.id:
+            # Batches from several workers can commit out of id order
+            position = len(messages)
+            while position and messages[position - 1].id > message.id:
+                position -= 1
+            if position and messages[position - 1].id == message.id:
+                return
+            if len(messages) == messages.maxlen:
+                if position == 0:
+                    return
+                self._pop_oldest(buffer)
+                position -= 1
+            messages.insert(position, message)
+            buffer.size += estimate_size(message)
+            self.size += estimate_size(message)
+        elif not messages or messages[-1].id != message.id:
+            self._push(buffer, message)
+        self._enforce_budget()
+
+    def evict(self, room_id: int):
+        """Drop a room's buffer."""
+        buffer = self.rooms.pop(room_id, None)
+        if buffer is not None:
+            self.size -= buffer.size
+
+    def clear(self):
+        """Drop every buffer."""
+        self.rooms.clear()
+        self.size = 0
+
+    def stats(self) -> dict:
+        """Report cache occupancy and hit rate."""
+        return {
+            "rooms": len(self.rooms),
+            "messages": sum(len(buffer.messages) for buffer in self.rooms.values()),
+            "bytes": self.size,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+
+    def _push(self, buffer: RoomBuffer, message: EncodedMessage):
+        if len(buffer.messages) == buffer.messages.maxlen:
+            self._pop_oldest(buffer)
+        buffer.messages.append(message)
+        size = estimate_size(message)
+        buffer.size += size
+        self.size += size
+
+    def _pop_oldest(self, buffer: RoomBuffer):
+        size = estimate_size(buffer.messages.popleft())
+        buffer.size -= size
+        self.size -= size
+        buffer.complete = False
+
+    def _enforce_budget(self):
+        while self.size > self.max_bytes and self.rooms:
+            _, buffer = self.rooms.popitem(last=False)
+            self.size -= buffer.size
+
+
+message_cache = MessageCache()
@@ -0,0 +1,221 @@
+import csv
+import io
+import json
+import os
+import time
+from datetime import datetime, timezone
+from typing import BinaryIO, Callable, Dict, List, Optional
+
+from sqlalchemy import insert, select
+from sqlalchemy.engine import Connection, Engine
+
+from src.sc_chat.core.config import settings
+from src.sc_chat.database.base import engine
+from src.sc_chat.models.message import Message
+from src.sc_chat.models.room import Room
+from src.sc_chat.models.user import User
+from src.sc_chat.utils.common.serialization import loads
+
+COPY_COLUMNS = (
+    "content",
+    "user_id",
+    "room_id",
+    "author_username",
+    "created_at",
+    "updated_at",
+)
+
+ProgressCallback = Callable[["ImportStats"], None]
+
+
+class ImportStats:
+    """Counters of one import run."""
+
+    __slots__ = ("rows", "resumed_rows", "skipped", "invalid", "offset", "started_at")
+
+    def __init__(self, rows: int = 0, offset: int = 0):
+        self.rows = rows
+        # Rows imported by earlier runs, before resuming from a checkpoint
+        self.resumed_rows = rows
+        self.skipped = 0
+        self.invalid = 0
+        self.offset = offset
+        self.started_at = time.perf_counter()
+
+    @property
+    def rows_per_second(self) -> float:
+        elapsed = time.perf_counter() - self.started_at
+        imported = self.rows - self.resumed_rows
+        return imported / elapsed if elapsed > 0 else 0.0
+
+    def as_dict(self) -> dict:
+        return {
+            "rows": self.rows,
+            "skipped_unknown_user": self.skipped,
+            "invalid": self.invalid,
+            "offset": self.offset,
+            "rows_per_second": round(self.rows_per_second, 1),
+        }
+
+
+class MessageImporter:
+    """
+    Bulk loader of NDJSON messages into one room.
+
+    Each input line is an object with ``content``, ``username`` (or
+    ``user_id``) and optionally ``created_at``. Usernames are resolved
+    through a map of every user loaded once up front; lines for unknown
+    usernames are skipped and counted. Lines whose ``user_id`` is not the
+    integer id of a user, or whose ``content`` is not a non-empty string,
+    count as invalid, so they cannot fail a whole batch on a constraint.
+    Batches are written with COPY on PostgreSQL and a single executemany
+    INSERT elsewhere, one transaction per batch.
+
+    With a checkpoint file, the input byte offset reached is saved after
+    every committed batch and a rerun resumes from it. A crash between a
+    commit and its checkpoint write replays that one batch.
+    """
+
+    def __init__(
+        self,
+        room_id: int,
+        batch_size: Optional[int] = None,
+        bind: Engine = engine,
+        progress: Optional[ProgressCallback] = None,
+    ):
+        self.room_id = room_id
+        self.batch_size = batch_size or settings.import_batch_size
+        self.bind = bind
+        self.progress = progress
+        self.user_ids: Dict[str, int] = {}
+        self.usernames: Dict[int, str] = {}
+
+    def run(
+        self, source: BinaryIO, checkpoint_path: Optional[str] = None
+    ) -> ImportStats:
+        """Import every line of ``source`` past the checkpoint, if any."""
+        with self.bind.connect() as connection:
+            room = connection.scalar(select(Room.id).where(Room.id == self.room_id))
+            if room is None:
+                raise ValueError(f"Room with ID {self.room_id} not found")
+            users = connection.execute(select(User.username, User.id)).all()
+            self.user_ids = {username: user_id for username, user_id in users}
+            self.usernames = {user_id: username for username, user_id in users}
+
+        checkpoint = self._read_checkpoint(checkpoint_path)
+        stats = ImportStats(
+            rows=checkpoint.get("rows", 0), offset=checkpoint.get("offset", 0)
+        )
+        source.seek(stats.offset)
+
+        batch: List[dict] = []
+        for line in iter(source.readline, b""):
+            stats.offset += len(line)
+            row = self._parse(line, stats)
+            if row is not None:
+                batch.append(row)
+            if len(batch) >= self.batch_size:
+                self._commit_batch(batch, stats, checkpoint_path)
+                batch = []
+        self._commit_batch(batch, stats, checkpoint_path)
+        return stats
+
+    def _parse(self, line: bytes, stats: ImportStats) -> Optional[dict]:
+        line = line.strip()
+        if not line:
+            return None
+        try:
+            record = loads(line)
+            content = record["content"]
+            if not isinstance(content, str) or not content:
+                raise ValueError(f"Invalid content {content!r}")
+            user_id = record.get("user_id")
+            if user_id is None:
+                user_id = self.user_ids.get(record.get("username"))
+            elif (
+                not isinstance(user_id, int)
+                or isinstance(user_id, bool)
+                or user_id not in self.usernames
+            ):
+                raise ValueError(f"Unknown user_id {user_id!r}")
+            created_at = record.get("created_at")
+            if created_at:
+                created_at = datetime.fromisoformat(created_at)
+            else:
+                created_at = datetime.now(timezone.utc)
+        except (ValueError, KeyError, TypeError, AttributeError):
+            stats.invalid += 1
+            return None
+        if user_id is None:
+            stats.skipped += 1
+            return None
+        return {
+            "content": content,
+            "user_id": user_id,
+            "room_id": self.room_id,
+            "author_username": self.usernames.get(user_id),
+            "created_at": created_at,
+            "updated_at": created_at,
+        }
+
+    def _commit_batch(
+        self, batch: List[dict], stats: ImportStats, checkpoint_path: Optional[str]
+    ):
+        if batch:
+            with self.bind.begin() as connection:
+                if connection.dialect.name == "postgresql":
+                    self._copy(connection, batch)
+                else:
+                    connection.execute(insert(Message), batch)
+            stats.rows += len(batch)
+        self._write_checkpoint(checkpoint_path, stats)
+        if self.progress is not None:
+            self.progress(stats)
+
+    def _copy(self, connection: Connection, batch: List[dict]):
+        buffer = io.StringIO()
+        # Quoted, so an empty content is an empty string rather than NULL;
+        # a missing author_username ("") is turned into NULL by FORCE_NULL
+        # and then filled in by the insert trigger
+        writer = csv.writer(buffer, quoting=csv.QUOTE_NONNUMERIC)
+        for row in batch:
+            writer.writerow(
+                [
+                    row["content"],
+                    row["user_id"],
+                    row["room_id"],
+                    row["author_username"],
+                    row["created_at"].isoformat(),
+                    row["updated_at"].isoformat(),
+                ]
+            )
+        buffer.seek(0)
+        # COPY goes through the psycopg2 connection of this transaction
+        cursor = connection.connection.cursor()
+        try:
+            cursor.copy_expert(
+                f"COPY messages ({', '.join(COPY_COLUMNS)}) "
+                "FROM STDIN WITH (FORMAT csv, FORCE_NULL (author_username))",
+                buffer,
+            )
+        finally:
+            cursor.close()
+
+    def _read_checkpoint(self, path: Optional[str]) -> dict:
+        if not path or not os.path.exists(path):
+            return {}
+        with open(path) as checkpoint_file:
+            checkpoint = json.load(checkpoint_file)
+        if checkpoint.get("room_id") != self.room_id:
+            raise ValueError(f"Checkpoint {path} belongs to another room")
+        return checkpoint
+
+    def _write_checkpoint(self, path: Optional[str], stats: ImportStats):
+        if not path:
+            return
+        with open(path + ".tmp", "w") as checkpoint_file:
+            json.dump(
+                {"room_id": self.room_id, "offset": stats.offset, "rows": stats.rows},
+                checkpoint_file,
+            )
+        os.replace(path + ".tmp", path)
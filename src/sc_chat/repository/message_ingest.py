@@ -0,0 +1,229 @@
+import asyncio
+import logging
+import time
+from typing import Awaitable, Callable, List, Optional
+
+from sqlalchemy import exc, insert
+
+from src.sc_chat.core.config import settings
+from src.sc_chat.database.base import async_session_maker
+from src.sc_chat.models.message import Message
+
+logger = logging.getLogger(__name__)
+
+# Called after every committed batch with the persisted messages, oldest first
+BatchListener = Callable[[List[dict]], Awaitable[None]]
+
+# Errors caused by the rows themselves (a deleted room, a constraint), as
+# opposed to the database being unavailable; only these are retried in halves
+ROW_ERRORS = (exc.IntegrityError, exc.DataError)
+
+
+class PendingMessage:
+    """A chat message waiting in the ingest queue."""
+
+    __slots__ = ("content", "user_id", "username", "room_id", "future")
+
+    def __init__(
+        self,
+        content: str,
+        user_id: int,
+        username: str,
+        room_id: int,
+        future: "asyncio.Future[dict]",
+    ):
+        self.content = content
+        self.user_id = user_id
+        self.username = username
+        self.room_id = room_id
+        self.future = future
+
+
+class MessageIngestor:
+    """
+    Write-behind message persistence.
+
+    Messages submitted from the WebSocket loop are queued and written by a
+    single flusher task in batches of up to ``batch_size`` rows, or whatever
+    arrived within ``max_delay`` seconds of the first queued message. Each
+    batch is one multi-row INSERT ... RETURNING and one commit; the ids and
+    created_at values come back from that statement. A batch rejected
+    because of one of its rows is retried in halves, so only the messages
+    that cannot be stored fail.
+    """
+
+    def __init__(
+        self,
+        session_maker=async_session_maker,
+        batch_size: Optional[int] = None,
+        max_delay_ms: Optional[int] = None,
+        queue_size: Optional[int] = None,
+    ):
+        self.session_maker = session_maker
+        self.batch_size = batch_size or settings.ingest_batch_size
+        self.max_delay = (max_delay_ms or settings.ingest_max_delay_ms) / 1000
+        self.queue_size = queue_size or settings.ingest_queue_size
+        self.listeners: List[BatchListener] = []
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+        self._stopping = False
+
+    def add_listener(self, listener: BatchListener):
+        """Register a coroutine called with every committed batch."""
+        self.listeners.append(listener)
+
+    async def start(self):
+        """Start the flusher task."""
+        self._queue = asyncio.Queue(maxsize=self.queue_size)
+        self._stopping = False
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Flush everything still queued and stop the flusher task."""
+        if self._task is None or self._queue is None:
+            return
+        self._stopping = True
+        await self._queue.put(None)
+        await self._task
+        self._task = None
+        queue, self._queue = self._queue, None
+        # Anything queued behind the sentinel will never be flushed
+        while not queue.empty():
+            pending = queue.get_nowait()
+            if pending is not None and not pending.future.done():
+                pending.future.set_exception(RuntimeError("Message ingestor stopped"))
+
+    async def submit(
+        self, content: str, user_id: int, username: str, room_id: int
+    ) -> "asyncio.Future[dict]":
+        """
+        Queue a message for persistence.
+
+        Returns a future that resolves to the persisted message (including
+        its id and created_at) once its batch is committed. Waits only if
+        the ingest queue is full. Raises RuntimeError once ``stop`` has been
+        called.
+        """
+        if self._queue is None or self._stopping:
+            raise RuntimeError("Message ingestor is not running")
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put(
+            PendingMessage(content, user_id, username, room_id, future)
+        )
+        if self._task is None:
+            # Stopped while waiting for room in the queue
+            raise RuntimeError("Message ingestor is not running")
+        return future
+
+    async def _run(self):
+        assert self._queue is not None
+        queue = self._queue
+        stopping = False
+        while not stopping:
+            item = await queue.get()
+            if item is None:
+                break
+            batch = [item]
+            deadline = time.monotonic() + self.max_delay
+
+            while len(batch) < self.batch_size:
+                try:
+                    item = queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    try:
+                        item = await asyncio.wait_for(queue.get(), remaining)
+                    except asyncio.TimeoutError:
+                        break
+                if item is None:
+                    stopping = True
+                    break
+                batch.append(item)
+
+            await self._flush(batch)
+
+    async def _flush(self, batch: List[PendingMessage]):
+        """Persist one batch, resolve its futures and notify the listeners."""
+        messages = await self._persist(batch)
+        if not messages:
+            return
+        for listener in self.listeners:
+            try:
+                await listener(messages)
+            except Exception:
+                logger.exception("Error in message ingest listener")
+
+    async def _persist(self, batch: List[PendingMessage]) -> List[dict]:
+        """
+        Insert ``batch`` and resolve the futures of its messages.
+
+        Returns the messages that were stored, in order. When a row error
+        rejects the batch, each half is retried on its own until the failing
+        messages are isolated; any other error fails the whole batch.
+        """
+        try:
+            rows = await self._insert(batch)
+        except ROW_ERRORS as e:
+            if len(batch) == 1:
+                logger.error(
+                    "Error persisting message for room %s: %s", batch[0].room_id, e
+                )
+                self._fail(batch, e)
+                return []
+            logger.warning(
+                "Batch of %d messages rejected, retrying in halves: %s", len(batch), e
+            )
+            middle = len(batch) // 2
+            return await self._persist(batch[:middle]) + await self._persist(
+                batch[middle:]
+            )
+        except Exception as e:
+            logger.error("Error persisting batch of %d messages: %s", len(batch), e)
+            self._fail(batch, e)
+            return []
+
+        messages = []
+        for pending, (message_id, created_at) in zip(batch, rows):
+            message = {
+                "id": message_id,
+                "content": pending.content,
+                "user_id": pending.user_id,
+                "username": pending.username,
+                "room_id": pending.room_id,
+                "created_at": created_at.isoformat(),
+            }
+            messages.append(message)
+            if not pending.future.done():
+                pending.future.set_result(message)
+        return messages
+
+    async def _insert(self, batch: List[PendingMessage]) -> list:
+        async with self.session_maker() as session:
+            result = await session.execute(
+                insert(Message).returning(
+                    Message.id, Message.created_at, sort_by_parameter_order=True
+                ),
+                [
+                    {
+                        "content": pending.content,
+                        "user_id": pending.user_id,
+                        "room_id": pending.room_id,
+                        "author_username": pending.username,
+                    }
+                    for pending in batch
+                ],
+            )
+            rows = result.all()
+            await session.commit()
+        return rows
+
+    @staticmethod
+    def _fail(batch: List[PendingMessage], error: BaseException):
+        for pending in batch:
+            if not pending.future.done():
+                pending.future.set_exception(error)
+
+
+message_ingestor = MessageIngestor()
@@ -0,0 +1,123 @@
+import math
+import re
+from typing import Callable, Dict, Iterable, List, Set, Tuple
+
+TOKEN_PATTERN = re.compile(r"\w+")
+
+
+def tokenize(text: str) -> List[str]:
+    """Split text into lowercase word tokens, like PostgreSQL's 'simple' config."""
+    return TOKEN_PATTERN.findall(text.lower())
+
+
+class RoomIndex:
+    """Inverted index of one room: token -> {message id: term frequency}."""
+
+    __slots__ = ("postings", "tokens_by_message")
+
+    def __init__(self) -> None:
+        self.postings: Dict[str, Dict[int, int]] = {}
+        self.tokens_by_message: Dict[int, Tuple[str, ...]] = {}
+
+
+class SearchIndex:
+    """
+    In-process full-text index for databases without tsvector support.
+
+    Rooms are indexed lazily: the first search of a room scans its messages
+    once (``build``), and from then on every message seen by this worker is
+    added as it arrives. Adding a message twice is harmless, so a build may
+    overlap with incremental adds. Each worker keeps its own index, and
+    only keeps it for rooms whose new messages all reach it; other rooms
+    are rebuilt for every search.
+    """
+
+    def __init__(self) -> None:
+        self.rooms: Dict[int, RoomIndex] = {}
+        # Set by the owner: whether this process sees every new message of a room
+        self.follows_room: Callable[[int], bool] = lambda room_id: True
+
+    def is_built(self, room_id: int) -> bool:
+        if not self.follows_room(room_id):
+            # A room this process stopped following may have gone stale
+            self.drop_room(room_id)
+            return False
+        return room_id in self.rooms
+
+    def build(self, room_id: int, messages: Iterable[Tuple[int, str]]):
+        """Index a room from (id, content) pairs of all its messages."""
+        self.rooms.setdefault(room_id, RoomIndex())
+        for message_id, content in messages:
+            self.add(room_id, message_id, content)
+
+    def add(self, room_id: int, message_id: int, content: str):
+        """Index one new message of a room, if the room is indexed."""
+        room = self.rooms.get(room_id)
+        if room is None or message_id in room.tokens_by_message:
+            return
+        tokens = tokenize(content)
+        room.tokens_by_message[message_id] = tuple(set(tokens))
+        for token in tokens:
+            postings = room.postings.setdefault(token, {})
+            postings[message_id] = postings.get(message_id, 0) + 1
+
+    def remove(self, room_id: int, message_id: int):
+        """Drop one message from the index."""
+        room = self.rooms.get(room_id)
+        if room is None:
+            return
+        for token in room.tokens_by_message.pop(message_id, ()):
+            postings = room.postings.get(token)
+            if postings is not None:
+                postings.pop(message_id, None)
+                if not postings:
+                    del room.postings[token]
+
+    def drop_room(self, room_id: int):
+        """Forget a room; it is rebuilt on its next search."""
+        self.rooms.pop(room_id, None)
+
+    def clear(self):
+        """Forget every room."""
+        self.rooms.clear()
+
+    def search(
+        self, room_id: int, query: str, limit: int, offset: int = 0
+    ) -> Tuple[List[Tuple[int, float]], bool]:
+        """
+        Return ([(message id, rank)], has_more) for messages with every term.
+
+        Rank sums the term frequencies weighted by how rare each term is in
+        the room; ties go to the newest message.
+        """
+        room = self.rooms.get(room_id)
+        terms = set(tokenize(query))
+        if room is None or not terms:
+            return [], False
+
+        postings: List[Dict[int, int]] = []
+        for term in terms:
+            posting = room.postings.get(term)
+            if not posting:
+                return [], False
+            postings.append(posting)
+        postings.sort(key=len)
+
+        candidates: Set[int] = set(postings[0])
+        for posting in postings[1:]:
+            candidates.intersection_update(posting)
+        total = len(room.tokens_by_message)
+        weights = [math.log(1 + total / len(posting)) for posting in postings]
+
+        ranked: List[Tuple[int, float]] = []
+        for message_id in candidates:
+            rank = 0.0
+            for posting, weight in zip(postings, weights):
+                rank += posting[message_id] * weight
+            ranked.append((message_id, rank))
+        ranked.sort(key=lambda item: (item[1], item[0]), reverse=True)
+        page = ranked[offset : offset + limit]
+        return page, len(ranked) > offset + limit
+
+
+search_index = SearchIndex()
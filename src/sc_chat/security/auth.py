@@ -5,17 +5,26 @@ from fastapi import Depends, HTTPException
 from fastapi.security import OAuth2PasswordBearer
 from jose import JWTError, jwt
 from jose.exceptions import ExpiredSignatureError
-from passlib.context import CryptContext
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from starlette import status
 
 from src.sc_chat.core.config import settings
 from src.sc_chat.database.conn import get_db
 from src.sc_chat.models.user import User
-from src.sc_chat.utils.common.exception import (InvalidCredentialsException,
-                                                UserNotFoundException)
+from src.sc_chat.security.password import build_context
+from src.sc_chat.security.principal import Principal
+from src.sc_chat.utils.common.enum import UserRoleEnum
+from src.sc_chat.utils.common.exception import (
+    InvalidCredentialsException,
+    UserNotFoundException,
+)
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/v1/auth/login")
+oauth2_scheme_optional = OAuth2PasswordBearer(
+    tokenUrl="/api/v1/auth/login", auto_error=False
+)
 
 
 class JWTSecurity(object):
@@ -25,7 +34,7 @@ class JWTSecurity(object):
 
     def __init__(self):
         """Initialize JWT security with configuration from settings."""
-        self.pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+        self.pwd_context = build_context(settings.bcrypt_rounds)
         self.SECRET_KEY = settings.secret_key
         self.ALGORITHM = settings.algorithm
         self.ACCESS_TOKEN_EXPIRE_MINUTES = settings.access_token_expire_minutes
@@ -69,6 +78,20 @@ class JWTSecurity(object):
         """
         return db.query(User).filter(User.email == email).first()
 
+    async def get_user_async(self, email: str, db: AsyncSession):
+        """
+        Retrieve a user by email using an async database session.
+
+        Args:
+            email (str): The email address of the user to retrieve.
+            db (AsyncSession): The async database session.
+
+        Returns:
+            User | None: The user object if found, None otherwise.
+        """
+        result = await db.execute(select(User).filter(User.email == email))
+        return result.scalars().first()
+
     def authenticate_user(self, email: str, password: str, db: Session):
         """
         Authenticate a user with email and password.
@@ -95,13 +118,17 @@ class JWTSecurity(object):
 
         return user
 
-    def create_access_token(self, data: dict, expires_delta: timedelta = None):  # type: ignore
+    def create_access_token(
+        self, data: dict, expires_delta: Optional[timedelta] = None
+    ):
         """
         Create a JWT access token.
 
         Args:
-            data (dict): The payload data to encode in the token (typically contains email and role).
-            expires_delta (timedelta, optional): Custom expiration time. Defaults to 60 minutes.
+            data (dict): The payload data to encode in the token (typically
+                contains email and role).
+            expires_delta (timedelta, optional): Custom expiration time.
+                Defaults to 60 minutes.
 
         Returns:
             str: The encoded JWT access token.
@@ -112,16 +139,22 @@ class JWTSecurity(object):
         else:
             expire = datetime.now(timezone.utc) + timedelta(minutes=60)
         to_encode.update({"exp": expire})
-        encoded_jwt = jwt.encode(to_encode, self.SECRET_KEY, algorithm=self.ALGORITHM)  # type: ignore
+        encoded_jwt = jwt.encode(
+            to_encode, self.SECRET_KEY, algorithm=self.ALGORITHM  # type: ignore
+        )
         return encoded_jwt
 
-    def create_refresh_token(self, data: dict, expires_delta: timedelta = None):  # type: ignore
+    def create_refresh_token(
+        self, data: dict, expires_delta: Optional[timedelta] = None
+    ):
         """
         Create a JWT refresh token.
 
         Args:
-            data (dict): The payload data to encode in the token (typically contains email and role).
-            expires_delta (timedelta, optional): Custom expiration time. Defaults to 40 days.
+            data (dict): The payload data to encode in the token (typically
+                contains email and role).
+            expires_delta (timedelta, optional): Custom expiration time.
+                Defaults to 40 days.
 
         Returns:
             str: The encoded JWT refresh token.
@@ -133,7 +166,9 @@ class JWTSecurity(object):
         else:
             expire = datetime.now(timezone.utc) + timedelta(days=40)
         to_encode.update({"exp": expire})
-        encoded_jwt = jwt.encode(to_encode, self.SECRET_KEY, algorithm=self.ALGORITHM)  # type: ignore
+        encoded_jwt = jwt.encode(
+            to_encode, self.SECRET_KEY, algorithm=self.ALGORITHM  # type: ignore
+        )
         return encoded_jwt
 
     def get_current_user(
@@ -168,6 +203,57 @@ class JWTSecurity(object):
             raise credentials_exception
         return user
 
+    def get_current_principal(
+        self, db: Session = Depends(get_db), token: str = Depends(oauth2_scheme)
+    ) -> Principal:
+        """
+        Get the authenticated caller as a lightweight Principal.
+
+        With ``settings.stateless_auth`` enabled, the ``uid`` and ``role``
+        claims written by /auth/login are trusted and no query is made; role
+        changes and deactivation then take effect when the token expires.
+        Otherwise, and for tokens without those claims, the user is loaded
+        as in get_current_user. The session is only opened if it is used.
+
+        Args:
+            db (Session): The database session dependency.
+            token (str): The JWT token from the Authorization header.
+
+        Returns:
+            Principal: The authenticated caller.
+
+        Raises:
+            HTTPException: If the token is invalid or the user is not found.
+        """
+        credentials_exception = HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Could not validate credentials",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+        try:
+            payload = jwt.decode(
+                token, self.SECRET_KEY, algorithms=[self.ALGORITHM]  # type: ignore
+            )
+        except JWTError as e:
+            raise credentials_exception from e
+
+        email: Optional[str] = payload.get("email")
+        if email is None:
+            raise credentials_exception
+
+        user_id = payload.get("uid")
+        role = payload.get("role")
+        if settings.stateless_auth and user_id is not None and role is not None:
+            try:
+                return Principal(id=int(user_id), email=email, role=UserRoleEnum(role))
+            except ValueError as e:
+                raise credentials_exception from e
+
+        user = self.get_user(email=email, db=db)
+        if user is None:
+            raise credentials_exception
+        return Principal.from_user(user)
+
     def decode_access_token_and_return_email(self, token: str):
         """
         Decode a JWT token and extract the email address.
@@ -176,9 +262,12 @@ class JWTSecurity(object):
             token (str): The JWT token to decode.
 
         Returns:
-            str | None: The email address from the token payload, or None if not found.
+            str | None: The email address from the token payload, or None if
+                not found.
         """
-        payload = jwt.decode(token, self.SECRET_KEY, algorithms=[self.ALGORITHM])  # type: ignore
+        payload = jwt.decode(
+            token, self.SECRET_KEY, algorithms=[self.ALGORITHM]  # type: ignore
+        )
         email: Optional[str] = payload.get("email")
         return email
 
@@ -196,7 +285,9 @@ class JWTSecurity(object):
             ExpiredSignatureError: If the token is expired or invalid.
         """
         try:
-            payload = jwt.decode(token, self.SECRET_KEY, algorithms=[self.ALGORITHM])  # type: ignore
+            payload = jwt.decode(
+                token, self.SECRET_KEY, algorithms=[self.ALGORITHM]  # type: ignore
+            )
             return payload
         except JWTError as e:
             raise ExpiredSignatureError("Token is expired") from e
@@ -213,7 +304,8 @@ class JWTSecurity(object):
             User: The user associated with the refresh token.
 
         Raises:
-            HTTPException: If the refresh token is invalid, expired, or the user is not found.
+            HTTPException: If the refresh token is invalid, expired, or the user
+                is not found.
         """
         credentials_exception = HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -0,0 +1,151 @@
+import hashlib
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Generic, Hashable, Optional, Tuple, TypeVar
+
+from src.sc_chat.core.config import settings
+from src.sc_chat.security.auth import jwt_service
+from src.sc_chat.utils.common.enum import UserRoleEnum
+
+V = TypeVar("V")
+
+
+class TTLCache(Generic[V]):
+    """
+    Size-bounded LRU cache whose entries also expire after a per-entry TTL.
+    """
+
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        self._entries: "OrderedDict[Hashable, Tuple[float, V]]" = OrderedDict()
+
+    def get(self, key: Hashable) -> Optional[V]:
+        """Return the cached value, or None if missing or expired."""
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at <= time.monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    def set(self, key: Hashable, value: V, ttl: float):
+        """Cache a value for ``ttl`` seconds, evicting the least recently used."""
+        if ttl <= 0:
+            return
+        self._entries[key] = (time.monotonic() + ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def delete(self, key: Hashable):
+        """Drop a key if present."""
+        self._entries.pop(key, None)
+
+    def clear(self):
+        """Drop every entry."""
+        self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+@dataclass(slots=True, frozen=True)
+class UserIdentity:
+    """The user fields needed to authenticate and authorize a connection."""
+
+    id: int
+    email: str
+    username: str
+    role: UserRoleEnum
+    is_active: bool
+
+    @classmethod
+    def from_user(cls, user) -> "UserIdentity":
+        return cls(
+            id=user.id,
+            email=user.email,
+            username=user.username,
+            role=user.role,
+            is_active=user.is_active,
+        )
+
+
+class IdentityCache:
+    """
+    Cache of user identities keyed by both email and user id.
+
+    Entries expire after ``settings.identity_cache_ttl_seconds``. Account
+    changes made through AuthRepository invalidate them immediately on this
+    worker; other workers see the change once their entry expires.
+    """
+
+    def __init__(self, max_size: Optional[int] = None, ttl: Optional[float] = None):
+        max_size = max_size or settings.identity_cache_size
+        self.ttl = ttl if ttl is not None else settings.identity_cache_ttl_seconds
+        self.by_email: TTLCache[UserIdentity] = TTLCache(max_size)
+        self.by_id: TTLCache[UserIdentity] = TTLCache(max_size)
+
+    def get_by_email(self, email: str) -> Optional[UserIdentity]:
+        """Get a cached identity by email."""
+        return self.by_email.get(email)
+
+    def get_by_id(self, user_id: int) -> Optional[UserIdentity]:
+        """Get a cached identity by user id."""
+        return self.by_id.get(user_id)
+
+    def put(self, identity: UserIdentity) -> UserIdentity:
+        """Cache an identity under its email and id."""
+        self.by_email.set(identity.email, identity, self.ttl)
+        self.by_id.set(identity.id, identity, self.ttl)
+        return identity
+
+    def invalidate(self, user_id: Optional[int] = None, email: Optional[str] = None):
+        """Drop a user's entries, looked up by id and/or email."""
+        if user_id is not None:
+            identity = self.by_id.get(user_id)
+            if identity is not None:
+                self.by_email.delete(identity.email)
+            self.by_id.delete(user_id)
+        if email is not None:
+            identity = self.by_email.get(email)
+            if identity is not None:
+                self.by_id.delete(identity.id)
+            self.by_email.delete(email)
+
+
+class TokenCache:
+    """
+    Cache of decoded JWT payloads keyed by a hash of the token.
+
+    An entry never outlives the token's own ``exp`` claim, so an expired
+    token is always decoded (and rejected) again.
+    """
+
+    def __init__(self, max_size: Optional[int] = None):
+        self.cache: TTLCache[dict] = TTLCache(max_size or settings.token_cache_size)
+
+    def decode(self, token: str) -> dict:
+        """
+        Return the verified payload of a token.
+
+        Raises:
+            JWTError: If the token is invalid or expired.
+        """
+        key = hashlib.sha256(token.encode()).digest()
+        payload = self.cache.get(key)
+        if payload is not None:
+            return payload
+
+        payload = jwt_service.decode_verification_token(token)
+        exp: Any = payload.get("exp")
+        if isinstance(exp, (int, float)):
+            self.cache.set(key, payload, exp - time.time())
+        return payload
+
+
+identity_cache = IdentityCache()
+token_cache = TokenCache()
@@ -0,0 +1,151 @@
+import asyncio
+import logging
+import multiprocessing
+import secrets
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Optional, Tuple
+
+from passlib.context import CryptContext
+
+from src.sc_chat.core.config import settings
+from src.sc_chat.utils.common.exception import ServiceBusyException
+
+logger = logging.getLogger(__name__)
+
+# One context per worker process, built on first use
+_contexts: dict = {}
+
+
+def build_context(rounds: int) -> CryptContext:
+    """Build the bcrypt context; hashes with other costs are flagged for update."""
+    return CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=rounds)
+
+
+def _context(rounds: int) -> CryptContext:
+    context = _contexts.get(rounds)
+    if context is None:
+        context = _contexts[rounds] = build_context(rounds)
+    return context
+
+
+def _hash(password: str, rounds: int) -> str:
+    return _context(rounds).hash(password)
+
+
+def _verify_and_update(
+    password: str, hashed_password: str, rounds: int
+) -> Tuple[bool, Optional[str]]:
+    return _context(rounds).verify_and_update(password, hashed_password)
+
+
+class PasswordHasher:
+    """
+    Runs bcrypt hashing and verification in a dedicated process pool.
+
+    At most ``max_pending`` operations may be queued or running at once;
+    beyond that, callers get a 503 instead of piling up behind the pool.
+    bcrypt work never touches the event loop or the threadpool used by
+    sync endpoints. If a worker process dies, the pool is replaced and the
+    operation retried once.
+    """
+
+    def __init__(
+        self,
+        workers: Optional[int] = None,
+        max_pending: Optional[int] = None,
+        rounds: Optional[int] = None,
+    ):
+        self.workers = workers or settings.password_hash_workers
+        self.max_pending = max_pending or settings.password_hash_max_pending
+        self.rounds = rounds or settings.bcrypt_rounds
+        self.pending = 0
+        self.rejected = 0
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._dummy_hash: Optional[str] = None
+
+    def start(self):
+        """Start the worker processes."""
+        if self._executor is None:
+            # Forking a process that runs an event loop and threads is unsafe
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+
+    def stop(self):
+        """Stop the worker processes."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self._executor = None
+
+    async def hash(self, password: str) -> str:
+        """Hash a password with the configured cost."""
+        return await self._run(_hash, password, self.rounds)
+
+    async def verify(
+        self, password: str, hashed_password: str
+    ) -> Tuple[bool, Optional[str]]:
+        """
+        Verify a password against a stored hash.
+
+        Returns:
+            Tuple[bool, Optional[str]]: Whether the password matches and, if
+            the stored hash uses another cost, a replacement hash to store.
+        """
+        return await self._run(
+            _verify_and_update, password, hashed_password, self.rounds
+        )
+
+    async def verify_dummy(self, password: str):
+        """
+        Verify a password against a throwaway hash and discard the result.
+
+        Used when there is no stored hash, e.g. for an unknown email, so the
+        response takes as long as a wrong password would.
+        """
+        if self._dummy_hash is None:
+            self._dummy_hash = await self.hash(secrets.token_urlsafe(16))
+        await self.verify(password, self._dummy_hash)
+
+    async def _run(self, function, *args):
+        if self.pending >= self.max_pending:
+            self.rejected += 1
+            raise ServiceBusyException(message="Too many authentication requests")
+        self.pending += 1
+        try:
+            try:
+                return await self._submit(function, *args)
+            except BrokenProcessPool:
+                return await self._submit(function, *args)
+        finally:
+            self.pending -= 1
+
+    async def _submit(self, function, *args):
+        self.start()
+        executor = self._executor
+        assert executor is not None
+        try:
+            return await asyncio.get_running_loop().run_in_executor(
+                executor, function, *args
+            )
+        except BrokenProcessPool:
+            # Only the first caller to see this pool break replaces it
+            if self._executor is executor:
+                logger.warning("Password hash worker died, restarting the pool")
+                self._executor = None
+                executor.shutdown(wait=False, cancel_futures=True)
+            raise
+
+    def stats(self) -> dict:
+        """Report pool size and admission counters."""
+        return {
+            "workers": self.workers,
+            "max_pending": self.max_pending,
+            "pending": self.pending,
+            "rejected": self.rejected,
+            "rounds": self.rounds,
+        }
+
+
+password_hasher = PasswordHasher()
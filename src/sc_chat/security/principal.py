@@ -0,0 +1,34 @@
+from dataclasses import dataclass, field
+from typing import Optional
+
+from sqlalchemy.orm import Session
+
+from src.sc_chat.models.user import User
+from src.sc_chat.utils.common.enum import UserRoleEnum
+
+
+@dataclass(slots=True)
+class Principal:
+    """
+    The authenticated caller of a REST endpoint.
+
+    Carries only what authorization needs. Endpoints that need the full
+    user record call ``load_user``, which queries the database at most once.
+    """
+
+    id: int
+    email: str
+    role: UserRoleEnum
+    _user: Optional[User] = field(default=None, repr=False)
+
+    @classmethod
+    def from_user(cls, user: User) -> "Principal":
+        return cls(
+            id=user.id, email=user.email, role=user.role, _user=user  # type: ignore
+        )
+
+    def load_user(self, db: Session) -> Optional[User]:
+        """Return the ORM user, loading it on first use."""
+        if self._user is None:
+            self._user = db.query(User).filter(User.id == self.id).first()
+        return self._user
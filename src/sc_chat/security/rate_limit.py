@@ -0,0 +1,162 @@
+import time
+from typing import Dict, Hashable, List, Optional, Tuple
+
+from fastapi import Depends, Request
+
+from src.sc_chat.core.config import settings
+from src.sc_chat.security.auth import oauth2_scheme_optional
+from src.sc_chat.security.identity_cache import token_cache
+from src.sc_chat.utils.common.exception import RateLimitExceededException
+
+
+class RateLimiter:
+    """
+    Token buckets sharing one rate and burst size, one bucket per key.
+
+    A bucket holds up to ``burst`` tokens and refills at ``rate`` tokens
+    per second; each allowed action takes one. Buckets are stored as
+    [tokens, updated_at] lists. Once there are more than ``max_keys``,
+    buckets that have refilled completely are dropped, since a fresh
+    bucket behaves the same.
+    """
+
+    def __init__(self, rate: float, burst: float, max_keys: int = 100_000):
+        self.rate = rate
+        self.burst = burst
+        self.max_keys = max_keys
+        self.buckets: Dict[Hashable, List[float]] = {}
+        self.rejected = 0
+
+    def available(self, key: Hashable, now: float) -> float:
+        """Tokens the key's bucket holds at ``now``."""
+        bucket = self.buckets.get(key)
+        if bucket is None:
+            return self.burst
+        return min(self.burst, bucket[0] + (now - bucket[1]) * self.rate)
+
+    def take(self, key: Hashable, now: float, tokens: float):
+        """Set the key's bucket to ``tokens`` left at ``now``."""
+        bucket = self.buckets.get(key)
+        if bucket is None:
+            if len(self.buckets) >= self.max_keys:
+                self._sweep(now)
+            self.buckets[key] = [tokens, now]
+        else:
+            bucket[0] = tokens
+            bucket[1] = now
+
+    def retry_after(self, available: float) -> float:
+        """Seconds until a bucket holding ``available`` tokens has one."""
+        return (1 - available) / self.rate if self.rate > 0 else 60.0
+
+    def allow(self, key: Hashable) -> bool:
+        """Take one token from the key's bucket if there is one."""
+        return check_limits((self, key)) is None
+
+    def forget(self, key: Hashable):
+        """Drop a key's bucket, e.g. once its connection is closed."""
+        self.buckets.pop(key, None)
+
+    def _sweep(self, now: float):
+        full = [
+            key
+            for key, (tokens, updated_at) in self.buckets.items()
+            if tokens + (now - updated_at) * self.rate >= self.burst
+        ]
+        for key in full:
+            del self.buckets[key]
+        # Still too many active keys: drop the oldest ones
+        overflow = len(self.buckets) - self.max_keys + 1
+        for key in list(self.buckets)[: max(0, overflow)]:
+            del self.buckets[key]
+
+
+def check_limits(*checks: Tuple[RateLimiter, Hashable]) -> Optional[float]:
+    """
+    Take one token from every (limiter, key) bucket, or from none of them.
+
+    Returns None if allowed, otherwise the seconds to wait before retrying.
+    """
+    now = time.monotonic()
+    levels = []
+    for limiter, key in checks:
+        available = limiter.available(key, now)
+        if available < 1:
+            limiter.rejected += 1
+            return limiter.retry_after(available)
+        levels.append(available)
+    for (limiter, key), available in zip(checks, levels):
+        limiter.take(key, now, available - 1)
+    return None
+
+
+class RateLimits:
+    """The limiters shared by the WebSocket loop and the REST routers."""
+
+    def __init__(self):
+        self.connection = RateLimiter(
+            settings.rate_limit_connection_per_second,
+            settings.rate_limit_connection_burst,
+        )
+        self.user = RateLimiter(
+            settings.rate_limit_user_per_second, settings.rate_limit_user_burst
+        )
+        self.room = RateLimiter(
+            settings.rate_limit_room_per_second, settings.rate_limit_room_burst
+        )
+        self.client = RateLimiter(
+            settings.rate_limit_client_per_second, settings.rate_limit_client_burst
+        )
+
+    def check_socket(self, connection_key: Hashable, user_id: int, room_id: int):
+        """Check a WebSocket action against its connection, user and room."""
+        if not settings.rate_limit_enabled:
+            return None
+        return check_limits(
+            (self.connection, connection_key),
+            (self.user, user_id),
+            (self.room, room_id),
+        )
+
+    def stats(self) -> dict:
+        return {
+            name: {"keys": len(limiter.buckets), "rejected": limiter.rejected}
+            for name, limiter in (
+                ("connection", self.connection),
+                ("user", self.user),
+                ("room", self.room),
+                ("client", self.client),
+            )
+        }
+
+
+rate_limits = RateLimits()
+
+
+def rate_limit_user(token: Optional[str] = Depends(oauth2_scheme_optional)):
+    """
+    REST dependency sharing the per-user bucket with the WebSocket loop.
+
+    The user is taken from the access token alone, so a rejected request
+    costs no database work. Requests without a valid token are left to the
+    authentication dependency.
+    """
+    if not settings.rate_limit_enabled or not token:
+        return
+    try:
+        payload = token_cache.decode(token)
+    except Exception:
+        return
+    key = payload.get("uid") or payload.get("email")
+    retry_after = check_limits((rate_limits.user, key))
+    if retry_after is not None:
+        raise RateLimitExceededException(retry_after)
+
+
+def rate_limit_client(request: Request):
+    """REST dependency limiting unauthenticated endpoints by client address."""
+    if not settings.rate_limit_enabled or request.client is None:
+        return
+    retry_after = check_limits((rate_limits.client, request.client.host))
+    if retry_after is not None:
+        raise RateLimitExceededException(retry_after)
@@ -3,8 +3,8 @@ from typing import Callable, List, Union
 from fastapi import Depends, HTTPException
 from starlette import status
 
-from src.sc_chat.models.user import User
 from src.sc_chat.security.auth import jwt_service
+from src.sc_chat.security.principal import Principal
 from src.sc_chat.utils.common.enum import UserRoleEnum
 from src.sc_chat.utils.common.exception import CredentialsValidationException
 
@@ -32,15 +32,18 @@ def require_roles(roles: Union[UserRoleEnum, List[UserRoleEnum]]):
         roles = [roles]
 
     def get_user_with_roles(
-        current_user: User = Depends(jwt_service.get_current_user),
-    ) -> User:
+        current_user: Principal = Depends(jwt_service.get_current_principal),
+    ) -> Principal:
         if not current_user or not current_user.role:  # type: ignore
             raise CredentialsValidationException("Could not validate user credentials")
 
-        if not RBACHandler.user_has_permission(current_user.role, roles):  # type: ignore
+        if not RBACHandler.user_has_permission(current_user.role, roles):
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
-                detail=f"Insufficient permissions. Required roles: {[role.value for role in roles]}",
+                detail=(
+                    "Insufficient permissions. Required roles: "
+                    f"{[role.value for role in roles]}"
+                ),
             )
 
         return current_user
@@ -54,5 +57,5 @@ def require_admin() -> Callable:
 
 
 def require_user() -> Callable:
-    """Require user role - for authenticated user endpoints (both USER and ADMIN can access)."""
+    """Require user role - for authenticated user endpoints (USER and ADMIN)."""
     return require_roles(UserRoleEnum.USER)
@@ -7,3 +7,11 @@ class UserRoleEnum(Enum):
 
     def __str__(self):
         return self.value
+
+
+class ExportFormatEnum(str, Enum):
+    NDJSON = "ndjson"
+    CSV = "csv"
+
+    def __str__(self):
+        return self.value
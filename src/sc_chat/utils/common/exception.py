@@ -1,3 +1,5 @@
+import math
+
 from fastapi import HTTPException, status
 
 
@@ -23,3 +25,27 @@ class UserNotFoundException(HTTPException):
     def __init__(self, message: str):
         self.message = message
         super().__init__(status_code=status.HTTP_404_NOT_FOUND, detail=self.message)
+
+
+class ServiceBusyException(HTTPException):
+    """Exception raised when a bounded resource has no capacity left for a request."""
+
+    def __init__(self, message: str, retry_after: int = 1):
+        self.message = message
+        super().__init__(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=self.message,
+            headers={"Retry-After": str(retry_after)},
+        )
+
+
+class RateLimitExceededException(HTTPException):
+    """Exception raised when a caller has used up its rate limit."""
+
+    def __init__(self, retry_after: float):
+        self.message = "Rate limit exceeded"
+        super().__init__(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail=self.message,
+            headers={"Retry-After": str(max(1, math.ceil(retry_after)))},
+        )
@@ -0,0 +1,60 @@
+import csv
+import io
+import zlib
+from typing import AsyncIterator, List
+
+from src.sc_chat.utils.common.enum import ExportFormatEnum
+from src.sc_chat.utils.common.serialization import dumps
+
+EXPORT_FIELDS = ("id", "room_id", "user_id", "username", "created_at", "content")
+
+MEDIA_TYPES = {
+    ExportFormatEnum.NDJSON: "application/x-ndjson",
+    ExportFormatEnum.CSV: "text/csv",
+}
+
+
+def export_filename(room_id: int, export_format: ExportFormatEnum, gzip: bool) -> str:
+    return f"room_{room_id}_messages.{export_format}" + (".gz" if gzip else "")
+
+
+def encode_batch(
+    batch: List[dict], export_format: ExportFormatEnum, header: bool = False
+) -> bytes:
+    """Encode a batch of message payloads as NDJSON lines or CSV rows."""
+    if export_format is ExportFormatEnum.NDJSON:
+        return b"".join(dumps(payload) + b"\n" for payload in batch)
+
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=EXPORT_FIELDS, extrasaction="ignore")
+    if header:
+        writer.writeheader()
+    writer.writerows(batch)
+    return buffer.getvalue().encode()
+
+
+async def encode_export(
+    batches: AsyncIterator[List[dict]], export_format: ExportFormatEnum, gzip: bool
+) -> AsyncIterator[bytes]:
+    """
+    Encode a stream of payload batches into response chunks.
+
+    Each batch becomes one chunk (compressed incrementally when ``gzip``),
+    so only one batch is held in memory at a time.
+    """
+    compressor = zlib.compressobj(wbits=31) if gzip else None
+    header = True
+    async for batch in batches:
+        chunk = encode_batch(batch, export_format, header)
+        header = False
+        if compressor is not None:
+            chunk = compressor.compress(chunk)
+        if chunk:
+            yield chunk
+
+    if header and export_format is ExportFormatEnum.CSV:
+        # Empty room: still a valid CSV file
+        chunk = encode_batch([], export_format, header=True)
+        yield compressor.compress(chunk) if compressor is not None else chunk
+    if compressor is not None:
+        yield compressor.flush()
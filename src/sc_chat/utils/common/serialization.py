@@ -0,0 +1,85 @@
+import json
+from typing import Any, Iterable, Optional
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional speedup
+    orjson = None  # type: ignore[assignment]
+
+BACKEND = "orjson" if orjson is not None else "json"
+
+
+def dumps(obj: Any) -> bytes:
+    """Encode an object to compact JSON bytes with the fastest available encoder."""
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(obj, separators=(",", ":"), ensure_ascii=False).encode()
+
+
+def loads(data: str | bytes) -> Any:
+    """Decode JSON text or bytes."""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+class EncodedMessage:
+    """A chat message payload together with its JSON encoding, built once."""
+
+    __slots__ = ("payload", "_encoded")
+
+    def __init__(self, payload: dict, encoded: Optional[bytes] = None):
+        self.payload = payload
+        self._encoded = encoded
+
+    @property
+    def id(self) -> int:
+        return self.payload["id"]
+
+    @property
+    def encoded(self) -> bytes:
+        if self._encoded is None:
+            self._encoded = dumps(self.payload)
+        return self._encoded
+
+
+def history_frame(
+    messages: Iterable[EncodedMessage],
+    has_more: bool,
+    next_cursor: Optional[int],
+    request_id: Any = None,
+    final: bool = True,
+) -> bytes:
+    """Build a messages_history frame by joining pre-encoded messages."""
+    return b"".join(
+        (
+            b'{"type":"messages_history","data":{"messages":[',
+            b",".join(message.encoded for message in messages),
+            b'],"has_more":',
+            b"true" if has_more else b"false",
+            b',"next_cursor":',
+            dumps(next_cursor),
+            b',"request_id":',
+            dumps(request_id),
+            b',"final":',
+            b"true" if final else b"false",
+            b"}}",
+        )
+    )
+
+
+def messages_page(
+    messages: Iterable[EncodedMessage], has_more: bool, next_cursor: Optional[int]
+) -> bytes:
+    """Build a paginated messages object by joining pre-encoded messages."""
+    return b"".join(
+        (
+            b'{"messages":[',
+            b",".join(message.encoded for message in messages),
+            b'],"has_more":',
+            b"true" if has_more else b"false",
+            b',"next_cursor":',
+            dumps(next_cursor),
+            b"}",
+        )
+    )
@@ -1,53 +1,64 @@
+import logging
 from typing import Optional
 from fastapi import WebSocket, status
 from jose import JWTError
-from sqlalchemy.orm import Session
 
 from src.sc_chat.security.auth import jwt_service
-from src.sc_chat.database.conn import get_db
-from src.sc_chat.models.user import User
+from src.sc_chat.security.identity_cache import (
+    UserIdentity,
+    identity_cache,
+    token_cache,
+)
+from src.sc_chat.database.base import async_session_maker
 
+logger = logging.getLogger(__name__)
 
-async def authenticate_websocket(websocket: WebSocket, token: str) -> Optional[User]:
+
+async def authenticate_websocket(
+    websocket: WebSocket, token: str
+) -> Optional[UserIdentity]:
     """
     Authenticate WebSocket connection using JWT token.
 
+    Decoded tokens and user identities are cached, so a reconnect storm
+    does not turn into one database lookup per connection attempt.
+
     Args:
         websocket: The WebSocket connection
         token: JWT token from query parameter or header
 
     Returns:
-        User object if authentication successful, None otherwise
+        UserIdentity if authentication successful, None otherwise
     """
     try:
-        email = jwt_service.decode_access_token_and_return_email(token)
+        email = token_cache.decode(token).get("email")
         if not email:
             await websocket.close(
                 code=status.WS_1008_POLICY_VIOLATION, reason="Invalid token"
             )
             return None
 
-        db: Session = next(get_db())
-
-        try:
-            user = jwt_service.get_user(email=email, db=db)
-            if not user:
-                await websocket.close(
-                    code=status.WS_1008_POLICY_VIOLATION, reason="User not found"
-                )
-                return None
+        user = identity_cache.get_by_email(email)
+        if user is None:
+            async with async_session_maker() as db:
+                db_user = await jwt_service.get_user_async(email=email, db=db)
+            if db_user is not None:
+                user = identity_cache.put(UserIdentity.from_user(db_user))
 
-            if user.is_active is False:
-                await websocket.close(
-                    code=status.WS_1008_POLICY_VIOLATION,
-                    reason="User account is deactivated",
-                )
-                return None
+        if not user:
+            await websocket.close(
+                code=status.WS_1008_POLICY_VIOLATION, reason="User not found"
+            )
+            return None
 
-            return user
+        if user.is_active is False:
+            await websocket.close(
+                code=status.WS_1008_POLICY_VIOLATION,
+                reason="User account is deactivated",
+            )
+            return None
 
-        finally:
-            db.close()
+        return user
 
     except JWTError:
         await websocket.close(
@@ -55,7 +66,7 @@ async def authenticate_websocket(websocket: WebSocket, token: str) -> Optional[U
         )
         return None
     except Exception as e:
-        print(f"WebSocket authentication error: {e}")
+        logger.warning("WebSocket authentication error: %s", e)
         await websocket.close(
             code=status.WS_1011_INTERNAL_ERROR, reason="Authentication error"
         )
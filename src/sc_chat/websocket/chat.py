@@ -1,22 +1,189 @@
+import asyncio
 import json
-
-from fastapi import APIRouter, WebSocket, WebSocketDisconnect, Depends
-from sqlalchemy.orm import Session
-
-from src.sc_chat.database.conn import get_db
-from src.sc_chat.repository.chat_repository import ChatRepository
+import logging
+from typing import Any, List, Optional
+
+from fastapi import APIRouter, WebSocket, WebSocketDisconnect
+
+from src.sc_chat.core.config import settings
+from src.sc_chat.database.conn import async_db_session
+from src.sc_chat.database.routing import replica_router
+from src.sc_chat.repository.chat_repository import AsyncChatRepository
+from src.sc_chat.repository.message_cache import message_cache
+from src.sc_chat.repository.message_ingest import message_ingestor
+from src.sc_chat.repository.search_index import search_index
+from src.sc_chat.security.rate_limit import rate_limits
+from src.sc_chat.utils.common.serialization import EncodedMessage, history_frame
+from src.sc_chat.websocket.codecs import (
+    FrameDecodeError,
+    negotiate_codec,
+    receive_frame,
+)
 from src.sc_chat.websocket.connection_manager import manager
+from src.sc_chat.websocket.ephemeral import (
+    EPHEMERAL_TYPES,
+    ephemeral_events,
+    parse_event,
+)
+from src.sc_chat.websocket.presence import presence
 from src.sc_chat.websocket.auth import (
     authenticate_websocket,
     extract_token_from_websocket,
 )
 
+logger = logging.getLogger(__name__)
+
 router = APIRouter(tags=["WebSocket Chat"])
 
+# Frame types that cost database work, checked against the rate limits
+RATE_LIMITED_TYPES = frozenset({"message", "fetch_messages"})
+
+
+async def broadcast_persisted_messages(messages: List[dict]):
+    """Broadcast every message of a committed ingest batch to its room."""
+    for message in messages:
+        await manager.broadcast_to_room(
+            {"type": "message", "data": message}, message["room_id"]
+        )
+
+
+async def note_persisted_writers(messages: List[dict]):
+    """Keep the authors of a committed ingest batch reading from the primary."""
+    for message in messages:
+        replica_router.note_write(message["user_id"])
+
+
+def cache_room_message(room_id: int, message: dict):
+    """Keep the recent-message cache current with every message seen."""
+    if message.get("type") == "message":
+        message_cache.append(EncodedMessage(message["data"]))
+
+
+def index_room_message(room_id: int, message: dict):
+    """Keep the search index current with every message seen."""
+    if message.get("type") == "message":
+        data = message["data"]
+        search_index.add(room_id, data["id"], data["content"])
+
+
+def invalidate_room_state(room_id: int, message: dict):
+    """Drop cached state of a room whose history changed, or that we left."""
+    if message.get("type") == "invalidate":
+        message_id = message["data"]["message_id"]
+        message_cache.evict(room_id)
+        if message_id is None:
+            search_index.drop_room(room_id)
+        else:
+            search_index.remove(room_id, message_id)
+
+
+def reset_room_state():
+    """Forget per-room state that may have missed other workers' messages."""
+    message_cache.clear()
+    search_index.clear()
+
 
-def get_chat_repository(db: Session = Depends(get_db)) -> ChatRepository:
-    """Dependency to get chat repository instance."""
-    return ChatRepository(db)
+message_ingestor.add_listener(broadcast_persisted_messages)
+message_ingestor.add_listener(note_persisted_writers)
+manager.add_listener(cache_room_message)
+manager.add_listener(index_room_message)
+manager.add_listener(invalidate_room_state)
+# Only cache and index rooms whose new messages all reach this worker
+message_cache.follows_room = manager.pubsub.covers
+search_index.follows_room = manager.pubsub.covers
+manager.pubsub.set_reset_handler(reset_room_state)
+
+# Keeps background error reports alive until they are sent
+_background_tasks: set = set()
+
+
+def _report_failed_message(websocket: WebSocket, future: asyncio.Future):
+    """Tell the sender when a message acked on enqueue fails to persist."""
+    if future.cancelled() or future.exception() is None:
+        return
+    logger.error("Error saving message: %s", future.exception())
+    task = asyncio.create_task(
+        manager.send_personal_message(
+            json.dumps({"type": "error", "message": "Failed to save message"}),
+            websocket,
+        )
+    )
+    _background_tasks.add(task)
+    task.add_done_callback(_background_tasks.discard)
+
+
+async def send_message_history(
+    websocket: WebSocket,
+    room_id: int,
+    limit: int,
+    cursor: int | None = None,
+    request_id: Any = None,
+    user_id: Optional[int] = None,
+) -> bool:
+    """
+    Send up to ``limit`` messages older than ``cursor`` as messages_history frames.
+
+    Each frame holds at most ``settings.history_page_size`` messages, and the
+    next page is only read once the connection's outbox is down to
+    ``settings.history_max_queued_frames``. A slow reader therefore holds
+    just a few pages in memory, and live broadcasts always find room in its
+    outbox; they may arrive between pages. Each page is read in its own
+    short sessions, so no connection is held while waiting on the socket;
+    cache misses read from a replica unless ``user_id`` wrote recently.
+    The last frame has "final": true. Returns False if the socket is gone.
+    """
+    remaining = max(1, limit)
+    while True:
+        if not await manager.wait_for_outbox(
+            websocket, settings.history_max_queued_frames
+        ):
+            return False
+        async with async_db_session() as db, replica_router.async_read_session(
+            user_id
+        ) as reader:
+            messages, has_more = await AsyncChatRepository(
+                db, read_session=reader
+            ).get_history_page(
+                room_id, min(remaining, settings.history_page_size), cursor
+            )
+        remaining -= len(messages)
+        # Pages go backwards in time: continue from the oldest message
+        next_cursor = messages[0].id if messages and has_more else None
+        final = next_cursor is None or remaining <= 0
+        success = await manager.send_personal_message(
+            history_frame(messages, has_more, next_cursor, request_id, final),
+            websocket,
+        )
+        if not success or final:
+            return success
+        cursor = next_cursor
+
+
+async def send_requested_history(
+    websocket: WebSocket,
+    room_id: int,
+    limit: int,
+    cursor: int | None,
+    request_id: Any,
+    user_id: Optional[int] = None,
+):
+    """Run a fetch_messages request in the background, reporting failures."""
+    try:
+        await send_message_history(
+            websocket, room_id, limit, cursor, request_id, user_id
+        )
+    except Exception:
+        logger.exception("Error fetching messages")
+        await manager.send_personal_message(
+            json.dumps(
+                {
+                    "type": "error",
+                    "message": "Failed to fetch messages",
+                    "request_id": request_id,
+                }
+            ),
+            websocket,
+        )
 
 
 @router.websocket("/ws/{room_id}")
@@ -30,52 +197,47 @@ async def websocket_endpoint(websocket: WebSocket, room_id: int):
     if not user:
         return
 
-    db: Session = next(get_db())
-    chat_repo = ChatRepository(db)
+    codec, subprotocol = negotiate_codec(websocket)
+    if codec is None:
+        await websocket.close(code=1003, reason="Unsupported codec")
+        return
+
+    # Database work borrows a session per unit of work (room lookup, history
+    # page) instead of pinning one for the socket's lifetime; messages are
+    # written by the ingestor
+    history_task: Optional[asyncio.Task] = None
 
     try:
-        room = chat_repo.get_room_by_id(room_id)
+        async with replica_router.async_read_session(user.id) as db:
+            room = await AsyncChatRepository(db).get_room_by_id(room_id)
         if not room:
             await websocket.close(code=1008, reason="Room not found")
             return
 
-        await manager.connect(websocket, user, room_id)
+        await manager.connect(websocket, user, room_id, codec, subprotocol)
 
         try:
-            messages, has_more = chat_repo.get_recent_messages(room_id, limit=50)
-
-            message_responses = []
-            for msg in messages:
-                message_response = {
-                    "id": msg.id,
-                    "content": msg.content,
-                    "user_id": msg.user_id,
-                    "username": msg.user.username,
-                    "room_id": msg.room_id,
-                    "created_at": msg.created_at.isoformat(),
-                }
-                message_responses.append(message_response)
-
+            success = await send_message_history(
+                websocket,
+                room_id,
+                settings.history_initial_messages,
+                user_id=user.id,
+            )
+            if not success:
+                return
+            # Later changes arrive as debounced "presence" diffs; both cover
+            # this worker's sockets only
             success = await manager.send_personal_message(
                 json.dumps(
-                    {
-                        "type": "messages_history",
-                        "data": {
-                            "messages": message_responses,
-                            "has_more": has_more,
-                            "next_cursor": messages[-1].id
-                            if messages and has_more
-                            else None,
-                        },
-                    }
+                    {"type": "presence_state", "data": presence.roster(room_id)}
                 ),
                 websocket,
             )
             if not success:
                 return
 
-        except Exception as e:
-            print(f"Error fetching recent messages: {e}")
+        except Exception:
+            logger.exception("Error fetching recent messages")
             success = await manager.send_personal_message(
                 json.dumps(
                     {"type": "error", "message": "Failed to fetch recent messages"}
@@ -90,11 +252,27 @@ async def websocket_endpoint(websocket: WebSocket, room_id: int):
                 if websocket not in manager.connection_map:
                     break
 
-                data = await websocket.receive_text()
-                message_data = json.loads(data)
+                message_data = await receive_frame(websocket, codec)
 
                 message_type = message_data.get("type")
 
+                if message_type in RATE_LIMITED_TYPES:
+                    retry_after = rate_limits.check_socket(websocket, user.id, room_id)
+                    if retry_after is not None:
+                        success = await manager.send_personal_message(
+                            json.dumps(
+                                {
+                                    "type": "error",
+                                    "message": "Rate limit exceeded",
+                                    "retry_after_ms": int(retry_after * 1000) + 1,
+                                }
+                            ),
+                            websocket,
+                        )
+                        if not success:
+                            break
+                        continue
+
                 if message_type == "message":
                     content = message_data.get("content", "").strip()
                     if not content:
@@ -112,25 +290,19 @@ async def websocket_endpoint(websocket: WebSocket, room_id: int):
                         continue
 
                     try:
-                        new_message = chat_repo.create_message(
-                            content, getattr(user, "id"), room_id
-                        )
-
-                        message_response = {
-                            "id": new_message.id,
-                            "content": new_message.content,
-                            "user_id": new_message.user_id,
-                            "username": user.username,
-                            "room_id": new_message.room_id,
-                            "created_at": new_message.created_at.isoformat(),
-                        }
-
-                        await manager.broadcast_to_room(
-                            {"type": "message", "data": message_response}, room_id
+                        # The ingestor broadcasts the message once committed
+                        persisted = await message_ingestor.submit(
+                            content, user.id, user.username, room_id
                         )
+                        if settings.ingest_durability == "commit":
+                            await persisted
+                        else:
+                            persisted.add_done_callback(
+                                lambda future: _report_failed_message(websocket, future)
+                            )
 
                     except Exception as e:
-                        print(f"Error saving message: {e}")
+                        logger.error("Error saving message: %s", e)
                         success = await manager.send_personal_message(
                             json.dumps(
                                 {"type": "error", "message": "Failed to save message"}
@@ -142,53 +314,58 @@ async def websocket_endpoint(websocket: WebSocket, room_id: int):
 
                 elif message_type == "fetch_messages":
                     cursor = message_data.get("cursor")
-                    limit = min(message_data.get("limit", 50), 100)  # Max 100 messages
-
-                    try:
-                        messages, has_more = chat_repo.get_recent_messages(
-                            room_id, limit, cursor
-                        )
-
-                        message_responses = []
-                        for msg in messages:
-                            message_response = {
-                                "id": msg.id,
-                                "content": msg.content,
-                                "user_id": msg.user_id,
-                                "username": msg.user.username,
-                                "room_id": msg.room_id,
-                                "created_at": msg.created_at.isoformat(),
-                            }
-                            message_responses.append(message_response)
-
+                    request_id = message_data.get("request_id")
+                    limit = message_data.get("limit", 50)
+                    if not isinstance(limit, int) or isinstance(limit, bool):
+                        limit = 50
+                    limit = min(limit, settings.history_max_messages)
+
+                    # One request at a time; the receive loop keeps running
+                    # while its pages stream out
+                    if history_task is not None and not history_task.done():
                         success = await manager.send_personal_message(
                             json.dumps(
                                 {
-                                    "type": "messages_history",
-                                    "data": {
-                                        "messages": message_responses,
-                                        "has_more": has_more,
-                                        "next_cursor": messages[-1].id
-                                        if messages and has_more
-                                        else None,
-                                    },
+                                    "type": "error",
+                                    "message": "History request already in progress",
+                                    "request_id": request_id,
                                 }
                             ),
                             websocket,
                         )
                         if not success:
                             break
+                        continue
+                    history_task = asyncio.create_task(
+                        send_requested_history(
+                            websocket,
+                            room_id,
+                            limit,
+                            cursor,
+                            request_id,
+                            user.id,
+                        )
+                    )
 
-                    except Exception as e:
-                        print(f"Error fetching messages: {e}")
+                elif message_type in EPHEMERAL_TYPES:
+                    # Never persisted: coalesced and broadcast in batches
+                    try:
+                        fields = parse_event(message_data)
+                    except ValueError as e:
                         success = await manager.send_personal_message(
-                            json.dumps(
-                                {"type": "error", "message": "Failed to fetch messages"}
-                            ),
+                            json.dumps({"type": "error", "message": str(e)}),
                             websocket,
                         )
                         if not success:
                             break
+                        continue
+                    ephemeral_events.submit(
+                        room_id,
+                        user.id,
+                        user.username,
+                        message_type,
+                        fields,
+                    )
 
                 else:
                     success = await manager.send_personal_message(
@@ -206,20 +383,28 @@ async def websocket_endpoint(websocket: WebSocket, room_id: int):
             except WebSocketDisconnect:
                 break
             except json.JSONDecodeError:
+                # orjson.JSONDecodeError subclasses it too
                 success = await manager.send_personal_message(
                     json.dumps({"type": "error", "message": "Invalid JSON format"}),
                     websocket,
                 )
                 if not success:
                     break
+            except FrameDecodeError as e:
+                success = await manager.send_personal_message(
+                    json.dumps({"type": "error", "message": str(e)}),
+                    websocket,
+                )
+                if not success:
+                    break
             except Exception as e:
-                print(f"Error processing message: {e}")
+                logger.warning("Error processing message: %s", e)
                 error_msg = str(e).lower()
                 if any(
                     phrase in error_msg
                     for phrase in ["disconnect", "websocket", "closed", "cannot call"]
                 ):
-                    print("WebSocket connection error detected, breaking loop")
+                    logger.info("WebSocket connection error detected, breaking loop")
                     break
 
                 success = await manager.send_personal_message(
@@ -232,9 +417,11 @@ async def websocket_endpoint(websocket: WebSocket, room_id: int):
                     break
 
     except WebSocketDisconnect:
-        manager.disconnect(websocket)
-    except Exception as e:
-        print(f"WebSocket error: {e}")
-        manager.disconnect(websocket)
+        pass
+    except Exception:
+        logger.exception("WebSocket error")
     finally:
-        db.close()
+        if history_task is not None:
+            history_task.cancel()
+        manager.disconnect(websocket)
+        rate_limits.connection.forget(websocket)
@@ -0,0 +1,189 @@
+import zlib
+from typing import Any, Dict, Iterable, Optional
+
+from fastapi import WebSocket, WebSocketDisconnect
+
+from src.sc_chat.utils.common.serialization import loads
+
+try:
+    import msgpack
+except ImportError:  # pragma: no cover - optional codec
+    msgpack = None  # type: ignore[assignment]
+
+try:
+    import cbor2
+except ImportError:  # pragma: no cover - optional codec
+    cbor2 = None  # type: ignore[assignment]
+
+# Raw deflate stream, no zlib header or checksum, as in permessage-deflate
+DEFLATE_WBITS = -15
+# Largest client frame accepted once inflated; chat frames are far smaller
+MAX_INFLATED_BYTES = 1024 * 1024
+
+
+class FrameDecodeError(ValueError):
+    """Raised when a client frame cannot be decoded by its connection's codec."""
+
+
+class Codec:
+    """
+    Wire format of one WebSocket connection's frames.
+
+    ``encode`` gets both the message and its JSON encoding, so a codec
+    built on JSON reuses it instead of serializing again. ``encode_json``
+    converts a frame that was already built as JSON, like a history page.
+    """
+
+    name = "json"
+    binary = False
+
+    def encode(self, message: dict, json_bytes: bytes) -> str | bytes:
+        return json_bytes.decode()
+
+    def encode_json(self, frame: str | bytes) -> str | bytes:
+        return frame if isinstance(frame, str) else frame.decode()
+
+    def decode(self, data: str | bytes) -> Any:
+        return loads(data)
+
+
+class MsgpackCodec(Codec):
+    """MessagePack binary frames."""
+
+    name = "msgpack"
+    binary = True
+
+    def encode(self, message: dict, json_bytes: bytes) -> bytes:
+        return msgpack.packb(message)
+
+    def encode_json(self, frame: str | bytes) -> bytes:
+        return msgpack.packb(loads(frame))
+
+    def decode(self, data: str | bytes) -> Any:
+        if isinstance(data, str):
+            raise FrameDecodeError("Expected a binary MessagePack frame")
+        try:
+            return msgpack.unpackb(data)
+        except Exception as e:
+            raise FrameDecodeError("Invalid MessagePack frame") from e
+
+
+class CborCodec(Codec):
+    """CBOR binary frames."""
+
+    name = "cbor"
+    binary = True
+
+    def encode(self, message: dict, json_bytes: bytes) -> bytes:
+        return cbor2.dumps(message)
+
+    def encode_json(self, frame: str | bytes) -> bytes:
+        return cbor2.dumps(loads(frame))
+
+    def decode(self, data: str | bytes) -> Any:
+        if isinstance(data, str):
+            raise FrameDecodeError("Expected a binary CBOR frame")
+        try:
+            return cbor2.loads(data)
+        except Exception as e:
+            raise FrameDecodeError("Invalid CBOR frame") from e
+
+
+class DeflateJsonCodec(Codec):
+    """
+    JSON compressed with raw deflate into binary frames.
+
+    Each frame is compressed on its own, so it is compressed once per
+    broadcast and shared by every socket using this codec. Transport-level
+    permessage-deflate instead compresses per socket, inside the server.
+    """
+
+    name = "json-deflate"
+    binary = True
+
+    def __init__(self, level: int = 6):
+        self.level = level
+
+    def encode(self, message: dict, json_bytes: bytes) -> bytes:
+        return self._compress(json_bytes)
+
+    def encode_json(self, frame: str | bytes) -> bytes:
+        return self._compress(frame.encode() if isinstance(frame, str) else frame)
+
+    def decode(self, data: str | bytes) -> Any:
+        # Clients may still send plain JSON text frames
+        if isinstance(data, str):
+            return loads(data)
+        # Inflate at most MAX_INFLATED_BYTES, so a small frame cannot
+        # expand into a huge one
+        decompressor = zlib.decompressobj(DEFLATE_WBITS)
+        try:
+            inflated = decompressor.decompress(data, MAX_INFLATED_BYTES)
+        except zlib.error as e:
+            raise FrameDecodeError("Invalid deflated JSON frame") from e
+        if decompressor.unconsumed_tail:
+            raise FrameDecodeError("Deflated JSON frame is too large")
+        if not decompressor.eof:
+            raise FrameDecodeError("Truncated deflated JSON frame")
+        try:
+            return loads(inflated)
+        except ValueError as e:
+            raise FrameDecodeError("Invalid deflated JSON frame") from e
+
+    def _compress(self, data: bytes) -> bytes:
+        compressor = zlib.compressobj(self.level, zlib.DEFLATED, DEFLATE_WBITS)
+        return compressor.compress(data) + compressor.flush()
+
+
+JSON_CODEC = Codec()
+
+
+def available_codecs() -> Dict[str, Codec]:
+    """Codecs usable in this process, by name; binary ones need their package."""
+    codecs: Dict[str, Codec] = {JSON_CODEC.name: JSON_CODEC}
+    if msgpack is not None:
+        codecs[MsgpackCodec.name] = MsgpackCodec()
+    if cbor2 is not None:
+        codecs[CborCodec.name] = CborCodec()
+    codecs[DeflateJsonCodec.name] = DeflateJsonCodec()
+    return codecs
+
+
+CODECS = available_codecs()
+
+
+def negotiate_codec(websocket: WebSocket) -> tuple[Optional[Codec], Optional[str]]:
+    """
+    Pick the codec of a new connection, before it is accepted.
+
+    A ``codec`` query parameter wins; otherwise the first offered
+    subprotocol naming a known codec is used, and echoed back on accept.
+    Returns (codec, subprotocol to accept); the codec is None if the query
+    parameter names a codec this process cannot serve.
+    """
+    requested = websocket.query_params.get("codec")
+    if requested:
+        return CODECS.get(requested), None
+    offered: Iterable[str] = websocket.scope.get("subprotocols") or ()
+    for subprotocol in offered:
+        codec = CODECS.get(subprotocol)
+        if codec is not None:
+            return codec, subprotocol
+    return JSON_CODEC, None
+
+
+async def receive_frame(websocket: WebSocket, codec: Codec) -> Any:
+    """
+    Receive one text or binary frame and decode it.
+
+    Raises:
+        WebSocketDisconnect: If the client disconnected.
+        FrameDecodeError: If a binary codec cannot decode the frame.
+    """
+    message = await websocket.receive()
+    if message["type"] == "websocket.disconnect":
+        raise WebSocketDisconnect(message.get("code", 1000), message.get("reason"))
+    data = message.get("text")
+    if data is None:
+        data = message.get("bytes") or b""
+    return codec.decode(data)
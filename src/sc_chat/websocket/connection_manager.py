@@ -1,18 +1,61 @@
-import json
-from typing import Dict, List
-from fastapi import WebSocket
-from dataclasses import dataclass
-
-from src.sc_chat.models.user import User
-
-
-@dataclass
+import asyncio
+import logging
+import sys
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+from fastapi import WebSocket, status
+from dataclasses import dataclass, field
+
+from src.sc_chat.core.config import settings
+from src.sc_chat.security.identity_cache import UserIdentity
+from src.sc_chat.utils.common.enum import UserRoleEnum
+from src.sc_chat.utils.common.serialization import dumps
+from src.sc_chat.websocket.codecs import JSON_CODEC, Codec
+from src.sc_chat.websocket.metrics import LatencyTracker
+from src.sc_chat.websocket.pubsub import PubSubBackend, create_pubsub_backend
+
+logger = logging.getLogger(__name__)
+
+# Outbound frame, encoded by the connection's codec, and the monotonic time it
+# was queued (None for personal messages)
+OutboundFrame = Tuple[str | bytes, Optional[float]]
+RoomListener = Callable[[int, dict], None]
+# Called with a room id whenever a user joins it or leaves it entirely
+PresenceListener = Callable[[int], None]
+
+# Frames that are skipped, rather than queued, for a backed up connection
+DROPPABLE_TYPES = frozenset({"events"})
+# Frames for the room listeners of each worker, never sent to sockets
+INTERNAL_TYPES = frozenset({"invalidate"})
+
+
+def invalidation(message_id: Optional[int] = None) -> dict:
+    """Frame telling listeners a room's history, or one message, changed."""
+    return {"type": "invalidate", "data": {"message_id": message_id}}
+
+
+@dataclass(slots=True, eq=False)
 class Connection:
-    """Represents a WebSocket connection with user information."""
+    """
+    Represents a WebSocket connection with the identity of its user.
+
+    Only the fields the chat loop needs are kept, not the ORM user, so a
+    record stays small and never holds on to a database session.
+    """
 
     websocket: WebSocket
-    user: User
+    user_id: int
+    username: str
+    role: UserRoleEnum
     room_id: int
+    codec: Codec = JSON_CODEC
+    outbox: "asyncio.Queue[OutboundFrame]" = field(
+        default_factory=lambda: asyncio.Queue(maxsize=settings.ws_send_queue_size)
+    )
+    writer_task: Optional[asyncio.Task] = None
+    # Set by the writer once the outbox is down to drain_below frames
+    drained: asyncio.Event = field(default_factory=asyncio.Event)
+    drain_below: int = -1
 
     def __eq__(self, other):
         """Two connections are equal if they have the same websocket."""
@@ -25,101 +68,297 @@ class Connection:
         return hash(id(self.websocket))
 
 
+@dataclass(slots=True)
+class RoomMember:
+    """A user present in a room and how many sockets they have open there."""
+
+    user_id: int
+    username: str
+    role: UserRoleEnum
+    connections: int = 0
+
+
 class ConnectionManager:
     """Manages WebSocket connections for chat rooms."""
 
-    def __init__(self):
-        self.active_connections: Dict[int, List[Connection]] = {}
+    def __init__(self, pubsub: PubSubBackend | None = None):
+        # room_id -> {websocket: connection}; dicts give O(1) add and remove
+        self.active_connections: Dict[int, Dict[WebSocket, Connection]] = {}
+        # room_id -> {user_id: member}
+        self.room_members: Dict[int, Dict[int, RoomMember]] = {}
         self.connection_map: Dict[WebSocket, Connection] = {}
-
-    async def connect(self, websocket: WebSocket, user: User, room_id: int):
+        self.pubsub = pubsub or create_pubsub_backend()
+        self.pubsub.set_handler(self._deliver_to_room)
+        self.fanout_latency = LatencyTracker()
+        self.listeners: List[RoomListener] = []
+        self.presence_listeners: List[PresenceListener] = []
+
+    def add_listener(self, listener: RoomListener):
+        """Register a callback run for every room message seen by this worker."""
+        self.listeners.append(listener)
+
+    def add_presence_listener(self, listener: PresenceListener):
+        """Register a callback run when a room's set of users changes."""
+        self.presence_listeners.append(listener)
+
+    def _notify_listeners(self, room_id: int, message: dict):
+        for listener in self.listeners:
+            listener(room_id, message)
+
+    def _notify_presence(self, room_id: int):
+        for listener in self.presence_listeners:
+            listener(room_id)
+
+    async def start(self):
+        """Start the pub/sub backend used for cross-process fan-out."""
+        await self.pubsub.start()
+
+    async def stop(self):
+        """Stop the pub/sub backend and every connection writer."""
+        for websocket in list(self.connection_map):
+            self.disconnect(websocket)
+        await self.pubsub.stop()
+
+    async def connect(
+        self,
+        websocket: WebSocket,
+        user: UserIdentity,
+        room_id: int,
+        codec: Codec = JSON_CODEC,
+        subprotocol: Optional[str] = None,
+    ):
         """Accept a new WebSocket connection and add to room."""
-        await websocket.accept()
+        await websocket.accept(subprotocol=subprotocol)
 
-        connection = Connection(websocket=websocket, user=user, room_id=room_id)
+        connection = Connection(
+            websocket=websocket,
+            user_id=user.id,
+            username=user.username,
+            role=user.role,
+            room_id=room_id,
+            codec=codec,
+        )
 
         # Add to room connections
-        if room_id not in self.active_connections:
-            self.active_connections[room_id] = []
-        self.active_connections[room_id].append(connection)
+        room_connections = self.active_connections.get(room_id)
+        if room_connections is None:
+            room_connections = self.active_connections[room_id] = {}
+            self.room_members[room_id] = {}
+            # Only listen for rooms this worker has live sockets in
+            self.pubsub.subscribe(room_id)
+        room_connections[websocket] = connection
+
+        members = self.room_members[room_id]
+        member = members.get(connection.user_id)
+        if member is None:
+            member = members[connection.user_id] = RoomMember(
+                connection.user_id, connection.username, connection.role
+            )
+            self._notify_presence(room_id)
+        member.connections += 1
 
         # Add to connection map for easy lookup
         self.connection_map[websocket] = connection
 
-        print(f"User {user.username} connected to room {room_id}")
+        connection.writer_task = asyncio.create_task(self._writer(connection))
+
+        logger.info("User %s connected to room %s", user.username, room_id)
 
     def disconnect(self, websocket: WebSocket):
         """Remove a WebSocket connection."""
-        if websocket in self.connection_map:
-            connection = self.connection_map[websocket]
+        connection = self.connection_map.pop(websocket, None)
+        if connection is not None:
             room_id = connection.room_id
 
             # Remove from room connections
-            if room_id in self.active_connections:
-                try:
-                    self.active_connections[room_id].remove(connection)
-                except ValueError:
-                    # Connection not in list, which is fine
-                    pass
-
-                if not self.active_connections[room_id]:
+            room_connections = self.active_connections.get(room_id)
+            if room_connections is not None:
+                room_connections.pop(websocket, None)
+
+                members = self.room_members[room_id]
+                member = members.get(connection.user_id)
+                if member is not None:
+                    member.connections -= 1
+                    if member.connections <= 0:
+                        del members[connection.user_id]
+                        self._notify_presence(room_id)
+
+                if not room_connections:
                     del self.active_connections[room_id]
+                    del self.room_members[room_id]
+                    self.pubsub.unsubscribe(room_id)
+                    self.fanout_latency.discard(room_id)
+                    if not self.pubsub.covers(room_id):
+                        # Later messages and invalidations will not reach us
+                        self._notify_listeners(room_id, invalidation())
+
+            if connection.writer_task is not None:
+                connection.writer_task.cancel()
+            # Wake anyone waiting in wait_for_outbox
+            connection.drained.set()
+            # Drain the outbox so senders blocked on a full queue wake up
+            while not connection.outbox.empty():
+                connection.outbox.get_nowait()
+
+            logger.info(
+                "User %s disconnected from room %s", connection.username, room_id
+            )
+
+    async def _writer(self, connection: Connection):
+        """Drain a connection's outbox onto its socket."""
+        websocket = connection.websocket
+        room_id = connection.room_id
+        try:
+            while True:
+                data, queued_at = await connection.outbox.get()
+                # Binary codecs encode to bytes, text ones to str
+                if isinstance(data, bytes):
+                    await websocket.send_bytes(data)
+                else:
+                    await websocket.send_text(data)
+                if connection.outbox.qsize() <= connection.drain_below:
+                    connection.drained.set()
+                if queued_at is not None:
+                    self.fanout_latency.record(room_id, time.monotonic() - queued_at)
+        except asyncio.CancelledError:
+            pass
+        except Exception as e:
+            logger.warning("Error sending to %s: %s", connection.username, e)
+            self.disconnect(websocket)
 
-            # Remove from connection map
-            del self.connection_map[websocket]
+    async def _drop_slow_consumer(self, connection: Connection):
+        """Disconnect a consumer whose outbox is full."""
+        logger.warning("Disconnecting slow consumer %s", connection.username)
+        self.disconnect(connection.websocket)
+        try:
+            await connection.websocket.close(
+                code=status.WS_1013_TRY_AGAIN_LATER, reason="Slow consumer"
+            )
+        except Exception:
+            pass
+
+    async def send_personal_message(self, message: str | bytes, websocket: WebSocket):
+        """
+        Queue a JSON frame for a specific WebSocket connection.
+
+        The frame is converted to the connection's codec. Waits for room in
+        the connection's outbox, so a client that reads slowly only slows
+        down replies to itself.
+        """
+        connection = self.connection_map.get(websocket)
+        # Check if websocket is still in our connection map (i.e., still connected)
+        if connection is None:
+            return False
 
-            print(f"User {connection.user.username} disconnected from room {room_id}")
+        await connection.outbox.put((connection.codec.encode_json(message), None))
+        return websocket in self.connection_map
 
-    async def send_personal_message(self, message: str, websocket: WebSocket):
-        """Send a message to a specific WebSocket connection."""
-        try:
-            # Check if websocket is still in our connection map (i.e., still connected)
-            if websocket not in self.connection_map:
-                return False
+    async def wait_for_outbox(self, websocket: WebSocket, max_queued: int) -> bool:
+        """
+        Wait until at most ``max_queued`` frames are queued for a connection.
 
-            await websocket.send_text(message)
-            return True
-        except Exception as e:
-            print(f"Error sending personal message: {e}")
-            self.disconnect(websocket)
+        Lets bulk senders pace themselves against the socket instead of
+        filling the outbox that live broadcasts need. Returns False once the
+        connection is gone.
+        """
+        connection = self.connection_map.get(websocket)
+        if connection is None:
             return False
+        while connection.outbox.qsize() > max_queued:
+            connection.drain_below = max_queued
+            connection.drained.clear()
+            await connection.drained.wait()
+            if websocket not in self.connection_map:
+                return False
+        connection.drain_below = -1
+        return True
 
     async def broadcast_to_room(
         self, message: dict, room_id: int, exclude_websocket: WebSocket | None = None
     ):
-        """Broadcast a message to all connections in a room."""
+        """Broadcast a message to all connections in a room, on every worker."""
+        await self.pubsub.publish(room_id, message)
+        await self._deliver_to_room(room_id, message, exclude_websocket)
+
+    async def publish_invalidation(
+        self, room_id: int, message_id: Optional[int] = None
+    ):
+        """Tell the other workers' listeners that a room's history changed."""
+        await self.pubsub.publish(room_id, invalidation(message_id))
+
+    async def broadcast_locally(self, message: dict, room_id: int):
+        """Broadcast a message to the connections in a room on this worker only."""
+        await self._deliver_to_room(room_id, message)
+
+    async def _deliver_to_room(
+        self, room_id: int, message: dict, exclude_websocket: WebSocket | None = None
+    ):
+        """Send a message to the connections of a room held by this worker."""
+        self._notify_listeners(room_id, message)
+
         if room_id not in self.active_connections:
             return
+        if message.get("type") in INTERNAL_TYPES:
+            return
 
-        message_text = json.dumps(message)
-        disconnected_connections = []
-
-        # Create a copy of the list to avoid modification during iteration
-        connections_copy = self.active_connections[room_id][:]
+        # Encoded once per broadcast and codec, shared by every recipient
+        json_bytes = dumps(message)
+        frames: Dict[str, OutboundFrame] = {}
+        queued_at = time.monotonic()
+        slow_connections = []
+
+        if message.get("type") in DROPPABLE_TYPES:
+            # Only sent to sockets with at least half their outbox free,
+            # leaving the rest for chat messages; never counts as slow and
+            # stays out of the fan-out latency figures
+            for connection in self.active_connections[room_id].values():
+                outbox = connection.outbox
+                if outbox.qsize() * 2 < outbox.maxsize:
+                    codec = connection.codec
+                    frame = frames.get(codec.name)
+                    if frame is None:
+                        frame = frames[codec.name] = (
+                            codec.encode(message, json_bytes),
+                            None,
+                        )
+                    outbox.put_nowait(frame)
+                else:
+                    self.fanout_latency.increment(room_id, "ephemeral_dropped")
+            return
 
-        for connection in connections_copy:
+        # Never await here: each connection's writer task does the sending
+        for connection in self.active_connections[room_id].values():
             if exclude_websocket and connection.websocket == exclude_websocket:
                 continue
 
-            if connection.websocket not in self.connection_map:
-                disconnected_connections.append(connection.websocket)
-                continue
-
+            codec = connection.codec
+            frame = frames.get(codec.name)
+            if frame is None:
+                frame = frames[codec.name] = (
+                    codec.encode(message, json_bytes),
+                    queued_at,
+                )
             try:
-                await connection.websocket.send_text(message_text)
-            except Exception as e:
-                print(f"Error broadcasting to {connection.user.username}: {e}")
-                disconnected_connections.append(connection.websocket)
-
-        for websocket in disconnected_connections:
-            self.disconnect(websocket)
-
-    def get_room_users(self, room_id: int) -> List[User]:
-        """Get list of users currently connected to a room."""
-        if room_id not in self.active_connections:
-            return []
-
-        return [conn.user for conn in self.active_connections[room_id]]
+                connection.outbox.put_nowait(frame)
+            except asyncio.QueueFull:
+                self.fanout_latency.increment(room_id, "dropped")
+                if settings.ws_slow_consumer_policy == "disconnect":
+                    slow_connections.append(connection)
+
+        for connection in slow_connections:
+            await self._drop_slow_consumer(connection)
+
+    def get_fanout_latency(self, room_id: int) -> dict:
+        """Get queue-to-socket latency percentiles for broadcasts in a room."""
+        return {
+            "room_id": room_id,
+            "connections": self.get_connection_count(room_id),
+            **self.fanout_latency.summary(room_id),
+        }
+
+    def get_room_users(self, room_id: int) -> List[RoomMember]:
+        """Get the distinct users currently connected to a room."""
+        return list(self.room_members.get(room_id, {}).values())
 
     def get_connection_count(self, room_id: int) -> int:
         """Get number of active connections in a room."""
@@ -129,10 +368,40 @@ class ConnectionManager:
 
     def is_user_in_room(self, user_id: int, room_id: int) -> bool:
         """Check if a user is currently connected to a specific room."""
-        if room_id not in self.active_connections:
-            return False
-
-        return any(conn.user.id == user_id for conn in self.active_connections[room_id])
+        return user_id in self.room_members.get(room_id, {})
+
+    def memory_footprint(self) -> dict:
+        """
+        Estimate the memory held by the connection registry.
+
+        Counts the registry containers, the connection and member records
+        and each connection's outbox, but not the sockets themselves.
+        """
+        registry_bytes = sys.getsizeof(self.connection_map)
+        registry_bytes += sys.getsizeof(self.active_connections)
+        registry_bytes += sys.getsizeof(self.room_members)
+        for room_connections in self.active_connections.values():
+            registry_bytes += sys.getsizeof(room_connections)
+        for members in self.room_members.values():
+            registry_bytes += sys.getsizeof(members)
+            registry_bytes += sum(sys.getsizeof(member) for member in members.values())
+
+        connection_bytes = 0
+        for connection in self.connection_map.values():
+            connection_bytes += sys.getsizeof(connection)
+            connection_bytes += sys.getsizeof(connection.outbox)
+            connection_bytes += sys.getsizeof(connection.outbox._queue)  # type: ignore
+
+        connections = len(self.connection_map)
+        total_bytes = registry_bytes + connection_bytes
+        return {
+            "connections": connections,
+            "rooms": len(self.active_connections),
+            "registry_bytes": registry_bytes,
+            "connection_bytes": connection_bytes,
+            "total_bytes": total_bytes,
+            "bytes_per_connection": total_bytes // connections if connections else 0,
+        }
 
 
 manager = ConnectionManager()
@@ -0,0 +1,202 @@
+import asyncio
+import time
+from typing import Dict, Optional, Set, Tuple
+
+from src.sc_chat.core.config import settings
+from src.sc_chat.websocket.connection_manager import ConnectionManager, manager
+
+# Event key within a room: (user_id, event type, target message id or None)
+EventKey = Tuple[int, str, Optional[int]]
+
+EPHEMERAL_TYPES = frozenset({"typing", "read_receipt", "reaction"})
+MAX_EMOJI_LENGTH = 16
+
+
+def parse_event(message_data: dict) -> dict:
+    """
+    Validate an ephemeral event frame from a client and return its fields.
+
+    Raises:
+        ValueError: If a field is missing or has the wrong type.
+    """
+    event_type = message_data.get("type")
+    if event_type == "typing":
+        is_typing = message_data.get("is_typing", True)
+        if not isinstance(is_typing, bool):
+            raise ValueError("is_typing must be a boolean")
+        return {"is_typing": is_typing}
+
+    message_id = message_data.get("message_id")
+    if not isinstance(message_id, int) or isinstance(message_id, bool):
+        raise ValueError("message_id must be an integer")
+    if event_type == "read_receipt":
+        return {"message_id": message_id}
+
+    emoji = message_data.get("emoji")
+    if not isinstance(emoji, str) or not 0 < len(emoji) <= MAX_EMOJI_LENGTH:
+        raise ValueError("emoji must be a short string")
+    return {"message_id": message_id, "emoji": emoji}
+
+
+class EphemeralEvents:
+    """
+    Coalescing, throttled fan-out of events that are never persisted.
+
+    Events are keyed per room by user, type and (for receipts and
+    reactions) target message; a newer event replaces a pending one with
+    the same key. Every ``flush_interval`` the pending events of a room go
+    out together in one "events" frame, and each key is sent at most once
+    per ``min_interval``. The frames are marked droppable, so a backed up
+    socket skips them instead of delaying chat messages.
+
+    A room holds at most ``max_pending_per_user`` pending keys per user and
+    ``max_pending_per_room`` in total, which bounds both memory and the
+    size of an "events" frame. Events for new keys past either limit are
+    dropped; updates to a key already pending always replace it.
+    """
+
+    def __init__(
+        self,
+        connection_manager: ConnectionManager,
+        flush_interval_ms: Optional[int] = None,
+        min_interval_ms: Optional[int] = None,
+        max_pending_per_user: Optional[int] = None,
+        max_pending_per_room: Optional[int] = None,
+    ):
+        self.manager = connection_manager
+        self.flush_interval = (
+            flush_interval_ms or settings.ephemeral_flush_interval_ms
+        ) / 1000
+        self.min_interval = (
+            min_interval_ms or settings.ephemeral_min_interval_ms
+        ) / 1000
+        self.max_pending_per_user = (
+            max_pending_per_user or settings.ephemeral_max_pending_per_user
+        )
+        self.max_pending_per_room = (
+            max_pending_per_room or settings.ephemeral_max_pending_per_room
+        )
+        # room_id -> {key: event}, replaced in place while pending
+        self.pending: Dict[int, Dict[EventKey, dict]] = {}
+        # room_id -> {user_id: number of pending keys}
+        self.pending_per_user: Dict[int, Dict[int, int]] = {}
+        # room_id -> {key: monotonic time last sent}
+        self.last_sent: Dict[int, Dict[EventKey, float]] = {}
+        self.coalesced = 0
+        self.dropped = 0
+        self._timers: Dict[int, asyncio.TimerHandle] = {}
+        self._tasks: Set[asyncio.Task] = set()
+
+    def submit(
+        self, room_id: int, user_id: int, username: str, event_type: str, fields: dict
+    ):
+        """
+        Queue an event for the room's next flush; never waits.
+
+        Returns False if the event was dropped because the user or the room
+        already has as many pending events as allowed.
+        """
+        key = (user_id, event_type, fields.get("message_id"))
+        room_pending = self.pending.setdefault(room_id, {})
+        if key in room_pending:
+            self.coalesced += 1
+        else:
+            user_counts = self.pending_per_user.setdefault(room_id, {})
+            pending_for_user = user_counts.get(user_id, 0)
+            if (
+                pending_for_user >= self.max_pending_per_user
+                or len(room_pending) >= self.max_pending_per_room
+            ):
+                self.dropped += 1
+                return False
+            user_counts[user_id] = pending_for_user + 1
+        room_pending[key] = {
+            "type": event_type,
+            "user_id": user_id,
+            "username": username,
+            **fields,
+        }
+        self._schedule(room_id, self.flush_interval)
+        return True
+
+    def stop(self):
+        """Cancel pending flushes."""
+        for timer in self._timers.values():
+            timer.cancel()
+        self._timers.clear()
+        for task in self._tasks:
+            task.cancel()
+
+    def stats(self) -> dict:
+        return {
+            "pending_rooms": len(self.pending),
+            "pending_events": sum(len(events) for events in self.pending.values()),
+            "coalesced": self.coalesced,
+            "dropped": self.dropped,
+        }
+
+    def _schedule(self, room_id: int, delay: float):
+        if room_id in self._timers:
+            return
+        self._timers[room_id] = asyncio.get_running_loop().call_later(
+            delay, self._flush_soon, room_id
+        )
+
+    def _flush_soon(self, room_id: int):
+        self._timers.pop(room_id, None)
+        task = asyncio.create_task(self._flush(room_id))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _flush(self, room_id: int):
+        room_pending = self.pending.get(room_id)
+        if not room_pending:
+            return
+        now = time.monotonic()
+        last_sent = self.last_sent.setdefault(room_id, {})
+
+        user_counts = self.pending_per_user[room_id]
+
+        events = []
+        next_due: Optional[float] = None
+        for key in list(room_pending):
+            due = last_sent.get(key, 0.0) + self.min_interval
+            if due > now:
+                # Throttled: keep the latest version for a later flush
+                next_due = due if next_due is None else min(next_due, due)
+                continue
+            events.append(room_pending.pop(key))
+            last_sent[key] = now
+            user_id = key[0]
+            user_counts[user_id] -= 1
+            if not user_counts[user_id]:
+                del user_counts[user_id]
+
+        # Forget send times old enough that they no longer throttle anything
+        expired = [
+            key
+            for key, sent in last_sent.items()
+            if sent + self.min_interval <= now and key not in room_pending
+        ]
+        for key in expired:
+            del last_sent[key]
+        if not last_sent:
+            del self.last_sent[room_id]
+        if room_pending:
+            # Only throttled events are left, so next_due is set
+            delay = self.flush_interval
+            if next_due is not None:
+                delay = max(next_due - now, delay)
+            self._schedule(room_id, delay)
+        else:
+            del self.pending[room_id]
+            del self.pending_per_user[room_id]
+
+        if events:
+            await self.manager.broadcast_to_room(
+                {"type": "events", "data": {"room_id": room_id, "events": events}},
+                room_id,
+            )
+
+
+ephemeral_events = EphemeralEvents(manager)
@@ -0,0 +1,53 @@
+from collections import deque
+from typing import Deque, Dict
+
+
+def percentile(sorted_values: list, fraction: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(fraction * len(sorted_values)))
+    return sorted_values[index]
+
+
+class LatencyTracker:
+    """
+    Keeps a sliding window of latency samples per key and reports percentiles.
+
+    Only the last ``window`` samples of each key are kept, so memory stays
+    bounded no matter how long the process runs.
+    """
+
+    def __init__(self, window: int = 1024):
+        self.window = window
+        self.samples: Dict[int, Deque[float]] = {}
+        self.counters: Dict[int, Dict[str, int]] = {}
+
+    def record(self, key: int, seconds: float):
+        """Record one latency sample for a key."""
+        samples = self.samples.get(key)
+        if samples is None:
+            samples = self.samples[key] = deque(maxlen=self.window)
+        samples.append(seconds)
+
+    def increment(self, key: int, counter: str, amount: int = 1):
+        """Increment a named counter for a key."""
+        counters = self.counters.setdefault(key, {})
+        counters[counter] = counters.get(counter, 0) + amount
+
+    def discard(self, key: int):
+        """Forget everything recorded for a key."""
+        self.samples.pop(key, None)
+        self.counters.pop(key, None)
+
+    def summary(self, key: int) -> dict:
+        """Return sample count, p50/p90/p99/max in milliseconds and counters."""
+        values = sorted(self.samples.get(key, ()))
+        return {
+            "samples": len(values),
+            "p50_ms": round(percentile(values, 0.50) * 1000, 3),
+            "p90_ms": round(percentile(values, 0.90) * 1000, 3),
+            "p99_ms": round(percentile(values, 0.99) * 1000, 3),
+            "max_ms": round(values[-1] * 1000, 3) if values else 0.0,
+            **self.counters.get(key, {}),
+        }
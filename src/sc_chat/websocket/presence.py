@@ -0,0 +1,98 @@
+import asyncio
+from typing import Dict, Optional, Set
+
+from src.sc_chat.core.config import settings
+from src.sc_chat.websocket.connection_manager import ConnectionManager, manager
+
+
+class PresenceService:
+    """
+    Room rosters and join/leave diffs, built on ConnectionManager.room_members.
+
+    The roster of a room is the set of distinct users with at least one
+    socket open in it, so extra tabs never show up as extra joins. Changes
+    are not broadcast one by one: the first change in a room starts a
+    debounce window, and when it closes the roster is compared with the
+    last one announced. A user who reconnects within the window produces
+    no event at all. Rosters cover the sockets held by this worker, so
+    diffs are only sent to those sockets: another worker's roster of the
+    same room differs, and its diffs would contradict this one's.
+    """
+
+    def __init__(
+        self, connection_manager: ConnectionManager, debounce_ms: Optional[int] = None
+    ):
+        self.manager = connection_manager
+        if debounce_ms is None:
+            debounce_ms = settings.presence_debounce_ms
+        self.debounce = debounce_ms / 1000
+        # room_id -> user ids last broadcast as present
+        self.announced: Dict[int, Set[int]] = {}
+        self._timers: Dict[int, asyncio.TimerHandle] = {}
+        self._tasks: Set[asyncio.Task] = set()
+        self.manager.add_presence_listener(self._on_change)
+
+    def roster(self, room_id: int) -> dict:
+        """Current users of a room, straight from the connection registry."""
+        members = self.manager.get_room_users(room_id)
+        return {
+            "room_id": room_id,
+            "users": [
+                {"user_id": member.user_id, "username": member.username}
+                for member in members
+            ],
+            "connections": self.manager.get_connection_count(room_id),
+        }
+
+    def stop(self):
+        """Cancel pending diff broadcasts."""
+        for timer in self._timers.values():
+            timer.cancel()
+        self._timers.clear()
+        for task in self._tasks:
+            task.cancel()
+
+    def _on_change(self, room_id: int):
+        if room_id in self._timers:
+            return
+        self._timers[room_id] = asyncio.get_running_loop().call_later(
+            self.debounce, self._flush_soon, room_id
+        )
+
+    def _flush_soon(self, room_id: int):
+        self._timers.pop(room_id, None)
+        task = asyncio.create_task(self._flush(room_id))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _flush(self, room_id: int):
+        members = {
+            member.user_id: member for member in self.manager.get_room_users(room_id)
+        }
+        announced = self.announced.get(room_id, set())
+        joined = [members[user_id] for user_id in members.keys() - announced]
+        left = sorted(announced - members.keys())
+        if members:
+            self.announced[room_id] = set(members)
+        else:
+            self.announced.pop(room_id, None)
+        if not joined and not left:
+            return
+
+        await self.manager.broadcast_locally(
+            {
+                "type": "presence",
+                "data": {
+                    "room_id": room_id,
+                    "joined": [
+                        {"user_id": member.user_id, "username": member.username}
+                        for member in joined
+                    ],
+                    "left": left,
+                },
+            },
+            room_id,
+        )
+
+
+presence = PresenceService(manager)
@@ -0,0 +1,359 @@
+import asyncio
+import fcntl
+import logging
+import os
+from abc import ABC, abstractmethod
+from typing import Awaitable, Callable, Dict, Optional, Set
+
+from src.sc_chat.core.config import settings
+from src.sc_chat.utils.common.serialization import dumps, loads
+
+logger = logging.getLogger(__name__)
+
+RoomHandler = Callable[[int, dict], Awaitable[None]]
+ResetHandler = Callable[[], None]
+
+# Frames on the Unix socket are newline delimited JSON objects:
+#   {"op": "sub", "room": 1}
+#   {"op": "unsub", "room": 1}
+#   {"op": "pub", "room": 1, "msg": {...}}
+STREAM_LIMIT = 16 * 1024 * 1024
+BROKER_MAX_CLIENT_BUFFER = 64 * 1024 * 1024
+RECONNECT_DELAY_SECONDS = 0.5
+
+
+class PubSubBackend(ABC):
+    """
+    Room fan-out backend behind ConnectionManager.broadcast_to_room.
+
+    A backend connects one process (a "node") to every other node serving
+    the same rooms. ``publish`` forwards a room message to the other nodes
+    subscribed to that room; messages published elsewhere are handed to the
+    registered handler, which delivers them to the local sockets.
+    """
+
+    def __init__(self):
+        self._handler: Optional[RoomHandler] = None
+        self._reset_handler: Optional[ResetHandler] = None
+        self.rooms: Set[int] = set()
+
+    def set_handler(self, handler: RoomHandler):
+        """Register the coroutine that delivers remote messages locally."""
+        self._handler = handler
+
+    def set_reset_handler(self, handler: ResetHandler):
+        """Register a callback for when remote messages may have been missed."""
+        self._reset_handler = handler
+
+    def covers(self, room_id: int) -> bool:
+        """Whether every message published to the room reaches this node."""
+        return room_id in self.rooms
+
+    def _reset(self):
+        if self._reset_handler is not None:
+            self._reset_handler()
+
+    async def start(self):
+        """Start the backend."""
+
+    async def stop(self):
+        """Stop the backend and release its resources."""
+
+    def subscribe(self, room_id: int):
+        """Start receiving messages published to a room by other nodes."""
+        self.rooms.add(room_id)
+
+    def unsubscribe(self, room_id: int):
+        """Stop receiving messages for a room."""
+        self.rooms.discard(room_id)
+
+    @abstractmethod
+    async def publish(self, room_id: int, message: dict):
+        """Forward a message to the other nodes subscribed to the room."""
+
+    async def _dispatch(self, room_id: int, message: dict):
+        if self._handler is None or room_id not in self.rooms:
+            return
+        try:
+            await self._handler(room_id, message)
+        except Exception:
+            logger.exception("Error delivering message for room %s", room_id)
+
+
+class InMemoryBroker:
+    """Process-local broker; every InMemoryPubSub node attached to it is a peer."""
+
+    def __init__(self):
+        self.nodes: Set["InMemoryPubSub"] = set()
+        self.rooms: Dict[int, Set["InMemoryPubSub"]] = {}
+
+
+default_broker = InMemoryBroker()
+
+
+class InMemoryPubSub(PubSubBackend):
+    """
+    In-process backend.
+
+    With the default broker and a single ConnectionManager there are no
+    peers, so publishing is free. Several managers can share a broker to
+    simulate multiple workers in one process.
+    """
+
+    def __init__(self, broker: Optional[InMemoryBroker] = None):
+        super().__init__()
+        self.broker = broker or default_broker
+        self.broker.nodes.add(self)
+
+    def covers(self, room_id: int) -> bool:
+        # A lone node publishes every message itself
+        return self.broker.nodes == {self} or room_id in self.rooms
+
+    def subscribe(self, room_id: int):
+        super().subscribe(room_id)
+        self.broker.rooms.setdefault(room_id, set()).add(self)
+
+    def unsubscribe(self, room_id: int):
+        super().unsubscribe(room_id)
+        nodes = self.broker.rooms.get(room_id)
+        if nodes is not None:
+            nodes.discard(self)
+            if not nodes:
+                del self.broker.rooms[room_id]
+
+    async def stop(self):
+        for room_id in list(self.rooms):
+            self.unsubscribe(room_id)
+        self.broker.nodes.discard(self)
+
+    async def publish(self, room_id: int, message: dict):
+        for node in list(self.broker.rooms.get(room_id, ())):
+            if node is not self:
+                await node._dispatch(room_id, message)
+
+
+class UnixSocketBroker:
+    """
+    Fan-out broker listening on a Unix domain socket.
+
+    Each client is a worker process. The broker tracks which rooms every
+    client subscribed to and forwards published frames, untouched, to the
+    other subscribers of that room.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.rooms: Dict[int, Set[asyncio.StreamWriter]] = {}
+        self.clients: Set[asyncio.StreamWriter] = set()
+        self._server: Optional[asyncio.AbstractServer] = None
+
+    async def start(self):
+        if os.path.exists(self.path):
+            os.unlink(self.path)
+        self._server = await asyncio.start_unix_server(
+            self._handle_client, path=self.path, limit=STREAM_LIMIT
+        )
+
+    async def stop(self):
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+        for writer in self.clients:
+            writer.close()
+        self.clients.clear()
+        self.rooms.clear()
+
+    async def serve_forever(self):
+        await self.start()
+        assert self._server is not None
+        async with self._server:
+            await self._server.serve_forever()
+
+    async def _handle_client(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ):
+        subscriptions: Set[int] = set()
+        self.clients.add(writer)
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                try:
+                    frame = loads(line)
+                    op = frame["op"]
+                    room_id = int(frame["room"])
+                except (ValueError, KeyError, TypeError):
+                    continue
+
+                if op == "pub":
+                    self._forward(room_id, line, writer)
+                elif op == "sub":
+                    subscriptions.add(room_id)
+                    self.rooms.setdefault(room_id, set()).add(writer)
+                elif op == "unsub":
+                    subscriptions.discard(room_id)
+                    self._remove(room_id, writer)
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        except asyncio.CancelledError:
+            # The broker or its event loop is shutting down
+            pass
+        finally:
+            for room_id in subscriptions:
+                self._remove(room_id, writer)
+            self.clients.discard(writer)
+            writer.close()
+
+    def _forward(self, room_id: int, line: bytes, sender: asyncio.StreamWriter):
+        for writer in list(self.rooms.get(room_id, ())):
+            if writer is sender:
+                continue
+            if writer.transport.get_write_buffer_size() > BROKER_MAX_CLIENT_BUFFER:
+                # The worker stopped reading; drop it and let it reconnect.
+                logger.warning("Dropping pub/sub client that fell behind")
+                writer.close()
+                for subscribers in self.rooms.values():
+                    subscribers.discard(writer)
+                continue
+            writer.write(line)
+
+    def _remove(self, room_id: int, writer: asyncio.StreamWriter):
+        writers = self.rooms.get(room_id)
+        if writers is not None:
+            writers.discard(writer)
+            if not writers:
+                del self.rooms[room_id]
+
+
+class UnixSocketPubSub(PubSubBackend):
+    """
+    Multi-process backend using a local Unix socket broker.
+
+    Workers connect to the broker at ``path``. If no broker is running, the
+    first worker to take the lock file next to the socket hosts it; when
+    that worker exits the others reconnect and one of them takes over.
+    """
+
+    def __init__(self, path: str):
+        super().__init__()
+        self.path = path
+        self._writer: Optional[asyncio.StreamWriter] = None
+        self._reader_task: Optional[asyncio.Task] = None
+        self._broker: Optional[UnixSocketBroker] = None
+        self._lock_fd: Optional[int] = None
+        self._stopping = False
+
+    async def start(self):
+        self._stopping = False
+        await self._connect()
+
+    async def stop(self):
+        self._stopping = True
+        if self._reader_task is not None:
+            self._reader_task.cancel()
+            self._reader_task = None
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+        if self._broker is not None:
+            await self._broker.stop()
+            self._broker = None
+        if self._lock_fd is not None:
+            os.close(self._lock_fd)
+            self._lock_fd = None
+
+    def subscribe(self, room_id: int):
+        super().subscribe(room_id)
+        self._send({"op": "sub", "room": room_id})
+
+    def unsubscribe(self, room_id: int):
+        super().unsubscribe(room_id)
+        self._send({"op": "unsub", "room": room_id})
+
+    async def publish(self, room_id: int, message: dict):
+        writer = self._writer
+        if writer is None:
+            return
+        self._send({"op": "pub", "room": room_id, "msg": message})
+        try:
+            await writer.drain()
+        except ConnectionError as e:
+            logger.warning("Error publishing to room %s: %s", room_id, e)
+
+    def _send(self, frame: dict):
+        if self._writer is None or self._writer.is_closing():
+            return
+        self._writer.write(dumps(frame) + b"\n")
+
+    def _try_host_broker(self) -> bool:
+        if self._lock_fd is not None:
+            return True
+        fd = os.open(self.path + ".lock", os.O_CREAT | os.O_RDWR, 0o600)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            os.close(fd)
+            return False
+        self._lock_fd = fd
+        return True
+
+    async def _connect(self):
+        while True:
+            try:
+                reader, writer = await asyncio.open_unix_connection(
+                    self.path, limit=STREAM_LIMIT
+                )
+                break
+            except (FileNotFoundError, ConnectionRefusedError):
+                if self._broker is None and self._try_host_broker():
+                    self._broker = UnixSocketBroker(self.path)
+                    await self._broker.start()
+                    logger.info("Hosting pub/sub broker on %s", self.path)
+                    continue
+                await asyncio.sleep(RECONNECT_DELAY_SECONDS)
+
+        self._writer = writer
+        # Messages published while disconnected were lost
+        self._reset()
+        for room_id in self.rooms:
+            self._send({"op": "sub", "room": room_id})
+        self._reader_task = asyncio.create_task(self._read_loop(reader))
+
+    async def _read_loop(self, reader: asyncio.StreamReader):
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                try:
+                    frame = loads(line)
+                    room_id = int(frame["room"])
+                    message = frame["msg"]
+                except (ValueError, KeyError, TypeError):
+                    continue
+                await self._dispatch(room_id, message)
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+
+        if self._stopping:
+            return
+        logger.warning("Lost connection to pub/sub broker, reconnecting")
+        self._writer = None
+        await asyncio.sleep(RECONNECT_DELAY_SECONDS)
+        await self._connect()
+
+
+def create_pubsub_backend() -> PubSubBackend:
+    """Build the backend selected by ``settings.pubsub_backend``."""
+    if settings.pubsub_backend == "memory":
+        return InMemoryPubSub()
+    if settings.pubsub_backend == "unix":
+        return UnixSocketPubSub(settings.pubsub_socket_path)
+    raise ValueError(f"Unknown pub/sub backend: {settings.pubsub_backend}")
+
+
+if __name__ == "__main__":
+    # Run a standalone broker instead of letting a worker host it.
+    asyncio.run(UnixSocketBroker(settings.pubsub_socket_path).serve_forever())
@@ -0,0 +1,84 @@
+import asyncio
+
+from sqlalchemy import update
+
+from src.sc_chat.core.config import settings
+from src.sc_chat.database.base import SessionLocal, async_session_maker
+from src.sc_chat.models.message import Message
+from src.sc_chat.models.user import User
+from src.sc_chat.repository.chat_repository import (
+    AsyncChatRepository,
+    ChatRepository,
+    message_to_payload,
+)
+
+
+def rename(user_id, username):
+    with SessionLocal() as session:
+        session.execute(
+            update(User).where(User.id == user_id).values(username=username)
+        )
+        session.commit()
+
+
+async def history(room_id):
+    """The room's history as both repository read paths build it."""
+    async with async_session_maker() as session:
+        repository = AsyncChatRepository(session)
+        payloads, _ = await repository.get_recent_payloads(room_id)
+        messages, _ = await repository.get_recent_messages(room_id)
+        return payloads, [message_to_payload(message) for message in messages]
+
+
+def usernames(payloads):
+    return [payload["username"] for payload in payloads]
+
+
+def test_new_messages_snapshot_their_authors_username(seed):
+    user_id, room_id = seed
+
+    async def create():
+        async with async_session_maker() as session:
+            repository = AsyncChatRepository(session)
+            return await repository.create_message("async", user_id, room_id)
+
+    created = asyncio.run(create())
+    with SessionLocal() as session:
+        created_sync = ChatRepository(session).create_message("sync", user_id, room_id)
+
+    assert created.author_username == "alice"
+    assert created_sync.author_username == "alice"
+
+
+def test_history_keeps_the_name_the_author_had(seed):
+    user_id, room_id = seed
+    with SessionLocal() as session:
+        ChatRepository(session).create_message("hello", user_id, room_id)
+    rename(user_id, "alicia")
+
+    payloads, from_messages = asyncio.run(history(room_id))
+
+    assert usernames(payloads) == usernames(from_messages) == ["alice"]
+
+
+def test_without_the_snapshot_history_joins_the_current_name(seed, monkeypatch):
+    user_id, room_id = seed
+    with SessionLocal() as session:
+        ChatRepository(session).create_message("hello", user_id, room_id)
+    rename(user_id, "alicia")
+    monkeypatch.setattr(settings, "message_author_snapshot", False)
+
+    payloads, from_messages = asyncio.run(history(room_id))
+
+    assert usernames(payloads) == usernames(from_messages) == ["alicia"]
+
+
+def test_messages_without_a_snapshot_fall_back_to_their_user(seed):
+    user_id, room_id = seed
+    with SessionLocal() as session:
+        session.add(Message(content="old", user_id=user_id, room_id=room_id))
+        session.commit()
+        messages, _ = ChatRepository(session).get_recent_messages(room_id)
+        payloads = [message_to_payload(message) for message in messages]
+
+    assert usernames(payloads) == ["alice"]
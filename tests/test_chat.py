@@ -0,0 +1,104 @@
+import asyncio
+import json
+
+import pytest
+
+from src.sc_chat.core.config import settings
+from src.sc_chat.database.base import SessionLocal
+from src.sc_chat.models.message import Message
+from src.sc_chat.repository.message_cache import message_cache
+from src.sc_chat.security.identity_cache import UserIdentity
+from src.sc_chat.utils.common.enum import UserRoleEnum
+from src.sc_chat.websocket.chat import send_message_history
+from src.sc_chat.websocket.connection_manager import manager
+
+
+class RecordingWebSocket:
+    def __init__(self):
+        self.frames = []
+
+    async def accept(self, subprotocol=None):
+        pass
+
+    async def send_text(self, data):
+        self.frames.append(json.loads(data))
+
+
+@pytest.fixture
+def room_with_messages(seed, monkeypatch):
+    """A room holding seven messages, sent in history frames of three."""
+    user_id, room_id = seed
+    with SessionLocal() as session:
+        session.add_all(
+            Message(content=f"m{n}", user_id=user_id, room_id=room_id) for n in range(7)
+        )
+        session.commit()
+    monkeypatch.setattr(settings, "history_page_size", 3)
+    message_cache.clear()
+    yield user_id, room_id
+    message_cache.clear()
+
+
+def fetch_history(user_id, room_id, limit, cursor=None):
+    """Run send_message_history on a connected socket; return its frames."""
+    websocket = RecordingWebSocket()
+    user = UserIdentity(
+        id=user_id,
+        email="alice@example.com",
+        username="alice",
+        role=UserRoleEnum.USER,
+        is_active=True,
+    )
+
+    async def run():
+        await manager.connect(websocket, user, room_id)
+        try:
+            sent = await send_message_history(
+                websocket, room_id, limit, cursor, request_id="r1"
+            )
+            await manager.wait_for_outbox(websocket, 0)
+            await asyncio.sleep(0)
+        finally:
+            manager.disconnect(websocket)
+        return sent
+
+    assert asyncio.run(run())
+    return [frame["data"] for frame in websocket.frames]
+
+
+def contents(frame):
+    return [message["content"] for message in frame["messages"]]
+
+
+def test_history_is_paged_with_only_the_last_frame_final(room_with_messages):
+    frames = fetch_history(*room_with_messages, limit=50)
+
+    assert [contents(frame) for frame in frames] == [
+        ["m4", "m5", "m6"],
+        ["m1", "m2", "m3"],
+        ["m0"],
+    ]
+    assert [frame["final"] for frame in frames] == [False, False, True]
+    assert [frame["has_more"] for frame in frames] == [True, True, False]
+    # Each frame points at its oldest message, the last one at nothing
+    assert [frame["next_cursor"] for frame in frames] == [
+        frames[0]["messages"][0]["id"],
+        frames[1]["messages"][0]["id"],
+        None,
+    ]
+    assert {frame["request_id"] for frame in frames} == {"r1"}
+
+
+def test_history_stops_at_the_limit_with_a_cursor_to_continue(room_with_messages):
+    frames = fetch_history(*room_with_messages, limit=4)
+
+    assert [contents(frame) for frame in frames] == [["m4", "m5", "m6"], ["m3"]]
+    assert [frame["final"] for frame in frames] == [False, True]
+    last = frames[-1]
+    assert last["has_more"]
+    assert last["next_cursor"] == last["messages"][0]["id"]
+
+    user_id, room_id = room_with_messages
+    frames = fetch_history(user_id, room_id, limit=50, cursor=last["next_cursor"])
+    assert [contents(frame) for frame in frames] == [["m0", "m1", "m2"]]
+    assert frames[0]["final"]
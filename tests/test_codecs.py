@@ -0,0 +1,110 @@
+from types import SimpleNamespace
+
+import pytest
+
+from src.sc_chat.utils.common.serialization import dumps
+from src.sc_chat.websocket.codecs import (
+    CODECS,
+    JSON_CODEC,
+    CborCodec,
+    DeflateJsonCodec,
+    MAX_INFLATED_BYTES,
+    FrameDecodeError,
+    negotiate_codec,
+)
+
+MESSAGE = {"type": "message", "data": {"id": 1, "content": "héllo"}}
+
+
+def websocket(query=None, subprotocols=None):
+    """The parts of a WebSocket that negotiate_codec looks at."""
+    return SimpleNamespace(
+        query_params=query or {}, scope={"subprotocols": subprotocols or []}
+    )
+
+
+def test_json_is_the_default():
+    assert negotiate_codec(websocket()) == (JSON_CODEC, None)
+
+
+def test_query_parameter_wins_over_subprotocols():
+    codec, subprotocol = negotiate_codec(websocket({"codec": "json-deflate"}, ["json"]))
+
+    assert codec is CODECS["json-deflate"]
+    assert subprotocol is None
+
+
+def test_unknown_query_codec_is_refused():
+    assert negotiate_codec(websocket({"codec": "xml"})) == (None, None)
+
+
+def test_first_known_subprotocol_is_accepted():
+    codec, subprotocol = negotiate_codec(
+        websocket(subprotocols=["chat.v2", "json-deflate", "json"])
+    )
+
+    assert codec is CODECS["json-deflate"]
+    assert subprotocol == "json-deflate"
+
+
+def test_unknown_subprotocols_fall_back_to_json():
+    assert negotiate_codec(websocket(subprotocols=["chat.v2"])) == (JSON_CODEC, None)
+
+
+def test_json_codec_reuses_the_json_encoding():
+    json_bytes = dumps(MESSAGE)
+
+    assert JSON_CODEC.encode(MESSAGE, json_bytes) == json_bytes.decode()
+    assert JSON_CODEC.decode(json_bytes.decode()) == MESSAGE
+
+
+def test_deflate_round_trip_and_plain_text_frames():
+    codec = DeflateJsonCodec()
+    frame = codec.encode(MESSAGE, dumps(MESSAGE))
+
+    assert isinstance(frame, bytes)
+    assert codec.decode(frame) == MESSAGE
+    assert codec.decode(codec.encode_json(dumps(MESSAGE).decode())) == MESSAGE
+    # Clients may keep sending uncompressed JSON text
+    assert codec.decode(dumps(MESSAGE).decode()) == MESSAGE
+    with pytest.raises(FrameDecodeError):
+        codec.decode(b"not deflate")
+
+
+def test_deflate_rejects_frames_that_inflate_past_the_limit():
+    codec = DeflateJsonCodec()
+    bomb = codec.encode_json(b'"' + b"a" * (MAX_INFLATED_BYTES + 1) + b'"')
+    assert len(bomb) < MAX_INFLATED_BYTES // 100
+
+    with pytest.raises(FrameDecodeError, match="too large"):
+        codec.decode(bomb)
+    # A frame just under the limit still decodes
+    fits = codec.encode_json(b'"' + b"a" * (MAX_INFLATED_BYTES - 2) + b'"')
+    assert len(codec.decode(fits)) == MAX_INFLATED_BYTES - 2
+
+
+def test_deflate_rejects_truncated_frames():
+    codec = DeflateJsonCodec()
+    frame = codec.encode(MESSAGE, dumps(MESSAGE))
+
+    with pytest.raises(FrameDecodeError, match="Truncated"):
+        codec.decode(frame[:-2])
+
+
+def test_cbor_round_trip():
+    pytest.importorskip("cbor2")
+    codec = CborCodec()
+
+    assert codec.decode(codec.encode(MESSAGE, dumps(MESSAGE))) == MESSAGE
+    assert codec.decode(codec.encode_json(dumps(MESSAGE))) == MESSAGE
+    with pytest.raises(FrameDecodeError):
+        codec.decode(dumps(MESSAGE).decode())
+
+
+def test_msgpack_round_trip():
+    pytest.importorskip("msgpack")
+    codec = CODECS["msgpack"]
+
+    assert codec.decode(codec.encode(MESSAGE, dumps(MESSAGE))) == MESSAGE
+    with pytest.raises(FrameDecodeError):
+        codec.decode(dumps(MESSAGE).decode())
@@ -0,0 +1,195 @@
+import asyncio
+
+from fastapi import status
+
+from src.sc_chat.core.config import settings
+from src.sc_chat.security.identity_cache import UserIdentity
+from src.sc_chat.utils.common.enum import UserRoleEnum
+from src.sc_chat.websocket.connection_manager import ConnectionManager
+from src.sc_chat.websocket.pubsub import InMemoryBroker, InMemoryPubSub
+
+ROOM_ID = 1
+
+
+class FakeWebSocket:
+    """A socket whose sends block until ``release`` is set."""
+
+    def __init__(self):
+        self.sent = []
+        self.closed_with = None
+        self.release = asyncio.Event()
+
+    async def accept(self, subprotocol=None):
+        pass
+
+    async def send_text(self, data):
+        await self.release.wait()
+        self.sent.append(data)
+
+    async def send_bytes(self, data):
+        await self.release.wait()
+        self.sent.append(data)
+
+    async def close(self, code=1000, reason=""):
+        self.closed_with = code
+
+
+def identity(user_id):
+    return UserIdentity(
+        id=user_id,
+        email=f"user{user_id}@example.com",
+        username=f"user{user_id}",
+        role=UserRoleEnum.USER,
+        is_active=True,
+    )
+
+
+def new_manager():
+    return ConnectionManager(InMemoryPubSub(InMemoryBroker()))
+
+
+def chat_message(n):
+    return {"type": "message", "data": {"id": n, "content": f"m{n}"}}
+
+
+async def connect_slow_and_fast(manager):
+    slow, fast = FakeWebSocket(), FakeWebSocket()
+    fast.release.set()
+    await manager.connect(slow, identity(1), ROOM_ID)
+    await manager.connect(fast, identity(2), ROOM_ID)
+    # Let the writers start; the slow one then blocks on its first frame
+    await asyncio.sleep(0)
+    return slow, fast
+
+
+async def broadcast(manager, messages):
+    for message in messages:
+        await manager.broadcast_to_room(message, ROOM_ID)
+        await asyncio.sleep(0)
+
+
+def test_drop_policy_skips_frames_for_a_full_outbox(monkeypatch):
+    monkeypatch.setattr(settings, "ws_send_queue_size", 2)
+    monkeypatch.setattr(settings, "ws_slow_consumer_policy", "drop")
+
+    async def run():
+        manager = new_manager()
+        slow, fast = await connect_slow_and_fast(manager)
+        await broadcast(manager, [chat_message(n) for n in range(4)])
+        return manager, slow, fast
+
+    manager, slow, fast = asyncio.run(run())
+
+    assert slow in manager.connection_map
+    assert slow.closed_with is None
+    # One frame is being sent and two are queued
+    assert manager.fanout_latency.counters[ROOM_ID]["dropped"] == 1
+    # The fast reader is not held back by the slow one
+    assert len(fast.sent) == 4
+
+
+def test_disconnect_policy_closes_a_slow_consumer(monkeypatch):
+    monkeypatch.setattr(settings, "ws_send_queue_size", 2)
+    monkeypatch.setattr(settings, "ws_slow_consumer_policy", "disconnect")
+
+    async def run():
+        manager = new_manager()
+        slow, fast = await connect_slow_and_fast(manager)
+        await broadcast(manager, [chat_message(n) for n in range(4)])
+        return manager, slow, fast
+
+    manager, slow, fast = asyncio.run(run())
+
+    assert slow not in manager.connection_map
+    assert slow.closed_with == status.WS_1013_TRY_AGAIN_LATER
+    assert fast in manager.connection_map
+    assert manager.get_connection_count(ROOM_ID) == 1
+    assert len(fast.sent) == 4
+
+
+def test_ephemeral_events_need_half_the_outbox_free(monkeypatch):
+    monkeypatch.setattr(settings, "ws_send_queue_size", 4)
+    monkeypatch.setattr(settings, "ws_slow_consumer_policy", "disconnect")
+
+    async def run():
+        manager = new_manager()
+        slow = FakeWebSocket()
+        await manager.connect(slow, identity(1), ROOM_ID)
+        await asyncio.sleep(0)
+        await broadcast(
+            manager,
+            [chat_message(n) for n in range(3)] + [{"type": "events", "data": []}],
+        )
+        return manager, slow
+
+    manager, slow = asyncio.run(run())
+
+    # Never treated as a slow consumer, only the event is skipped
+    assert slow in manager.connection_map
+    assert manager.connection_map[slow].outbox.qsize() == 2
+    assert manager.fanout_latency.counters[ROOM_ID] == {"ephemeral_dropped": 1}
+
+
+def test_users_with_several_sockets_are_listed_once():
+    async def run():
+        manager = new_manager()
+        changes = []
+        manager.add_presence_listener(changes.append)
+        first_tab, second_tab, other = FakeWebSocket(), FakeWebSocket(), FakeWebSocket()
+        await manager.connect(first_tab, identity(1), ROOM_ID)
+        await manager.connect(second_tab, identity(1), ROOM_ID)
+        await manager.connect(other, identity(2), ROOM_ID)
+
+        listed = [member.user_id for member in manager.get_room_users(ROOM_ID)]
+        counts = [member.connections for member in manager.get_room_users(ROOM_ID)]
+        manager.disconnect(first_tab)
+        after_one_tab = manager.is_user_in_room(1, ROOM_ID)
+        manager.disconnect(second_tab)
+        return manager, changes, listed, counts, after_one_tab
+
+    manager, changes, listed, counts, after_one_tab = asyncio.run(run())
+
+    assert listed == [1, 2]
+    assert counts == [2, 1]
+    assert after_one_tab is True
+    assert manager.is_user_in_room(1, ROOM_ID) is False
+    assert manager.is_user_in_room(2, ROOM_ID) is True
+    # Only joins and leaves of users change the roster, not extra tabs
+    assert changes == [ROOM_ID] * 3
+
+
+def test_the_last_disconnect_empties_the_registry():
+    async def run():
+        manager = new_manager()
+        sockets = [FakeWebSocket() for _ in range(3)]
+        for user_id, websocket in enumerate(sockets, 1):
+            await manager.connect(websocket, identity(user_id), ROOM_ID + user_id % 2)
+        connected = manager.memory_footprint()
+        for websocket in sockets:
+            manager.disconnect(websocket)
+        return manager, connected
+
+    manager, connected = asyncio.run(run())
+
+    assert (connected["connections"], connected["rooms"]) == (3, 2)
+    assert connected["bytes_per_connection"] > 0
+    assert manager.connection_map == {}
+    assert manager.active_connections == {}
+    assert manager.room_members == {}
+    assert manager.get_room_users(ROOM_ID) == []
+    assert manager.memory_footprint()["connections"] == 0
+
+
+def test_connection_records_have_no_instance_dict():
+    async def run():
+        manager = new_manager()
+        websocket = FakeWebSocket()
+        await manager.connect(websocket, identity(1), ROOM_ID)
+        connection = manager.connection_map[websocket]
+        manager.disconnect(websocket)
+        return connection
+
+    connection = asyncio.run(run())
+
+    assert not hasattr(connection, "__dict__")
+    assert connection.username == "user1"
@@ -0,0 +1,148 @@
+import asyncio
+import json
+
+from src.sc_chat.security.identity_cache import UserIdentity
+from src.sc_chat.utils.common.enum import UserRoleEnum
+from src.sc_chat.websocket.connection_manager import ConnectionManager
+from src.sc_chat.websocket.ephemeral import EphemeralEvents
+from src.sc_chat.websocket.pubsub import InMemoryBroker, InMemoryPubSub
+
+ROOM_ID = 1
+
+
+class RecordingWebSocket:
+    def __init__(self):
+        self.frames = []
+
+    async def accept(self, subprotocol=None):
+        pass
+
+    async def send_text(self, data):
+        self.frames.append(json.loads(data))
+
+    def events(self):
+        return [frame["data"]["events"] for frame in self.frames]
+
+
+def identity(user_id):
+    return UserIdentity(
+        id=user_id,
+        email=f"user{user_id}@example.com",
+        username=f"user{user_id}",
+        role=UserRoleEnum.USER,
+        is_active=True,
+    )
+
+
+async def watched_room(**options):
+    """EphemeralEvents on a fresh manager, and a socket watching ROOM_ID."""
+    manager = ConnectionManager(InMemoryPubSub(InMemoryBroker()))
+    watcher = RecordingWebSocket()
+    await manager.connect(watcher, identity(99), ROOM_ID)
+    options.setdefault("flush_interval_ms", 20)
+    options.setdefault("min_interval_ms", 200)
+    return EphemeralEvents(manager, **options), watcher
+
+
+def submit(events, user_id, event_type, **fields):
+    return events.submit(ROOM_ID, user_id, f"user{user_id}", event_type, fields)
+
+
+def test_typing_is_coalesced_to_the_latest_state():
+    async def run():
+        events, watcher = await watched_room()
+        submit(events, 1, "typing", is_typing=True)
+        submit(events, 1, "typing", is_typing=False)
+        submit(events, 1, "typing", is_typing=True)
+        submit(events, 2, "typing", is_typing=True)
+        await asyncio.sleep(0.06)
+        events.stop()
+        return events, watcher
+
+    events, watcher = asyncio.run(run())
+
+    assert watcher.events() == [
+        [
+            {"type": "typing", "user_id": 1, "username": "user1", "is_typing": True},
+            {"type": "typing", "user_id": 2, "username": "user2", "is_typing": True},
+        ]
+    ]
+    assert events.coalesced == 2
+
+
+def test_receipts_and_reactions_are_merged_per_target_message():
+    async def run():
+        events, watcher = await watched_room()
+        submit(events, 1, "read_receipt", message_id=10)
+        submit(events, 1, "read_receipt", message_id=11)
+        submit(events, 1, "reaction", message_id=10, emoji="👍")
+        submit(events, 1, "reaction", message_id=10, emoji="🎉")
+        await asyncio.sleep(0.06)
+        events.stop()
+        return watcher
+
+    watcher = asyncio.run(run())
+
+    [frame] = watcher.events()
+    assert [
+        (event["type"], event["message_id"], event.get("emoji")) for event in frame
+    ] == [
+        ("read_receipt", 10, None),
+        ("read_receipt", 11, None),
+        ("reaction", 10, "🎉"),
+    ]
+
+
+def test_each_key_is_sent_at_most_once_per_min_interval():
+    async def run():
+        events, watcher = await watched_room()
+        submit(events, 1, "typing", is_typing=True)
+        await asyncio.sleep(0.06)
+        first = len(watcher.frames)
+
+        # Other keys go out with the next flush; this one waits out its interval
+        submit(events, 1, "typing", is_typing=False)
+        submit(events, 2, "typing", is_typing=True)
+        await asyncio.sleep(0.06)
+        second = watcher.events()[1:]
+
+        await asyncio.sleep(0.2)
+        events.stop()
+        return first, second, watcher.events()[2:], events
+
+    first, second, third, events = asyncio.run(run())
+
+    assert first == 1
+    assert [[event["user_id"] for event in frame] for frame in second] == [[2]]
+    assert third == [
+        [{"type": "typing", "user_id": 1, "username": "user1", "is_typing": False}]
+    ]
+    assert events.pending == {}
+    assert events.pending_per_user == {}
+
+
+def test_new_keys_past_the_pending_limits_are_dropped():
+    async def run():
+        events, watcher = await watched_room(
+            max_pending_per_user=2, max_pending_per_room=3
+        )
+        accepted = [
+            submit(events, 1, "read_receipt", message_id=1),
+            submit(events, 1, "read_receipt", message_id=2),
+            submit(events, 1, "read_receipt", message_id=3),
+            # Updating a pending key is always allowed
+            submit(events, 1, "read_receipt", message_id=2),
+            submit(events, 2, "read_receipt", message_id=1),
+            submit(events, 3, "read_receipt", message_id=1),
+        ]
+        await asyncio.sleep(0.06)
+        # The limits apply to pending events only
+        accepted.append(submit(events, 1, "read_receipt", message_id=3))
+        events.stop()
+        return accepted, events, watcher
+
+    accepted, events, watcher = asyncio.run(run())
+
+    assert accepted == [True, True, False, True, True, False, True]
+    assert events.dropped == 2
+    assert [len(frame) for frame in watcher.events()] == [3]
@@ -0,0 +1,105 @@
+import gzip
+import json
+
+import pytest
+
+from src.sc_chat.core.config import settings
+from src.sc_chat.database.archive import message_archive
+from src.sc_chat.database.base import SessionLocal
+from src.sc_chat.models import Room
+from src.sc_chat.models.message import Message
+from src.sc_chat.utils.common.enum import UserRoleEnum
+
+
+@pytest.fixture
+def exported_room(seed, tmp_path, monkeypatch):
+    """
+    A room with messages 1-3 archived and 3, 10 and 12 live.
+
+    Message 3 is in both, as while its partition is archived but not yet
+    dropped. Another room's messages are mixed in with both.
+    """
+    user_id, room_id = seed
+    monkeypatch.setattr(message_archive, "directory", str(tmp_path))
+    monkeypatch.setattr(settings, "export_batch_size", 2)
+
+    with SessionLocal() as session:
+        other = Room(name="other")
+        session.add(other)
+        session.flush()
+        other_id = other.id
+        session.add_all(
+            Message(
+                id=message_id,
+                content=f"m{message_id}",
+                user_id=user_id,
+                author_username="alice",
+                room_id=room,
+            )
+            for room, message_id in [
+                (room_id, 3),
+                (room_id, 10),
+                (other_id, 11),
+                (room_id, 12),
+            ]
+        )
+        session.commit()
+
+    message_archive.write_partition(
+        0,
+        4,
+        [
+            {
+                "id": message_id,
+                "content": f"m{message_id}",
+                "user_id": user_id,
+                "username": "alice",
+                "room_id": room,
+                "created_at": "2026-01-01T00:00:00+00:00",
+            }
+            for room, message_id in [
+                (room_id, 1),
+                (room_id, 2),
+                (room_id, 3),
+                (other_id, 4),
+            ]
+        ],
+    )
+    return room_id
+
+
+def test_export_streams_archived_then_live_messages_in_order(
+    client, auth_headers, exported_room
+):
+    response = client.get(
+        f"/api/v1/rooms/{exported_room}/export",
+        headers=auth_headers(UserRoleEnum.ADMIN),
+    )
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert [line["id"] for line in lines] == [1, 2, 3, 10, 12]
+    assert {line["room_id"] for line in lines} == {exported_room}
+    assert {line["username"] for line in lines} == {"alice"}
+
+
+def test_gzip_export_decompresses_to_the_same_lines(
+    client, auth_headers, exported_room
+):
+    headers = auth_headers(UserRoleEnum.ADMIN)
+    url = f"/api/v1/rooms/{exported_room}/export"
+
+    plain = client.get(url, headers=headers)
+    compressed = client.get(url, params={"gzip": True}, headers=headers)
+
+    assert compressed.headers["content-type"] == "application/gzip"
+    assert gzip.decompress(compressed.content) == plain.content
+
+
+def test_export_is_admin_only(client, auth_headers, exported_room):
+    response = client.get(
+        f"/api/v1/rooms/{exported_room}/export", headers=auth_headers()
+    )
+
+    assert response.status_code == 403
@@ -0,0 +1,62 @@
+import pytest
+from sqlalchemy import create_engine, exc
+from sqlalchemy.pool import QueuePool
+
+from src.sc_chat.core.config import settings
+from src.sc_chat.database.base import engine_options
+from src.sc_chat.database.pool import PoolMetrics, metered_pool_class
+from src.sc_chat.utils.common.enum import UserRoleEnum
+
+
+def test_the_public_database_check_reports_only_its_status(client):
+    response = client.get("/health/db")
+
+    assert response.status_code == 200
+    assert response.json() == {"status": "ok"}
+
+
+def test_database_details_are_admin_only(client, auth_headers):
+    anonymous = client.get("/health/db/details")
+    user = client.get("/health/db/details", headers=auth_headers())
+    admin = client.get("/health/db/details", headers=auth_headers(UserRoleEnum.ADMIN))
+
+    assert anonymous.status_code == 401
+    assert user.status_code == 403
+    assert admin.status_code == 200
+    assert set(admin.json()) == {"pools", "replication"}
+    assert set(admin.json()["pools"]) == {"sync", "async"}
+
+
+def test_pool_checkouts_and_timeouts_are_counted(tmp_path):
+    metrics = PoolMetrics()
+    metered = create_engine(
+        f"sqlite:///{tmp_path}/pool.db",
+        poolclass=metered_pool_class(QueuePool, metrics),
+        pool_size=1,
+        max_overflow=0,
+        pool_timeout=0.05,
+    )
+    try:
+        with metered.connect():
+            with pytest.raises(exc.TimeoutError):
+                metered.connect()
+        summary = metrics.summary(metered.pool)
+    finally:
+        metered.dispose()
+
+    assert (summary["checkouts"], summary["timeouts"]) == (1, 1)
+    assert (summary["size"], summary["checkedout"]) == (1, 0)
+
+
+def test_statement_timeouts_are_passed_to_each_postgres_driver(monkeypatch):
+    monkeypatch.setattr(settings, "db_statement_timeout_ms", 5000)
+    metrics = PoolMetrics()
+
+    asyncpg = engine_options("postgresql+asyncpg://db/chat", QueuePool, metrics)
+    psycopg2 = engine_options("postgresql://db/chat", QueuePool, metrics)
+    sqlite = engine_options("sqlite:///chat.db", QueuePool, metrics)
+
+    assert asyncpg["connect_args"]["server_settings"] == {"statement_timeout": "5000"}
+    assert psycopg2["connect_args"] == {"options": "-c statement_timeout=5000"}
+    assert "connect_args" not in sqlite
+    assert sqlite["pool_size"] == settings.db_pool_size
@@ -0,0 +1,168 @@
+import asyncio
+
+import pytest
+from jose import JWTError
+
+from src.sc_chat.database.base import SessionLocal
+from src.sc_chat.repository.auth_repository import AuthRepository
+from src.sc_chat.security import identity_cache as identity_cache_module
+from src.sc_chat.security.auth import jwt_service
+from src.sc_chat.security.identity_cache import (
+    IdentityCache,
+    TokenCache,
+    TTLCache,
+    UserIdentity,
+    identity_cache,
+)
+from src.sc_chat.utils.common.enum import UserRoleEnum
+from src.sc_chat.websocket.auth import authenticate_websocket
+
+
+class Clock:
+    """Stands in for the time module, advanced by hand."""
+
+    def __init__(self):
+        self.now = 1_000_000.0
+
+    def monotonic(self):
+        return self.now
+
+    def time(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(identity_cache_module, "time", clock)
+    return clock
+
+
+@pytest.fixture(autouse=True)
+def empty_identity_cache():
+    identity_cache.by_email.clear()
+    identity_cache.by_id.clear()
+    yield
+    identity_cache.by_email.clear()
+    identity_cache.by_id.clear()
+
+
+class ClosingWebSocket:
+    def __init__(self):
+        self.closed = None
+
+    async def close(self, code, reason=None):
+        self.closed = (code, reason)
+
+
+def identity(user_id=1):
+    return UserIdentity(
+        id=user_id,
+        email=f"user{user_id}@example.com",
+        username=f"user{user_id}",
+        role=UserRoleEnum.USER,
+        is_active=True,
+    )
+
+
+def test_entries_expire_after_their_ttl(clock):
+    cache: TTLCache[str] = TTLCache(10)
+    cache.set("short", "a", 5)
+    cache.set("long", "b", 60)
+    cache.set("never", "c", 0)
+
+    clock.now += 10
+
+    assert cache.get("short") is None
+    assert cache.get("long") == "b"
+    assert cache.get("never") is None
+    assert len(cache) == 1
+
+
+def test_the_least_recently_used_entry_is_evicted(clock):
+    cache: TTLCache[int] = TTLCache(2)
+    cache.set("a", 1, 60)
+    cache.set("b", 2, 60)
+    cache.get("a")
+    cache.set("c", 3, 60)
+
+    assert (cache.get("a"), cache.get("b"), cache.get("c")) == (1, None, 3)
+
+
+def test_invalidating_by_id_or_email_drops_both_keys(clock):
+    cache = IdentityCache(ttl=60)
+    first, second = cache.put(identity(1)), cache.put(identity(2))
+
+    cache.invalidate(user_id=1)
+    cache.invalidate(email=second.email)
+
+    assert cache.get_by_email(first.email) is None
+    assert cache.get_by_id(2) is None
+    assert len(cache.by_email) == len(cache.by_id) == 0
+
+
+def test_tokens_are_decoded_once_until_they_expire(clock, monkeypatch):
+    decoded = []
+
+    def decode(token):
+        decoded.append(token)
+        return {"email": "alice@example.com", "exp": clock.now + 30}
+
+    monkeypatch.setattr(jwt_service, "decode_verification_token", decode)
+    cache = TokenCache()
+
+    cache.decode("token")
+    cache.decode("token")
+    assert decoded == ["token"]
+
+    clock.now += 31
+    cache.decode("token")
+    assert decoded == ["token", "token"]
+
+
+def test_invalid_tokens_are_not_cached():
+    cache = TokenCache()
+
+    for _ in range(2):
+        with pytest.raises(JWTError):
+            cache.decode("not-a-token")
+    assert len(cache.cache) == 0
+
+
+def test_websocket_auth_reuses_the_cached_identity(seed, monkeypatch):
+    lookups = []
+    get_user_async = jwt_service.get_user_async
+
+    async def counting_get_user_async(email, db):
+        lookups.append(email)
+        return await get_user_async(email=email, db=db)
+
+    monkeypatch.setattr(jwt_service, "get_user_async", counting_get_user_async)
+    token = jwt_service.create_access_token({"email": "alice@example.com"})
+
+    async def run():
+        return [
+            await authenticate_websocket(ClosingWebSocket(), token) for _ in range(2)
+        ]
+
+    first, second = asyncio.run(run())
+
+    assert first == second
+    assert first is not None and first.username == "alice"
+    assert lookups == ["alice@example.com"]
+
+
+def test_deactivation_takes_effect_on_the_next_connection(seed):
+    token = jwt_service.create_access_token({"email": "alice@example.com"})
+    websocket = ClosingWebSocket()
+    assert asyncio.run(authenticate_websocket(websocket, token)) is not None
+
+    with SessionLocal() as session:
+        repository = AuthRepository(session)
+        user = repository.get_user_by_email("alice@example.com")
+        assert user is not None
+        repository.deactivate_user(user)
+
+    assert asyncio.run(authenticate_websocket(websocket, token)) is None
+    assert websocket.closed is not None
+    assert websocket.closed[1] == "User account is deactivated"
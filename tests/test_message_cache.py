@@ -0,0 +1,241 @@
+import asyncio
+
+from src.sc_chat.database.base import SessionLocal, async_session_maker
+from src.sc_chat.models.message import Message
+from src.sc_chat.repository import chat_repository
+from src.sc_chat.repository.chat_repository import AsyncChatRepository
+from src.sc_chat.repository.message_cache import MessageCache, message_cache
+from src.sc_chat.repository.search_index import search_index
+from src.sc_chat.security.identity_cache import UserIdentity
+from src.sc_chat.utils.common.enum import UserRoleEnum
+from src.sc_chat.utils.common.serialization import EncodedMessage
+from src.sc_chat.websocket.chat import invalidate_room_state
+from src.sc_chat.websocket.connection_manager import ConnectionManager
+from src.sc_chat.websocket.pubsub import InMemoryBroker, InMemoryPubSub
+
+ROOM_ID = 1
+
+
+def encoded(message_id, room_id=ROOM_ID):
+    return EncodedMessage(
+        {"id": message_id, "room_id": room_id, "content": f"m{message_id}"}
+    )
+
+
+def ids(messages):
+    return [message.id for message in messages]
+
+
+def filled_cache(message_ids, has_more=False, **options):
+    cache = MessageCache(**options)
+    cache.begin_fill(ROOM_ID)
+    cache.end_fill(ROOM_ID, [encoded(n) for n in message_ids], has_more)
+    return cache
+
+
+def test_unknown_room_is_a_miss():
+    cache = MessageCache()
+
+    assert cache.get(ROOM_ID, 10) is None
+    assert cache.misses == 1
+
+
+def test_latest_page_and_cursor_pages_are_hits():
+    cache = filled_cache(range(1, 11))
+
+    page, has_more = cache.get(ROOM_ID, 4)
+    assert ids(page) == [7, 8, 9, 10]
+    assert has_more
+
+    page, has_more = cache.get(ROOM_ID, 4, cursor=page[0].id)
+    assert ids(page) == [3, 4, 5, 6]
+    assert has_more
+
+    page, has_more = cache.get(ROOM_ID, 4, cursor=page[0].id)
+    assert ids(page) == [1, 2]
+    assert not has_more
+    assert cache.hits == 3
+
+
+def test_page_older_than_an_incomplete_buffer_is_a_miss():
+    cache = filled_cache(range(5, 11), has_more=True)
+
+    page, has_more = cache.get(ROOM_ID, 3, cursor=9)
+    assert ids(page) == [6, 7, 8]
+    assert has_more
+    assert cache.get(ROOM_ID, 3, cursor=7) is None
+    assert cache.misses == 1
+
+
+def test_append_extends_the_buffer_in_id_order():
+    cache = filled_cache([1, 2, 4])
+
+    cache.append(encoded(5))
+    cache.append(encoded(3))
+    cache.append(encoded(5))
+
+    page, _ = cache.get(ROOM_ID, 10)
+    assert ids(page) == [1, 2, 3, 4, 5]
+
+
+def test_append_during_a_fill_drops_the_fill():
+    cache = MessageCache()
+    cache.begin_fill(ROOM_ID)
+    cache.append(encoded(3))
+    cache.end_fill(ROOM_ID, [encoded(1), encoded(2)], False)
+
+    assert cache.get(ROOM_ID, 10) is None
+
+
+def test_full_buffer_drops_its_oldest_message():
+    cache = filled_cache(range(1, 4), room_capacity=3)
+
+    cache.append(encoded(4))
+
+    page, has_more = cache.get(ROOM_ID, 3)
+    assert ids(page) == [2, 3, 4]
+    assert has_more
+
+
+def test_rooms_not_followed_are_not_served():
+    cache = filled_cache(range(1, 4))
+    cache.follows_room = lambda room_id: False
+
+    assert cache.get(ROOM_ID, 3) is None
+    assert ROOM_ID not in cache.rooms
+
+
+def test_least_recently_used_room_is_evicted_over_budget():
+    cache = MessageCache(max_bytes=10_000)
+    for room_id in (1, 2, 3):
+        cache.begin_fill(room_id)
+        cache.end_fill(
+            room_id,
+            [encoded(n, room_id) for n in range(room_id * 10, room_id * 10 + 5)],
+            False,
+        )
+    assert list(cache.rooms) == [1, 2, 3]
+
+    cache.get(1, 1)
+    cache.max_bytes = cache.size - 1
+    cache.append(encoded(40, 3))
+
+    assert list(cache.rooms) == [3, 1]
+
+
+def test_history_pages_fill_the_cache_then_hit_it(seed):
+    user_id, room_id = seed
+    with SessionLocal() as session:
+        session.add_all(
+            Message(content=f"m{n}", user_id=user_id, room_id=room_id) for n in range(7)
+        )
+        session.commit()
+    cache = MessageCache()
+
+    async def read_pages():
+        pages = []
+        cursor = None
+        async with async_session_maker() as session:
+            repository = AsyncChatRepository(session, cache=cache)
+            while True:
+                messages, has_more = await repository.get_history_page(
+                    room_id, 3, cursor
+                )
+                pages.append([message.payload["content"] for message in messages])
+                # Pages go backwards in time: continue from the oldest message
+                cursor = messages[0].id if messages and has_more else None
+                if cursor is None:
+                    return pages
+
+    assert asyncio.run(read_pages()) == [
+        ["m4", "m5", "m6"],
+        ["m1", "m2", "m3"],
+        ["m0"],
+    ]
+    assert cache.misses == 1
+    assert cache.hits == 2
+
+    assert asyncio.run(read_pages())[0] == ["m4", "m5", "m6"]
+    assert cache.misses == 1
+
+
+class RecordingWebSocket:
+    def __init__(self):
+        self.frames = []
+
+    async def accept(self, subprotocol=None):
+        pass
+
+    async def send_text(self, data):
+        self.frames.append(data)
+
+
+def identity(user_id):
+    return UserIdentity(
+        id=user_id,
+        email=f"user{user_id}@example.com",
+        username=f"user{user_id}",
+        role=UserRoleEnum.USER,
+        is_active=True,
+    )
+
+
+def test_deletes_evict_the_room_on_other_workers(seed, monkeypatch):
+    user_id, room_id = seed
+    with SessionLocal() as session:
+        messages = [
+            Message(content=f"m{n}", user_id=user_id, room_id=room_id) for n in range(2)
+        ]
+        session.add_all(messages)
+        session.commit()
+        deleted_id, kept_id = (message.id for message in messages)
+
+    broker = InMemoryBroker()
+    here, there = (ConnectionManager(InMemoryPubSub(broker)) for _ in range(2))
+    # The other worker follows the room and caches it in the shared singletons
+    there.add_listener(invalidate_room_state)
+    monkeypatch.setattr(chat_repository, "manager", here)
+    socket = RecordingWebSocket()
+
+    async def delete():
+        await here.connect(RecordingWebSocket(), identity(user_id), room_id)
+        await there.connect(socket, identity(user_id), room_id)
+        message_cache.begin_fill(room_id)
+        message_cache.end_fill(room_id, [encoded(deleted_id, room_id)], False)
+        search_index.build(room_id, [(deleted_id, "hello"), (kept_id, "hello")])
+
+        async with async_session_maker() as session:
+            repository = AsyncChatRepository(session, cache=MessageCache())
+            assert await repository.delete_message(deleted_id, user_id)
+        await asyncio.sleep(0)
+
+    try:
+        asyncio.run(delete())
+
+        assert room_id not in message_cache.rooms
+        page, _ = search_index.search(room_id, "hello", 10)
+        assert [message_id for message_id, _ in page] == [kept_id]
+        # Invalidations are for the workers, not their sockets
+        assert socket.frames == []
+    finally:
+        message_cache.clear()
+        search_index.clear()
+
+
+def test_leaving_a_room_drops_its_state_when_no_longer_followed():
+    broker = InMemoryBroker()
+    # With a second worker on the broker, rooms are only followed while joined
+    here, _ = (ConnectionManager(InMemoryPubSub(broker)) for _ in range(2))
+    invalidated = []
+    here.add_listener(lambda room_id, message: invalidated.append((room_id, message)))
+    socket = RecordingWebSocket()
+
+    async def leave():
+        await here.connect(socket, identity(1), ROOM_ID)
+        here.disconnect(socket)
+
+    asyncio.run(leave())
+
+    assert invalidated == [
+        (ROOM_ID, {"type": "invalidate", "data": {"message_id": None}})
+    ]
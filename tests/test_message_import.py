@@ -0,0 +1,108 @@
+import io
+import json
+
+from sqlalchemy import select
+
+from src.sc_chat.database.base import SessionLocal
+from src.sc_chat.models.message import Message
+from src.sc_chat.repository.message_cache import message_cache
+from src.sc_chat.repository.message_import import MessageImporter
+from src.sc_chat.repository.search_index import search_index
+from src.sc_chat.utils.common.enum import UserRoleEnum
+from src.sc_chat.utils.common.serialization import EncodedMessage
+
+
+def ndjson(*records):
+    return io.BytesIO(
+        b"".join(
+            (record if isinstance(record, bytes) else json.dumps(record).encode())
+            + b"\n"
+            for record in records
+        )
+    )
+
+
+def test_import_resolves_users_and_counts_bad_lines(seed):
+    user_id, room_id = seed
+    source = ndjson(
+        {"username": "alice", "content": "by name"},
+        {"user_id": user_id, "content": "by id"},
+        {"username": "mallory", "content": "unknown name"},
+        {"user_id": user_id + 100, "content": "unknown id"},
+        {"user_id": str(user_id), "content": "id as text"},
+        {"username": "alice"},
+        b"not json",
+    )
+
+    stats = MessageImporter(room_id, batch_size=2).run(source)
+
+    assert (stats.rows, stats.skipped, stats.invalid) == (2, 1, 4)
+    with SessionLocal() as session:
+        rows = session.execute(
+            select(Message.content, Message.user_id, Message.author_username)
+            .where(Message.room_id == room_id)
+            .order_by(Message.id)
+        ).all()
+    assert rows == [("by name", user_id, "alice"), ("by id", user_id, "alice")]
+
+
+def test_lines_with_the_wrong_types_are_invalid(seed):
+    user_id, room_id = seed
+    source = ndjson(
+        {"username": "alice", "content": None},
+        {"username": "alice", "content": 5},
+        {"username": "alice", "content": ""},
+        {"user_id": True, "content": "bool id"},
+        {"user_id": float(user_id), "content": "float id"},
+        {"user_id": user_id, "content": "kept"},
+    )
+
+    stats = MessageImporter(room_id).run(source)
+
+    assert (stats.rows, stats.invalid) == (1, 5)
+    with SessionLocal() as session:
+        contents = session.scalars(
+            select(Message.content).where(Message.room_id == room_id)
+        ).all()
+    assert contents == ["kept"]
+
+
+def test_import_resumes_from_its_checkpoint(seed, tmp_path):
+    _, room_id = seed
+    checkpoint = str(tmp_path / "import.checkpoint")
+    records = [{"username": "alice", "content": f"m{n}"} for n in range(5)]
+
+    first = MessageImporter(room_id, batch_size=2).run(ndjson(*records[:3]), checkpoint)
+    second = MessageImporter(room_id, batch_size=2).run(ndjson(*records), checkpoint)
+
+    assert first.rows == 3
+    assert second.rows == 5
+    with SessionLocal() as session:
+        contents = session.scalars(
+            select(Message.content).where(Message.room_id == room_id)
+        ).all()
+    assert sorted(contents) == [f"m{n}" for n in range(5)]
+
+
+def test_upload_drops_cached_history_once_written(seed, client, auth_headers):
+    _, room_id = seed
+    message_cache.begin_fill(room_id)
+    message_cache.end_fill(
+        room_id, [EncodedMessage({"id": 1, "room_id": room_id})], False
+    )
+    search_index.build(room_id, [])
+
+    try:
+        response = client.post(
+            f"/api/v1/rooms/{room_id}/import",
+            files={"file": ndjson({"username": "alice", "content": "imported"})},
+            headers=auth_headers(UserRoleEnum.ADMIN),
+        )
+
+        assert response.status_code == 200
+        assert response.json()["rows"] == 1
+        assert room_id not in message_cache.rooms
+        assert not search_index.is_built(room_id)
+    finally:
+        message_cache.clear()
+        search_index.clear()
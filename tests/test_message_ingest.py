@@ -0,0 +1,173 @@
+import asyncio
+
+import pytest
+from sqlalchemy import func, select
+
+from src.sc_chat.database.base import SessionLocal
+from src.sc_chat.models.message import Message
+from src.sc_chat.repository.message_ingest import MessageIngestor
+
+
+def stored_contents():
+    with SessionLocal() as session:
+        return session.scalars(select(Message.content).order_by(Message.id)).all()
+
+
+def recording_ingestor(**options):
+    """An ingestor that records the size of every INSERT it runs."""
+    ingestor = MessageIngestor(max_delay_ms=50, **options)
+    inserts = []
+    insert = ingestor._insert
+
+    async def recording_insert(batch):
+        inserts.append(len(batch))
+        return await insert(batch)
+
+    ingestor._insert = recording_insert  # type: ignore[method-assign]
+    return ingestor, inserts
+
+
+def test_messages_queued_together_are_one_insert(seed):
+    user_id, room_id = seed
+    ingestor, inserts = recording_ingestor()
+    delivered = []
+
+    async def listener(messages):
+        delivered.append(messages)
+
+    ingestor.add_listener(listener)
+
+    async def run():
+        await ingestor.start()
+        futures = [
+            await ingestor.submit(f"hello {n}", user_id, "alice", room_id)
+            for n in range(5)
+        ]
+        results = await asyncio.gather(*futures)
+        await ingestor.stop()
+        return results
+
+    results = asyncio.run(run())
+
+    assert inserts == [5]
+    assert [message["content"] for message in results] == [
+        f"hello {n}" for n in range(5)
+    ]
+    assert [message["id"] for message in results] == sorted(
+        message["id"] for message in results
+    )
+    assert delivered == [results]
+    assert stored_contents() == [f"hello {n}" for n in range(5)]
+
+
+def test_batches_are_capped_at_batch_size(seed):
+    user_id, room_id = seed
+    ingestor, inserts = recording_ingestor(batch_size=2)
+
+    async def run():
+        await ingestor.start()
+        futures = [
+            await ingestor.submit(f"hello {n}", user_id, "alice", room_id)
+            for n in range(5)
+        ]
+        await asyncio.gather(*futures)
+        await ingestor.stop()
+
+    asyncio.run(run())
+
+    assert inserts == [2, 2, 1]
+
+
+def test_a_bad_row_fails_only_its_own_message(seed):
+    user_id, room_id = seed
+    ingestor, inserts = recording_ingestor()
+    delivered = []
+
+    async def listener(messages):
+        delivered.extend(message["content"] for message in messages)
+
+    ingestor.add_listener(listener)
+
+    async def run():
+        await ingestor.start()
+        futures = [
+            await ingestor.submit(content, user_id, "alice", room_id)
+            for content in ["one", "two", None, "four"]  # type: ignore[list-item]
+        ]
+        results = await asyncio.gather(*futures, return_exceptions=True)
+        await ingestor.stop()
+        return results
+
+    results = asyncio.run(run())
+
+    assert results[0]["content"] == "one"
+    assert results[1]["content"] == "two"
+    assert isinstance(results[2], Exception)
+    assert results[3]["content"] == "four"
+    assert inserts[0] == 4 and len(inserts) > 1
+    assert delivered == ["one", "two", "four"]
+    assert stored_contents() == ["one", "two", "four"]
+
+
+def test_unavailable_database_fails_the_whole_batch_once(seed):
+    user_id, room_id = seed
+    ingestor = MessageIngestor(max_delay_ms=50)
+    calls = []
+
+    async def failing_insert(batch):
+        calls.append(len(batch))
+        raise OSError("connection refused")
+
+    ingestor._insert = failing_insert  # type: ignore[method-assign]
+
+    async def run():
+        await ingestor.start()
+        futures = [
+            await ingestor.submit(f"hello {n}", user_id, "alice", room_id)
+            for n in range(3)
+        ]
+        results = await asyncio.gather(*futures, return_exceptions=True)
+        await ingestor.stop()
+        return results
+
+    results = asyncio.run(run())
+
+    assert calls == [3]
+    assert all(isinstance(result, OSError) for result in results)
+
+
+def test_stop_flushes_queued_messages_then_rejects_submits(seed):
+    user_id, room_id = seed
+    ingestor = MessageIngestor(max_delay_ms=1000)
+
+    async def run():
+        await ingestor.start()
+        future = await ingestor.submit("last words", user_id, "alice", room_id)
+        await ingestor.stop()
+        assert future.done()
+        with pytest.raises(RuntimeError):
+            await ingestor.submit("too late", user_id, "alice", room_id)
+        return future.result()
+
+    message = asyncio.run(run())
+
+    assert message["content"] == "last words"
+    assert stored_contents() == ["last words"]
+
+
+def test_submit_while_stopping_is_rejected(seed):
+    user_id, room_id = seed
+    ingestor = MessageIngestor(max_delay_ms=50)
+
+    async def run():
+        await ingestor.start()
+        stopping = asyncio.create_task(ingestor.stop())
+        await asyncio.sleep(0)
+        with pytest.raises(RuntimeError):
+            await ingestor.submit("too late", user_id, "alice", room_id)
+        await stopping
+
+    asyncio.run(run())
+
+    with SessionLocal() as session:
+        assert session.scalar(select(func.count(Message.id))) == 0
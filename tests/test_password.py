@@ -0,0 +1,64 @@
+import asyncio
+
+import pytest
+
+from src.sc_chat.security.password import PasswordHasher
+from src.sc_chat.utils.common.exception import ServiceBusyException
+
+
+@pytest.fixture
+def hasher():
+    hasher = PasswordHasher(workers=1, max_pending=2, rounds=4)
+    yield hasher
+    hasher.stop()
+
+
+def test_hash_and_verify(hasher):
+    async def run():
+        hashed = await hasher.hash("secret")
+        return (
+            await hasher.verify("secret", hashed),
+            await hasher.verify("wrong", hashed),
+        )
+
+    assert asyncio.run(run()) == ((True, None), (False, None))
+
+
+def test_dead_worker_is_replaced_and_the_call_retried(hasher):
+    async def run():
+        hashed = await hasher.hash("secret")
+        assert hasher._executor is not None
+        broken = hasher._executor
+        for process in list(broken._processes.values()):  # type: ignore[attr-defined]
+            process.kill()
+            process.join()
+        valid, _ = await hasher.verify("secret", hashed)
+        return valid, broken
+
+    valid, broken = asyncio.run(run())
+
+    assert valid
+    assert hasher._executor is not None
+    assert hasher._executor is not broken
+
+
+def test_calls_beyond_max_pending_are_rejected(hasher):
+    async def run():
+        calls = [hasher.hash("secret") for _ in range(3)]
+        return await asyncio.gather(*calls, return_exceptions=True)
+
+    results = asyncio.run(run())
+
+    assert isinstance(results[2], ServiceBusyException)
+    assert all(isinstance(result, str) for result in results[:2])
+    assert hasher.rejected == 1
+
+
+def test_verify_dummy_builds_its_hash_once(hasher):
+    asyncio.run(hasher.verify_dummy("secret"))
+    dummy_hash = hasher._dummy_hash
+    asyncio.run(hasher.verify_dummy("other"))
+
+    assert dummy_hash is not None
+    assert hasher._dummy_hash == dummy_hash
+    assert hasher.pending == 0
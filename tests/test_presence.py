@@ -0,0 +1,104 @@
+import asyncio
+import json
+
+from src.sc_chat.security.identity_cache import UserIdentity
+from src.sc_chat.utils.common.enum import UserRoleEnum
+from src.sc_chat.websocket.connection_manager import ConnectionManager
+from src.sc_chat.websocket.presence import PresenceService
+from src.sc_chat.websocket.pubsub import InMemoryBroker, InMemoryPubSub
+
+ROOM_ID = 1
+
+
+class RecordingWebSocket:
+    def __init__(self):
+        self.frames = []
+
+    async def accept(self, subprotocol=None):
+        pass
+
+    async def send_text(self, data):
+        self.frames.append(json.loads(data))
+
+    def presence(self):
+        return [frame["data"] for frame in self.frames if frame["type"] == "presence"]
+
+
+def identity(user_id):
+    return UserIdentity(
+        id=user_id,
+        email=f"user{user_id}@example.com",
+        username=f"user{user_id}",
+        role=UserRoleEnum.USER,
+        is_active=True,
+    )
+
+
+def test_diffs_are_debounced_per_user():
+    async def run():
+        manager = ConnectionManager(InMemoryPubSub(InMemoryBroker()))
+        presence = PresenceService(manager, debounce_ms=20)
+        watcher, first_tab, second_tab = (RecordingWebSocket() for _ in range(3))
+        await manager.connect(watcher, identity(1), ROOM_ID)
+        await asyncio.sleep(0.05)
+
+        await manager.connect(first_tab, identity(2), ROOM_ID)
+        await manager.connect(second_tab, identity(2), ROOM_ID)
+        await asyncio.sleep(0.05)
+
+        # Closing one tab, or reconnecting within the window, changes nothing
+        manager.disconnect(second_tab)
+        manager.disconnect(first_tab)
+        await manager.connect(first_tab, identity(2), ROOM_ID)
+        await asyncio.sleep(0.05)
+        presence.stop()
+        return watcher
+
+    watcher = asyncio.run(run())
+
+    assert watcher.presence() == [
+        {
+            "room_id": ROOM_ID,
+            "joined": [{"user_id": 1, "username": "user1"}],
+            "left": [],
+        },
+        {
+            "room_id": ROOM_ID,
+            "joined": [{"user_id": 2, "username": "user2"}],
+            "left": [],
+        },
+    ]
+
+
+def test_diffs_stay_on_the_worker_whose_roster_changed():
+    async def run():
+        broker = InMemoryBroker()
+        workers = [ConnectionManager(InMemoryPubSub(broker)) for _ in range(2)]
+        services = [PresenceService(worker, debounce_ms=0) for worker in workers]
+        here, there = RecordingWebSocket(), RecordingWebSocket()
+        await workers[0].connect(here, identity(1), ROOM_ID)
+        await workers[1].connect(there, identity(2), ROOM_ID)
+        await asyncio.sleep(0.02)
+
+        workers[1].disconnect(there)
+        await asyncio.sleep(0.02)
+        for service in services:
+            service.stop()
+        return here, there
+
+    here, there = asyncio.run(run())
+
+    assert here.presence() == [
+        {
+            "room_id": ROOM_ID,
+            "joined": [{"user_id": 1, "username": "user1"}],
+            "left": [],
+        }
+    ]
+    assert there.presence() == [
+        {
+            "room_id": ROOM_ID,
+            "joined": [{"user_id": 2, "username": "user2"}],
+            "left": [],
+        }
+    ]
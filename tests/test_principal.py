@@ -0,0 +1,88 @@
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import event
+
+from src.sc_chat.core.config import settings
+from src.sc_chat.database.base import SessionLocal
+from src.sc_chat.security.auth import jwt_service
+from src.sc_chat.security.principal import Principal
+from src.sc_chat.utils.common.enum import UserRoleEnum
+
+
+class UnusedSession:
+    """Fails the test if the database is touched."""
+
+    def __getattr__(self, name):
+        raise AssertionError(f"the session was used: {name}")
+
+
+def token(**claims):
+    claims.setdefault("email", "alice@example.com")
+    return jwt_service.create_access_token(claims)
+
+
+@pytest.fixture
+def stateless(monkeypatch):
+    monkeypatch.setattr(settings, "stateless_auth", True)
+
+
+def test_stateless_auth_trusts_the_token_claims(stateless):
+    principal = jwt_service.get_current_principal(
+        db=UnusedSession(), token=token(uid=7, role=UserRoleEnum.ADMIN.value)
+    )
+
+    assert (principal.id, principal.email, principal.role) == (
+        7,
+        "alice@example.com",
+        UserRoleEnum.ADMIN,
+    )
+
+
+def test_stateless_auth_rejects_an_unknown_role(stateless):
+    with pytest.raises(HTTPException) as raised:
+        jwt_service.get_current_principal(
+            db=UnusedSession(), token=token(uid=7, role="ROOT")
+        )
+
+    assert raised.value.status_code == 401
+
+
+def test_tokens_without_the_claims_load_the_user(seed, stateless):
+    user_id, _ = seed
+    with SessionLocal() as session:
+        principal = jwt_service.get_current_principal(db=session, token=token())
+
+    assert (principal.id, principal.role) == (user_id, UserRoleEnum.USER)
+
+
+def test_the_role_comes_from_the_database_unless_stateless(client, seed, monkeypatch):
+    user_id, _ = seed
+    headers = {
+        "Authorization": f"Bearer {token(uid=user_id, role=UserRoleEnum.ADMIN.value)}"
+    }
+
+    assert client.get("/api/v1/user/", headers=headers).status_code == 403
+
+    monkeypatch.setattr(settings, "stateless_auth", True)
+    assert client.get("/api/v1/user/", headers=headers).status_code == 200
+
+
+def test_load_user_queries_the_database_once(seed):
+    user_id, _ = seed
+    principal = Principal(id=user_id, email="alice@example.com", role=UserRoleEnum.USER)
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, many):
+        statements.append(statement)
+
+    with SessionLocal() as session:
+        event.listen(session.get_bind(), "before_cursor_execute", record)
+        try:
+            first = principal.load_user(session)
+            second = principal.load_user(session)
+        finally:
+            event.remove(session.get_bind(), "before_cursor_execute", record)
+
+    assert first is second
+    assert first is not None and first.username == "alice"
+    assert len(statements) == 1
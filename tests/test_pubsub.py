@@ -0,0 +1,133 @@
+import asyncio
+import logging
+
+import pytest
+
+from src.sc_chat.websocket import pubsub
+from src.sc_chat.websocket.pubsub import PubSubBackend, UnixSocketPubSub
+
+ROOM_ID = 1
+
+
+@pytest.fixture(autouse=True)
+def fast_reconnect(monkeypatch):
+    monkeypatch.setattr(pubsub, "RECONNECT_DELAY_SECONDS", 0.01)
+
+
+class Node:
+    """A UnixSocketPubSub worker recording what it receives."""
+
+    def __init__(self, path):
+        self.backend = UnixSocketPubSub(path)
+        self.received = []
+        self.resets = 0
+        self.backend.set_handler(self._receive)
+        self.backend.set_reset_handler(self._reset)
+
+    async def _receive(self, room_id, message):
+        self.received.append((room_id, message))
+
+    def _reset(self):
+        self.resets += 1
+
+
+async def wait_until(predicate, timeout=2.0):
+    deadline = asyncio.get_running_loop().time() + timeout
+    while not predicate():
+        assert asyncio.get_running_loop().time() < deadline, "timed out"
+        await asyncio.sleep(0.01)
+
+
+async def subscribed_nodes(path, count):
+    nodes = [Node(path) for _ in range(count)]
+    for node in nodes:
+        await node.backend.start()
+        node.backend.subscribe(ROOM_ID)
+    host = next(node for node in nodes if node.backend._broker is not None)
+    broker = host.backend._broker
+    await wait_until(lambda: len(broker.rooms.get(ROOM_ID, ())) == count)
+    return nodes
+
+
+def test_backends_must_implement_publish():
+    with pytest.raises(TypeError):
+        PubSubBackend()  # type: ignore[abstract]
+
+
+def test_messages_reach_the_other_workers(tmp_path):
+    async def run():
+        first, second, third = await subscribed_nodes(str(tmp_path / "ps.sock"), 3)
+        third.backend.unsubscribe(ROOM_ID)
+        await asyncio.sleep(0.05)
+
+        await first.backend.publish(ROOM_ID, {"type": "message", "n": 1})
+        await wait_until(lambda: second.received)
+        await asyncio.sleep(0.05)
+        for node in (first, second, third):
+            await node.backend.stop()
+        return first, second, third
+
+    first, second, third = asyncio.run(run())
+
+    assert second.received == [(ROOM_ID, {"type": "message", "n": 1})]
+    # Publishers do not hear their own messages; unsubscribed workers miss them
+    assert first.received == []
+    assert third.received == []
+
+
+def test_another_worker_hosts_the_broker_when_the_host_exits(tmp_path):
+    async def run():
+        path = str(tmp_path / "ps.sock")
+        host, follower = await subscribed_nodes(path, 2)
+        assert host.backend._broker is not None
+        resets = follower.resets
+
+        await host.backend.stop()
+        await wait_until(lambda: follower.backend._broker is not None)
+        await wait_until(lambda: follower.resets > resets)
+
+        # A new worker joins the replacement broker and reaches the follower
+        newcomer = Node(path)
+        await newcomer.backend.start()
+        await wait_until(
+            lambda: len(follower.backend._broker.rooms.get(ROOM_ID, ())) == 1
+        )
+        await newcomer.backend.publish(ROOM_ID, {"n": 2})
+        await wait_until(lambda: follower.received)
+        await newcomer.backend.stop()
+        await follower.backend.stop()
+        return follower
+
+    follower = asyncio.run(run())
+
+    assert follower.received == [(ROOM_ID, {"n": 2})]
+
+
+def test_stopping_leaves_no_tasks_or_errors(tmp_path, caplog):
+    async def run():
+        nodes = await subscribed_nodes(str(tmp_path / "ps.sock"), 2)
+        # Stop the host first so the broker shuts down with a client connected
+        nodes.sort(key=lambda node: node.backend._broker is None)
+        for node in nodes:
+            await node.backend.stop()
+        await asyncio.sleep(0.05)
+        return [
+            task for task in asyncio.all_tasks() if task is not asyncio.current_task()
+        ]
+
+    with caplog.at_level(logging.WARNING):
+        leftover = asyncio.run(run())
+
+    assert leftover == []
+    assert caplog.records == []
+
+
+def test_event_loop_shutdown_with_clients_connected_is_quiet(tmp_path, caplog):
+    async def run():
+        # asyncio.run cancels the broker's client handlers on the way out
+        await subscribed_nodes(str(tmp_path / "ps.sock"), 2)
+
+    with caplog.at_level(logging.WARNING):
+        asyncio.run(run())
+
+    assert caplog.records == []
@@ -0,0 +1,85 @@
+from types import SimpleNamespace
+
+import pytest
+
+from src.sc_chat.security import rate_limit
+from src.sc_chat.security.rate_limit import RateLimiter, check_limits
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """A controllable monotonic clock for the rate limiter."""
+    clock = SimpleNamespace(now=1000.0)
+    monkeypatch.setattr(
+        rate_limit, "time", SimpleNamespace(monotonic=lambda: clock.now)
+    )
+    return clock
+
+
+def test_burst_then_refill(clock):
+    limiter = RateLimiter(rate=2, burst=3)
+
+    assert [limiter.allow("a") for _ in range(4)] == [True, True, True, False]
+    assert limiter.rejected == 1
+
+    clock.now += 0.5
+    assert limiter.allow("a")
+    assert not limiter.allow("a")
+
+    # Refills never go above the burst size
+    clock.now += 60
+    assert [limiter.allow("a") for _ in range(4)] == [True, True, True, False]
+
+
+def test_keys_have_separate_buckets(clock):
+    limiter = RateLimiter(rate=1, burst=1)
+
+    assert limiter.allow("a")
+    assert not limiter.allow("a")
+    assert limiter.allow("b")
+
+
+def test_rejection_reports_the_wait_until_the_next_token(clock):
+    limiter = RateLimiter(rate=4, burst=1)
+
+    assert check_limits((limiter, "a")) is None
+    assert check_limits((limiter, "a")) == pytest.approx(0.25)
+    clock.now += 0.1
+    assert check_limits((limiter, "a")) == pytest.approx(0.15)
+
+
+def test_a_rejected_check_takes_from_no_bucket(clock):
+    connection = RateLimiter(rate=1, burst=5)
+    room = RateLimiter(rate=1, burst=1)
+
+    assert check_limits((connection, "c"), (room, 1)) is None
+    assert check_limits((connection, "c"), (room, 1)) is not None
+
+    # Only the first, allowed check took a connection token
+    assert connection.available("c", clock.now) == pytest.approx(4)
+    assert room.rejected == 1
+    assert connection.rejected == 0
+
+
+def test_full_buckets_are_swept_past_max_keys(clock):
+    limiter = RateLimiter(rate=1, burst=2, max_keys=2)
+
+    limiter.allow("a")
+    limiter.allow("b")
+    clock.now += 1.5
+    limiter.allow("b")
+    clock.now += 0.5
+    # "a" has refilled completely, "b" has not
+    limiter.allow("c")
+
+    assert set(limiter.buckets) == {"b", "c"}
+    assert limiter.available("a", clock.now) == 2
+
+
+def test_forget_resets_a_bucket(clock):
+    limiter = RateLimiter(rate=1, burst=1)
+
+    limiter.allow("a")
+    limiter.forget("a")
+
+    assert limiter.allow("a")
@@ -0,0 +1,77 @@
+import pytest
+
+from src.sc_chat.core.config import settings
+from src.sc_chat.database.base import SessionLocal
+from src.sc_chat.models.message import Message
+
+
+@pytest.fixture
+def room_with_messages(seed):
+    user_id, room_id = seed
+    with SessionLocal() as session:
+        session.add_all(
+            Message(
+                content=f"m{n}",
+                user_id=user_id,
+                room_id=room_id,
+                author_username="alice",
+            )
+            for n in range(5)
+        )
+        session.commit()
+    return room_id
+
+
+def test_messages_are_paged_with_a_cursor(client, auth_headers, room_with_messages):
+    url = f"/api/v1/rooms/{room_with_messages}/messages"
+    headers = auth_headers()
+
+    pages = [client.get(url, params={"limit": 2}, headers=headers).json()]
+    while pages[-1]["has_more"]:
+        cursor = pages[-1]["next_cursor"]
+        pages.append(
+            client.get(
+                url, params={"limit": 2, "cursor": cursor}, headers=headers
+            ).json()
+        )
+
+    assert [[message["content"] for message in page["messages"]] for page in pages] == [
+        ["m3", "m4"],
+        ["m1", "m2"],
+        ["m0"],
+    ]
+    assert [page["next_cursor"] for page in pages] == [
+        pages[0]["messages"][0]["id"],
+        pages[1]["messages"][0]["id"],
+        None,
+    ]
+    assert set(pages[0]["messages"][0]) == {
+        "id",
+        "content",
+        "user_id",
+        "username",
+        "room_id",
+        "created_at",
+    }
+
+
+def test_the_message_limit_is_capped(client, auth_headers, room_with_messages):
+    url = f"/api/v1/rooms/{room_with_messages}/messages"
+    headers = auth_headers()
+
+    at_cap = client.get(
+        url, params={"limit": settings.history_max_messages}, headers=headers
+    )
+    past_cap = client.get(
+        url, params={"limit": settings.history_max_messages + 1}, headers=headers
+    )
+
+    assert at_cap.status_code == 200
+    assert len(at_cap.json()["messages"]) == 5
+    assert past_cap.status_code == 422
+
+
+def test_messages_of_a_missing_room_are_not_found(client, auth_headers, seed):
+    response = client.get("/api/v1/rooms/999/messages", headers=auth_headers())
+
+    assert response.status_code == 404
@@ -0,0 +1,130 @@
+import asyncio
+
+import pytest
+from sqlalchemy import exc, select
+
+from src.sc_chat.database.routing import Replica, ReplicaNotStreaming, ReplicaRouter
+from src.sc_chat.models.room import Room
+
+
+@pytest.fixture
+def make_router(db, tmp_path):
+    """Build routers over SQLite "replicas"; their pools are closed afterwards."""
+    routers = []
+
+    def make_router(replica_files, **options):
+        replicas = [
+            Replica(
+                f"sqlite:///{tmp_path / name}", f"sqlite+aiosqlite:///{tmp_path / name}"
+            )
+            for name in replica_files
+        ]
+        router = ReplicaRouter(replicas, **options)
+        routers.append(router)
+        return router
+
+    yield make_router
+    for router in routers:
+        asyncio.run(router.stop())
+
+
+def test_no_replicas_reads_from_the_primary(make_router):
+    router = make_router([])
+
+    assert router.pick() is None
+    assert router.primary_reads == 1
+
+
+def test_replicas_are_unused_until_their_first_check(make_router):
+    router = make_router(["a.db"])
+    assert router.pick() is None
+
+    asyncio.run(router.check_all())
+
+    assert router.pick() is router.replicas[0]
+    assert router.replica_reads == 1
+
+
+def test_reads_rotate_over_usable_replicas(make_router):
+    router = make_router(["a.db", "b.db", "c.db"], max_lag=5)
+    asyncio.run(router.check_all())
+    router.replicas[2].lag_seconds = 30
+
+    picks = [router.pick() for _ in range(4)]
+
+    assert {replica.name for replica in picks} == {
+        router.replicas[0].name,
+        router.replicas[1].name,
+    }
+    assert picks[0] is not picks[1]
+
+
+def test_lagging_replicas_fall_back_to_the_primary(make_router):
+    router = make_router(["a.db"], max_lag=5)
+    asyncio.run(router.check_all())
+    router.replicas[0].lag_seconds = 6
+
+    assert router.pick() is None
+
+
+def test_recent_writers_read_from_the_primary(make_router):
+    router = make_router(["a.db"], read_your_writes=60)
+    asyncio.run(router.check_all())
+
+    router.note_write(1)
+
+    assert router.pick(1) is None
+    assert router.pick(2) is router.replicas[0]
+
+
+def test_failing_check_marks_a_replica_down(make_router):
+    router = make_router(["missing/a.db"])
+
+    asyncio.run(router.check_all())
+
+    replica = router.replicas[0]
+    assert not replica.healthy
+    assert replica.error
+    assert router.pick() is None
+
+
+def test_replica_not_streaming_is_marked_down(make_router, monkeypatch):
+    router = make_router(["a.db"])
+    asyncio.run(router.check_all())
+    assert router.replicas[0].healthy
+
+    async def not_streaming(replica):
+        raise ReplicaNotStreaming("WAL receiver is not streaming")
+
+    monkeypatch.setattr(router, "measure_lag", not_streaming)
+    asyncio.run(router.check_all())
+
+    assert not router.replicas[0].healthy
+    assert router.replicas[0].error == "WAL receiver is not streaming"
+    assert router.pick() is None
+
+
+def test_replica_failing_mid_query_is_taken_out_of_rotation(make_router):
+    router = make_router(["a.db"])
+    asyncio.run(router.check_all())
+
+    async def read():
+        async with router.async_read_session():
+            raise exc.OperationalError("SELECT 1", {}, Exception("connection lost"))
+
+    with pytest.raises(exc.OperationalError):
+        asyncio.run(read())
+
+    assert not router.replicas[0].healthy
+    assert router.pick() is None
+
+    # The next passing check brings it back
+    asyncio.run(router.check_all())
+    assert router.pick() is router.replicas[0]
+
+
+def test_fallback_session_reads_the_primary(make_router, seed):
+    router = make_router(["a.db"])
+
+    with router.read_session() as session:
+        assert session.scalars(select(Room.name)).all() == ["general"]
@@ -0,0 +1,67 @@
+from src.sc_chat.repository.search_index import SearchIndex
+
+ROOM_ID = 1
+
+
+def built_index():
+    index = SearchIndex()
+    index.build(
+        ROOM_ID,
+        [
+            (1, "hello world"),
+            (2, "hello hello there"),
+            (3, "goodbye world"),
+        ],
+    )
+    return index
+
+
+def found(index, query, limit=10, offset=0):
+    page, _ = index.search(ROOM_ID, query, limit, offset)
+    return [message_id for message_id, _ in page]
+
+
+def test_messages_with_every_term_are_ranked():
+    index = built_index()
+
+    assert found(index, "hello") == [2, 1]
+    assert found(index, "Hello World") == [1]
+    assert found(index, "hello missing") == []
+
+
+def test_pages_report_has_more():
+    index = built_index()
+
+    assert index.search(ROOM_ID, "hello", 1)[1]
+    assert found(index, "hello", limit=1) == [2]
+    assert not index.search(ROOM_ID, "hello", 1, offset=1)[1]
+    assert found(index, "hello", limit=1, offset=1) == [1]
+
+
+def test_adds_and_removes_after_the_build():
+    index = built_index()
+
+    index.add(ROOM_ID, 4, "world peace")
+    index.add(ROOM_ID, 4, "world peace")
+    index.remove(ROOM_ID, 3)
+
+    assert sorted(found(index, "world")) == [1, 4]
+    # Rooms that were never searched are not indexed
+    index.add(2, 5, "world")
+    assert not index.is_built(2)
+
+
+def test_rooms_not_followed_are_dropped():
+    index = built_index()
+    index.follows_room = lambda room_id: False
+
+    assert not index.is_built(ROOM_ID)
+    assert ROOM_ID not in index.rooms
+
+
+def test_clear_forgets_every_room():
+    index = built_index()
+
+    index.clear()
+
+    assert not index.is_built(ROOM_ID)
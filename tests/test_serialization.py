@@ -0,0 +1,101 @@
+import asyncio
+import json
+
+from src.sc_chat.security.identity_cache import UserIdentity
+from src.sc_chat.utils.common import serialization
+from src.sc_chat.utils.common.enum import UserRoleEnum
+from src.sc_chat.utils.common.serialization import EncodedMessage, history_frame
+from src.sc_chat.websocket import connection_manager
+from src.sc_chat.websocket.connection_manager import ConnectionManager
+from src.sc_chat.websocket.pubsub import InMemoryBroker, InMemoryPubSub
+
+ROOM_ID = 1
+
+
+class RecordingWebSocket:
+    def __init__(self):
+        self.sent = []
+
+    async def accept(self, subprotocol=None):
+        pass
+
+    async def send_text(self, data):
+        self.sent.append(data)
+
+
+def identity(user_id):
+    return UserIdentity(
+        id=user_id,
+        email=f"user{user_id}@example.com",
+        username=f"user{user_id}",
+        role=UserRoleEnum.USER,
+        is_active=True,
+    )
+
+
+def counting(monkeypatch, module):
+    """Count the calls to a module's dumps."""
+    calls = []
+    dumps = module.dumps
+
+    def counting_dumps(obj):
+        calls.append(obj)
+        return dumps(obj)
+
+    monkeypatch.setattr(module, "dumps", counting_dumps)
+    return calls
+
+
+def payload(message_id):
+    return {"id": message_id, "content": f"m{message_id}", "username": "alice"}
+
+
+def test_a_message_is_encoded_at_most_once(monkeypatch):
+    calls = counting(monkeypatch, serialization)
+    message = EncodedMessage(payload(1))
+    preencoded = EncodedMessage(payload(2), b'{"id":2}')
+
+    assert message.encoded is message.encoded
+    assert preencoded.encoded == b'{"id":2}'
+    assert calls == [payload(1)]
+
+
+def test_history_frames_decode_to_the_same_page():
+    messages = [EncodedMessage(payload(n)) for n in (1, 2)]
+
+    frame = json.loads(history_frame(messages, True, 1, request_id="r1", final=False))
+    empty = json.loads(history_frame([], False, None))
+
+    assert frame == {
+        "type": "messages_history",
+        "data": {
+            "messages": [payload(1), payload(2)],
+            "has_more": True,
+            "next_cursor": 1,
+            "request_id": "r1",
+            "final": False,
+        },
+    }
+    assert empty["data"]["messages"] == []
+    assert empty["data"]["next_cursor"] is None
+
+
+def test_a_broadcast_is_encoded_once_for_every_recipient(monkeypatch):
+    calls = counting(monkeypatch, connection_manager)
+    message = {"type": "message", "data": payload(1)}
+
+    async def run():
+        manager = ConnectionManager(InMemoryPubSub(InMemoryBroker()))
+        sockets = [RecordingWebSocket() for _ in range(3)]
+        for user_id, websocket in enumerate(sockets, 1):
+            await manager.connect(websocket, identity(user_id), ROOM_ID)
+        await manager.broadcast_to_room(message, ROOM_ID)
+        await asyncio.sleep(0.01)
+        return sockets
+
+    sockets = asyncio.run(run())
+
+    assert calls == [message]
+    [frame] = sockets[0].sent
+    assert json.loads(frame) == message
+    assert [websocket.sent for websocket in sockets] == [[frame]] * 3